@@ -0,0 +1,73 @@
+"""
+Target Function Throughput
+^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+Measure how many trials per second `TargetFunction` can translate into hydra configs for a large search space.
+The task function does nothing, so only the sweeper overhead is measured. For reference, the in-place
+`OmegaConf.update` translation used before the precompiled override plan is timed as well.
+
+    python benchmarks/target_function.py --n-hyperparameters 1000 --n-trials 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from ConfigSpace import ConfigurationSpace, UniformFloatHyperparameter
+from hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend import TargetFunction
+from omegaconf import DictConfig, OmegaConf
+
+
+def create_config(n_hyperparameters: int) -> tuple[ConfigurationSpace, DictConfig]:
+    cs = ConfigurationSpace(seed=0)
+    cs.add_hyperparameters(
+        [UniformFloatHyperparameter(f"model.p{i}", lower=0.0, upper=1.0) for i in range(n_hyperparameters)]
+    )
+    config = OmegaConf.create(
+        {
+            "hydra": {"job": {"num": 0}},
+            "model": {f"p{i}": 0.5 for i in range(n_hyperparameters)},
+            "seed": 0,
+            "instance": None,
+        }
+    )
+    OmegaConf.set_struct(config, True)
+    return cs, config
+
+
+def in_place_update(config: DictConfig, trial: dict, seed: int) -> DictConfig:
+    for k, v in trial.items():
+        OmegaConf.update(config, k, v)
+    OmegaConf.update(config, "seed", seed, force_add=True)
+    OmegaConf.update(config, "instance", None, force_add=True)
+    return config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n-hyperparameters", type=int, default=1000)
+    parser.add_argument("--n-trials", type=int, default=200)
+    args = parser.parse_args()
+
+    cs, config = create_config(args.n_hyperparameters)
+    configs = cs.sample_configuration(args.n_trials)
+
+    start = time.perf_counter()
+    for i, c in enumerate(configs):
+        in_place_update(config, dict(c), seed=i)
+    baseline = args.n_trials / (time.perf_counter() - start)
+
+    target_function = TargetFunction(task_function=lambda cfg: 0.0, config=config)
+    start = time.perf_counter()
+    for i, c in enumerate(configs):
+        target_function(c, seed=i)
+    planned = args.n_trials / (time.perf_counter() - start)
+
+    print(f"{args.n_hyperparameters} hyperparameters, {args.n_trials} trials")
+    print(f"OmegaConf.update in place: {baseline:8.1f} trials/s")
+    print(f"TargetFunction:            {planned:8.1f} trials/s ({planned / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Sweeper Overhead
+^^^^^^^^^^^^^^^^
+
+Benchmarks of the overhead the sweeper and SMAC add to every trial, the time until the first trial finished and
+how the throughput scales with the number of dask workers. The targets cost (almost) nothing, so the measured time
+is overhead. Run with pytest-benchmark:
+
+    python -m pytest benchmarks --benchmark-only --no-cov
+
+Compare against a saved run with `--benchmark-autosave` and `--benchmark-compare`.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import importlib
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend import SMACSweeperBackend
+from omegaconf import DictConfig, OmegaConf
+
+pytest.importorskip("pytest_benchmark")
+
+FACADES = {
+    "blackbox": "smac.facade.blackbox_facade.BlackBoxFacade",
+    "hpo": "smac.facade.hyperparameter_optimization_facade.HyperparameterOptimizationFacade",
+    "multifidelity": "smac.facade.multi_fidelity_facade.MultiFidelityFacade",
+}
+
+SEARCH_SPACE = {
+    "hyperparameters": {
+        "x0": {"type": "uniform_float", "lower": -5, "upper": 10},
+        "x1": {"type": "uniform_float", "lower": 0, "upper": 15},
+    }
+}
+
+
+def branin(cfg: DictConfig) -> float:
+    x0, x1 = cfg.x0, cfg.x1
+    b = 5.1 / (4.0 * np.pi**2)
+    c = 5.0 / np.pi
+    t = 1.0 / (8.0 * np.pi)
+    return (x1 - b * x0**2 + c * x0 - 6.0) ** 2 + 10.0 * (1 - t) * np.cos(x0) + 10.0
+
+
+def sleep(cfg: DictConfig) -> float:
+    time.sleep(cfg.sleep)
+    return cfg.x0**2
+
+
+def create_sweeper(
+    sweep_dir: Path, facade: str, n_trials: int, task_function: Any = branin, n_workers: int = 1
+) -> SMACSweeperBackend:
+    scenario: dict[str, Any] = {"seed": 0, "n_trials": n_trials, "deterministic": True, "n_workers": n_workers}
+    config: dict[str, Any] = {"hydra": {"sweep": {"dir": str(sweep_dir)}}, "x0": 0.0, "x1": 0.0, "sleep": 0.1}
+    if facade == "multifidelity":
+        scenario.update(min_budget=1, max_budget=9)
+        config["budget_variable"] = "epochs"
+        config["epochs"] = 9
+    sweeper = SMACSweeperBackend(
+        search_space=OmegaConf.create(SEARCH_SPACE),
+        scenario=OmegaConf.create(scenario),
+        smac_class=FACADES[facade],
+        smac_kwargs=OmegaConf.create({"overwrite": True, "logging_level": 40}),
+    )
+    sweeper.config = OmegaConf.create(config)
+    sweeper.task_function = task_function
+    return sweeper
+
+
+@pytest.mark.parametrize("facade", list(FACADES))
+def test_overhead_per_trial(benchmark: Any, tmp_path: Path, facade: str) -> None:
+    n_trials = 30
+
+    def setup() -> tuple[tuple, dict]:
+        smac = create_sweeper(tmp_path, facade, n_trials).setup_smac()
+        return (smac,), {}
+
+    benchmark.pedantic(lambda smac: smac.optimize(), setup=setup, rounds=3)
+    benchmark.extra_info["n_trials"] = n_trials
+    benchmark.extra_info["seconds_per_trial"] = benchmark.stats.stats.mean / n_trials
+
+
+@pytest.mark.parametrize("facade", list(FACADES))
+def test_time_to_first_trial(benchmark: Any, tmp_path: Path, facade: str) -> None:
+    def first_trial() -> None:
+        smac = create_sweeper(tmp_path, facade, n_trials=1).setup_smac()
+        smac.optimize()
+
+    benchmark.pedantic(first_trial, rounds=3)
+
+
+@pytest.mark.parametrize("n_workers", [1, 2, 4])
+def test_worker_scaling(benchmark: Any, tmp_path: Path, n_workers: int) -> None:
+    # Each worker runs 4 trials of 0.1s, perfect scaling keeps the time constant
+    n_trials = 4 * n_workers
+
+    def setup() -> tuple[tuple, dict]:
+        smac = create_sweeper(tmp_path, "hpo", n_trials, task_function=sleep, n_workers=n_workers).setup_smac()
+        # SMAC only starts a local dask cluster for more than one worker. Its start up and the imports on the fresh
+        # workers are not measured, only the steady state throughput.
+        if n_workers > 1:
+            client = smac._runner._client
+            client.wait_for_workers(n_workers)
+            client.run(importlib.import_module, "hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend")
+            client.run(importlib.import_module, __name__)
+        return (smac,), {}
+
+    def teardown(smac: Any) -> None:
+        if n_workers > 1:
+            smac._runner.close(force=True)
+
+    benchmark.pedantic(lambda smac: smac.optimize(), setup=setup, teardown=teardown, rounds=2)
+    benchmark.extra_info["n_trials"] = n_trials
+    benchmark.extra_info["trials_per_second"] = n_trials / benchmark.stats.stats.mean
@@ -13,8 +13,9 @@ __license__ = "3-clause BSD"
 
 @hydra.main(config_path="configs", config_name="branin", version_base="1.1")
 def branin(cfg: DictConfig):
-    x0 = cfg.x0
-    x1 = cfg.x1
+    # Arrays, so that a batch of configurations can be evaluated at once with `batch_evaluation`
+    x0 = np.asarray(cfg.x0)
+    x1 = np.asarray(cfg.x1)
     a = 1.0
     b = 5.1 / (4.0 * np.pi**2)
     c = 5.0 / np.pi
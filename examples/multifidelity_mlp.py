@@ -10,12 +10,17 @@ aggressive racing mechanism and successive halving.
 MLP is a deep neural network, and therefore, we choose epochs as fidelity type. The digits dataset
 is chosen to optimize the average accuracy on 5-fold cross validation.
 
+The dataset is loaded once per worker by `load_dataset`, which is configured as `worker_setup` of the sweeper, and
+passed to every trial as `worker_state`.
+
 This example is adapted from `<https://github.com/automl/SMAC3/blob/main/examples/2_multi_fidelity/1_mlp_epochs.py>`_.
 """
 __copyright__ = "Copyright 2022, AutoML.org Freiburg-Hannover"
 __license__ = "3-clause BSD"
 
 
+from typing import Any
+
 import warnings
 
 import hydra
@@ -26,12 +31,26 @@ from sklearn.exceptions import ConvergenceWarning
 from sklearn.model_selection import StratifiedKFold, cross_val_score
 from sklearn.neural_network import MLPClassifier
 
-digits = load_digits()
+
+def load_dataset(cfg: DictConfig) -> Any:
+    """
+    Loads the dataset, once per worker.
+
+    Parameters
+    ----------
+    cfg: DictConfig
+        config of the sweep
+
+    Returns
+    -------
+    Bunch
+    """
+    return load_digits()
 
 
 # Target Algorithm
 @hydra.main(config_path="configs", config_name="mlp", version_base="1.1")
-def mlp_from_cfg(cfg: DictConfig):
+def mlp_from_cfg(cfg: DictConfig, worker_state: Any = None):
     """
     Creates a MLP classifier from sklearn and fits the given data on it.
 
@@ -39,6 +58,8 @@ def mlp_from_cfg(cfg: DictConfig):
     ----------
     cfg: Configuration
         configuration chosen by smac
+    worker_state: Any
+        dataset loaded by `load_dataset`, None if the function is not run by the sweeper
 
     Returns
     -------
@@ -49,6 +70,7 @@ def mlp_from_cfg(cfg: DictConfig):
     lr = cfg.learning_rate or "constant"
     lr_init = cfg.learning_rate_init or 0.001
     batch_size = cfg.batch_size or 200
+    digits = worker_state if worker_state is not None else load_dataset(cfg)
 
     with warnings.catch_warnings():
         warnings.filterwarnings("ignore", category=ConvergenceWarning)
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Hashable
+
+import dataclasses
+import logging
+import threading
+from concurrent.futures import Future
+
+from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+from smac.runhistory import TrialInfo
+
+# Additional info of a trial whose result is the one of an identical trial which was running already
+COALESCED_KEY = "coalesced"
+
+log = logging.getLogger(__name__)
+
+
+def get_in_flight_key(info: TrialInfo) -> Hashable:
+    """Trials with the same key are identical: configuration, instance, seed and budget."""
+    return info.config, info.instance, info.seed, info.budget
+
+
+class AttachedFuture(Future):
+    """Future of a trial which is attached to the running future of an identical trial and takes no worker."""
+
+
+class InFlightTrials(object):
+    def __init__(self) -> None:
+        """
+        Run identical trials which are requested while one of them is running only once.
+
+        SMAC may ask for a trial with the same configuration, instance, seed and budget as a running trial, e.g. in
+        the initial design or by random interleaving over a small search space. The later trial is attached to the
+        future of the running one instead of being submitted, and gets a copy of its trial value with
+        `coalesced` in the additional info. Both are told to SMAC.
+
+        Returns
+        -------
+        None
+
+        """
+        self.n_coalesced = 0
+        self._running: dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._running)
+
+    def submit(self, submit: Callable[[TrialInfo], Any], trial_info: TrialInfo) -> Any:
+        """
+        Submit a trial, unless an identical trial is running.
+
+        Parameters
+        ----------
+        submit: Callable[[TrialInfo], Any]
+            Submits a trial and returns its future, e.g. `SharedRunner.submit`. The result of the future is a tuple
+            of the trial and its trial value.
+        trial_info: TrialInfo
+            Trial to run
+
+        Returns
+        -------
+        Any
+            Future of the submitted trial, or an `AttachedFuture` if an identical trial is running.
+
+        """
+        key = get_in_flight_key(trial_info)
+        with self._lock:
+            running = self._running.get(key, None)
+            if running is not None:
+                self.n_coalesced += 1
+                log.debug(f"Attaching to the identical running trial: {trial_info}")
+                return self._attach(running)
+            future = submit(trial_info)
+            self._running[key] = future
+        future.add_done_callback(lambda future: self._release(key, future))
+        return future
+
+    def _release(self, key: Hashable, future: Any) -> None:
+        with self._lock:
+            if self._running.get(key, None) is future:
+                del self._running[key]
+
+    def _attach(self, running: Any) -> AttachedFuture:
+        attached = AttachedFuture()
+        attached.set_running_or_notify_cancel()
+
+        def finished(running: Any) -> None:
+            try:
+                trial, value = running.result()
+            except BaseException as e:
+                attached.set_exception(e)
+                return
+            additional_info = dict(value.additional_info, **{COALESCED_KEY: True})
+            attached.set_result((trial, dataclasses.replace(value, additional_info=additional_info)))
+
+        running.add_done_callback(finished)
+        return attached
+
+    def wrap(self, submit: Callable[[TrialInfo], Any]) -> Callable[[TrialInfo], Any]:
+        """Submit function which coalesces identical trials, e.g. for `AskTellDriver`."""
+        return lambda trial_info: self.submit(submit, trial_info)
+
+
+def dispatch(
+    submit: Callable[[TrialInfo], Any],
+    trial_info: TrialInfo,
+    retry: RetryPolicy | None = None,
+    in_flight: InFlightTrials | None = None,
+    closing: threading.Event | None = None,
+) -> Any:
+    """Submit a trial which is retried by `retry` if it is lost and coalesced by `in_flight` with identical trials.
+
+    Lost trials are not retried anymore once `closing` is set, i.e. the runner shuts down.
+    """
+    if retry is not None:
+        submit = retry.wrap(submit, closing=closing)
+    if in_flight is not None:
+        return in_flight.submit(submit, trial_info)
+    return submit(trial_info)
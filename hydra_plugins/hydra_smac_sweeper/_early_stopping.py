@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import contextvars
+import sqlite3
+import uuid
+from pathlib import Path
+
+import numpy as np
+from hydra_plugins.hydra_smac_sweeper._sqlite import SQLiteDatabase
+
+# Additional info of a trial which was stopped early, the step at which it was stopped
+EARLY_STOPPED_KEY = "early_stopped_at"
+
+_reporter: contextvars.ContextVar[Reporter | None] = contextvars.ContextVar("hydra_smac_sweeper_reporter", default=None)
+
+
+class TrialStopped(Exception):
+    def __init__(self, cost: float, step: float) -> None:
+        """Raised by `report` when the sweeper stops the running trial, the task function may let it propagate."""
+        super().__init__(f"Trial stopped early at step {step} with cost {cost}.")
+        self.cost = cost
+        self.step = step
+
+
+def report(cost: float, step: float) -> None:
+    """Report an intermediate cost of the running trial, e.g. the validation loss after an epoch
+
+    Parameters
+    ----------
+    cost : float
+        Intermediate cost, lower is better
+    step : float
+        Progress of the trial in the unit of the budget, e.g. the number of epochs trained so far
+
+    Raises
+    ------
+    TrialStopped
+        If the trial is worse than the other trials at the same step. The sweeper tells SMAC the last reported cost.
+    """
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.report(cost, step)
+
+
+class MedianStoppingRule(SQLiteDatabase):
+    def __init__(
+        self,
+        path: str | Path,
+        min_trials: int = 5,
+        min_step: float = 0.0,
+        percentile: float = 50.0,
+        timeout: float = 30.0,
+    ) -> None:
+        """
+        Stop trials whose best intermediate cost is worse than the median of the other trials at the same step.
+
+        The learning curves of trials which finished without being stopped are stored in a SQLite database, which can
+        be shared by several processes. A trial is compared with the finished trials which reported the same step, by
+        their average cost over the steps up to it. The averages are stored per step when a trial finishes, so that a
+        report only reads the averages at its step.
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the database file
+        min_trials : int
+            Trials are not stopped before this many finished trials reached the step
+        min_step : float
+            Trials are not stopped before this step
+        percentile : float
+            Trials are stopped if they are worse than this percentile of the other trials, the median by default
+        timeout : float
+            Seconds to wait for a lock on the database
+
+        Returns
+        -------
+        None
+
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"percentile must be between 0 and 100, got {percentile}.")
+        super().__init__(path, timeout=timeout)
+        self.min_trials = min_trials
+        self.min_step = min_step
+        self.percentile = percentile
+
+    def create_tables(self, connection: sqlite3.Connection) -> None:  # noqa: D102
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS averages (trial TEXT NOT NULL, step REAL NOT NULL, average REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS averages_step ON averages (step)")
+
+    def should_stop(self, best_cost: float, step: float) -> bool:
+        """Whether a trial with the best intermediate cost `best_cost` up to `step` should be stopped."""
+        if step < self.min_step:
+            return False
+        with self._lock:
+            rows = self.connection.execute("SELECT average FROM averages WHERE step = ?", (step,)).fetchall()
+        averages = [average for (average,) in rows]
+        if len(averages) < self.min_trials:
+            return False
+        return best_cost > np.percentile(averages, self.percentile)
+
+    def add_curve(self, trial: str, curve: list[tuple[float, float]]) -> None:
+        """Store the learning curve, i.e. the reported steps and costs, of a finished trial."""
+        # Average cost over the steps up to every reported step
+        averages: dict[float, float] = {}
+        total = 0.0
+        for i, (s, c) in enumerate(sorted(curve, key=lambda point: point[0])):
+            total += c
+            averages[s] = total / (i + 1)
+        with self._lock, self.connection as connection:
+            connection.executemany(
+                "INSERT INTO averages VALUES (?, ?, ?)", [(trial, s, a) for s, a in averages.items()]
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(DISTINCT trial) FROM averages").fetchone()[0]
+
+
+class Reporter(object):
+    def __init__(self, rule: MedianStoppingRule) -> None:
+        """Collect the intermediate costs of a running trial and stop it according to `rule`."""
+        self.rule = rule
+        self.trial = uuid.uuid4().hex
+        self.curve: list[tuple[float, float]] = []
+
+    def report(self, cost: float, step: float) -> None:
+        """Record an intermediate cost, see `report`."""
+        cost = float(cost)
+        self.curve.append((float(step), cost))
+        if self.rule.should_stop(min(c for _, c in self.curve), step):
+            raise TrialStopped(cost, step)
+
+
+def run_reporting(rule: MedianStoppingRule, task_function: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call a task function which may report intermediate costs
+
+    Parameters
+    ----------
+    rule : MedianStoppingRule
+        Rule deciding which trials are stopped
+    task_function : Callable
+        Hydra task function, called with `args` and `kwargs`
+
+    Returns
+    -------
+    Any
+        Result of the task function. If the trial was stopped, the last reported cost and the step it was stopped at
+        as additional info.
+    """
+    reporter = Reporter(rule)
+    token = _reporter.set(reporter)
+    try:
+        result = task_function(*args, **kwargs)
+    except TrialStopped as e:
+        # The curve of a stopped trial is cut off, it would bias the comparison of the next trials
+        return e.cost, {EARLY_STOPPED_KEY: e.step}
+    finally:
+        _reporter.reset(token)
+    if len(reporter.curve) > 0:
+        rule.add_curve(reporter.trial, reporter.curve)
+    return result
+
+
+class ReportingTask(object):
+    def __init__(self, task_function: Callable, rule: MedianStoppingRule) -> None:
+        """
+        Call a task function which may report intermediate costs, for the hydra launcher.
+
+        Parameters
+        ----------
+        task_function: Callable
+            Hydra task function
+        rule: MedianStoppingRule
+            Rule deciding which trials are stopped
+
+        Returns
+        -------
+        None
+
+        """
+        self.task_function = task_function
+        self.rule = rule
+
+    def __call__(self, cfg: Any, **kwargs: Any) -> Any:
+        return run_reporting(self.rule, self.task_function, cfg, **kwargs)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Any
+
+import logging
+import math
+
+from dask_jobqueue import JobQueueCluster  # type: ignore[import]
+from distributed.deploy import Adaptive, Cluster
+from smac.callback import Callback
+from smac.intensifier.successive_halving import SuccessiveHalving
+from smac.main.smbo import SMBO
+from smac.runhistory import TrialInfo, TrialValue
+
+log = logging.getLogger(__name__)
+
+
+def count_open_trials(intensifier: SuccessiveHalving) -> int:
+    """Count the trials of the tracked brackets and stages which are neither running nor evaluated
+
+    Parameters
+    ----------
+    intensifier : SuccessiveHalving
+        Successive halving or hyperband intensifier
+
+    Returns
+    -------
+    int
+        Number of trials the intensifier can hand out before it has to start a new bracket
+    """
+    n_open = 0
+    for (bracket, stage), pairs in list(intensifier._tracker.items()):
+        for seed, configs in pairs:
+            isb_keys = intensifier._get_instance_seed_budget_keys_by_stage(bracket=bracket, stage=stage, seed=seed)
+            n_open += sum(len(intensifier._get_next_trials(config, from_keys=isb_keys)) for config in configs)
+    return n_open
+
+
+def estimate_demand(smbo: SMBO) -> int:
+    """Estimate how many trials could run at the same time
+
+    The demand are the running trials and the trials which can be started right away. The latter are limited by the
+    remaining budget and, for successive halving, by the width of the open brackets.
+
+    Parameters
+    ----------
+    smbo : SMBO
+        SMAC's optimizer
+
+    Returns
+    -------
+    int
+        Number of trials
+    """
+    n_running = len(smbo.runhistory.get_running_trials())
+    # Running trials were already submitted and are not part of the remaining trials
+    n_open = max(smbo.remaining_trials, 0)
+    if isinstance(smbo.intensifier, SuccessiveHalving):
+        n_open = min(n_open, count_open_trials(smbo.intensifier))
+    return n_running + n_open
+
+
+class QueueAdaptive(Adaptive):
+    """Adaptive scaling towards the demand of the optimizer instead of the tasks known to the scheduler.
+
+    SMAC only submits as many trials as there are worker threads, the scheduler never sees a backlog.
+    """
+
+    demand: int = 0
+
+    async def target(self) -> int:
+        workers = self.cluster.scheduler_info.get("workers", {})
+        threads_per_worker = max([worker["nthreads"] for worker in workers.values()], default=1)
+        return math.ceil(self.demand / threads_per_worker)
+
+
+class ElasticScaler(Callback):
+    def __init__(
+        self,
+        cluster: Cluster,
+        min_jobs: int = 1,
+        max_jobs: int = 1,
+        cooldown: float = 60.0,
+        interval: float = 1.0,
+    ) -> None:
+        """
+        Scale a dask cluster up and down with the demand of the optimizer.
+
+        The demand is updated whenever SMAC asks or tells a trial. The cluster is scaled up as soon as the demand
+        exceeds the workers, idle workers are only retired after the demand stayed lower for `cooldown` seconds.
+
+        Parameters
+        ----------
+        cluster: Cluster
+            Dask cluster, for a `JobQueueCluster` the limits are in jobs, otherwise in workers.
+        min_jobs: int
+            Minimum number of jobs.
+        max_jobs: int
+            Maximum number of jobs.
+        cooldown: float
+            Seconds the demand has to stay lower before the cluster is scaled down.
+        interval: float
+            Seconds between two scaling decisions.
+
+        Returns
+        -------
+        None
+
+        """
+        if min_jobs < 0 or max_jobs < max(min_jobs, 1):
+            raise ValueError(f"Invalid limits for elastic scaling: min_jobs={min_jobs}, max_jobs={max_jobs}.")
+        self.cluster = cluster
+        self.min_jobs = min_jobs
+        self.max_jobs = max_jobs
+
+        adaptive_kwargs: dict[str, Any] = dict(
+            Adaptive=QueueAdaptive, interval=interval, wait_count=max(1, math.ceil(cooldown / interval))
+        )
+        if isinstance(cluster, JobQueueCluster):
+            self.adaptive = cluster.adapt(minimum_jobs=min_jobs, maximum_jobs=max_jobs, **adaptive_kwargs)
+        else:
+            self.adaptive = cluster.adapt(minimum=min_jobs, maximum=max_jobs, **adaptive_kwargs)
+
+    def update(self, smbo: SMBO) -> None:
+        """Update the demand of the optimizer."""
+        self.adaptive.demand = estimate_demand(smbo)
+
+    def on_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self.update(smbo)
+
+    def on_ask_end(self, smbo: SMBO, info: TrialInfo) -> None:  # noqa: D102
+        self.update(smbo)
+
+    def on_tell_end(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        self.update(smbo)
+        return None
+
+    def close(self) -> None:
+        """Stop scaling and shut the cluster down, e.g. cancel its batch jobs."""
+        self.adaptive.stop(reason="sweep-finished")
+        self.cluster.close()
+        log.info("Closed the elastically scaled cluster.")
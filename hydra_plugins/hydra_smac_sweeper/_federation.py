@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+import functools
+import logging
+import threading
+import time
+
+from ConfigSpace import Configuration  # type: ignore[import]
+from distributed import Client, Future
+from hydra_plugins.hydra_smac_sweeper._coalescing import InFlightTrials, dispatch
+from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+from hydra_plugins.hydra_smac_sweeper._shared_runner import SharedRunner
+from hydra_plugins.hydra_smac_sweeper._trials import crashed_trial_value
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+from smac.runner import AbstractRunner
+
+log = logging.getLogger(__name__)
+
+
+class FederatedCluster(object):
+    def __init__(
+        self,
+        name: str,
+        client: Client,
+        runner: AbstractRunner,
+        max_in_flight: int | None = None,
+        resources: Callable[[TrialInfo], dict[str, float]] | None = None,
+    ) -> None:
+        """
+        A dask cluster of a federation and the trials running on it.
+
+        Parameters
+        ----------
+        name: str
+            Name of the cluster in the logs
+        client: Client
+            Dask client connected to the cluster
+        runner: AbstractRunner
+            Runner executing the trials on the workers, shipped once with a `SharedRunner`
+        max_in_flight: int | None
+            Maximum number of trials running on the cluster. By default the number of threads of its workers.
+        resources: Callable[[TrialInfo], dict[str, float]] | None
+            Dask worker resources which a trial needs, see `SharedRunner`
+
+        Returns
+        -------
+        None
+
+        """
+        self.name = name
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.shared = SharedRunner(client, runner, resources=resources)
+        self.futures: set[Future] = set()
+        self.n_trials = 0
+        self.n_failed = 0
+        self.lost = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of trials running on the cluster."""
+        return len(self.futures)
+
+    @property
+    def available(self) -> bool:
+        """Whether trials can be sent to the cluster, i.e. its client is connected."""
+        return not self.lost and self.client.status == "running"
+
+    def capacity(self) -> int:
+        """Number of trials which can run on the cluster at the same time."""
+        if not self.available:
+            return 0
+        if self.max_in_flight is not None:
+            return self.max_in_flight
+        return sum(worker["nthreads"] for worker in self.client.scheduler_info()["workers"].values())
+
+    def load(self) -> float:
+        """Share of the capacity used by running trials, infinite without capacity."""
+        capacity = self.capacity()
+        return self.in_flight / capacity if capacity > 0 else float("inf")
+
+
+class FederatedRunner(AbstractRunner):
+    def __init__(
+        self,
+        single_worker: AbstractRunner,
+        clusters: Sequence[Mapping[str, Any]],
+        resources: Callable[[TrialInfo], dict[str, float]] | None = None,
+        retry: RetryPolicy | None = None,
+        in_flight: InFlightTrials | None = None,
+        patience: float = 5.0,
+    ) -> None:
+        """
+        Spread the trials of one sweep across several dask clusters.
+
+        Every trial is sent to the least loaded cluster, i.e. the one with the lowest share of its capacity in use.
+        If a cluster is lost, only its trials in flight fail and are told to SMAC as crashed, the next trials go to
+        the other clusters. The optimization only stops if no cluster is left. Plugs into SMAC in the place of
+        `DaskParallelRunner`.
+
+        Parameters
+        ----------
+        single_worker: AbstractRunner
+            Runner executing a trial on a worker, e.g. SMAC's `TargetFunctionRunner`.
+        clusters: Sequence[Mapping[str, Any]]
+            One entry per cluster with the `dask_client` connected to it and optionally its `max_in_flight` trials
+            (by default the number of threads of its workers) and a `name` for the logs.
+        resources: Callable[[TrialInfo], dict[str, float]] | None
+            Dask worker resources which a trial needs, see `SharedRunner`.
+        retry: RetryPolicy | None
+            Policy to run trials again which were lost, e.g. with their cluster. A retry may run on another cluster.
+        in_flight: InFlightTrials | None
+            Running trials, identical trials are attached to them instead of taking another worker.
+        patience: float
+            Seconds to wait for a worker of any cluster before giving up, as `DaskParallelRunner` does.
+
+        Returns
+        -------
+        None
+
+        """
+        super().__init__(scenario=single_worker._scenario, required_arguments=single_worker._required_arguments)
+        if len(clusters) == 0:
+            raise ValueError("At least one cluster is needed.")
+        self._single_worker = single_worker
+        self._patience = patience
+        self.retry = retry
+        self.in_flight = in_flight
+        self.clusters = [
+            FederatedCluster(
+                name=str(cluster.get("name", i)),
+                client=cluster["dask_client"],
+                runner=single_worker,
+                max_in_flight=cluster.get("max_in_flight", None),
+                resources=resources,
+            )
+            for i, cluster in enumerate(clusters)
+        ]
+        self._condition = threading.Condition()
+        # Set when the runner shuts down, lost trials are not retried anymore then
+        self.closing = threading.Event()
+        self._pending_trials: dict[Future, TrialInfo] = {}
+        self._done: list[Future] = []
+
+    @property
+    def meta(self) -> dict[str, Any]:  # noqa: D102
+        meta = super().meta
+        meta.update({"clusters": [cluster.name for cluster in self.clusters]})
+        return meta
+
+    def submission_bytes(self, info: TrialInfo) -> int:
+        """Size of the data sent to the worker for a trial."""
+        return self.clusters[0].shared.submission_bytes(info)
+
+    def route(self) -> FederatedCluster:
+        """The least loaded of the available clusters."""
+        available = [cluster for cluster in self.clusters if cluster.available]
+        if len(available) == 0:
+            raise RuntimeError("None of the dask clusters is available anymore.")
+        return min(available, key=lambda cluster: (cluster.load(), cluster.in_flight))
+
+    def submit(self, trial_info: TrialInfo, **dask_data_to_scatter: dict[str, Any]) -> Future:
+        """Run a trial on the least loaded cluster, the result of the future is the packed trial and its value."""
+        while True:
+            cluster = self.route()
+            try:
+                future = cluster.shared.submit(trial_info, **dask_data_to_scatter)
+            except Exception as e:
+                log.warning(f"Could not submit a trial to the dask cluster {cluster.name}, not using it anymore: {e!r}")
+                cluster.lost = True
+                continue
+            with self._condition:
+                cluster.futures.add(future)
+                cluster.n_trials += 1
+            future.add_done_callback(functools.partial(self._finished, cluster))
+            return future
+
+    def _finished(self, cluster: FederatedCluster, future: Future) -> None:
+        with self._condition:
+            cluster.futures.discard(future)
+            if future.status != "finished":
+                cluster.n_failed += 1
+                if not cluster.available and not cluster.lost:
+                    log.warning(
+                        f"Lost the dask cluster {cluster.name}, its trials in flight are told as crashed. The next "
+                        "trials run on the other clusters."
+                    )
+                    cluster.lost = True
+            self._condition.notify_all()
+
+    def _trial_done(self, future: Any) -> None:
+        with self._condition:
+            if future in self._pending_trials:
+                self._done.append(future)
+            self._condition.notify_all()
+
+    def submit_trial(self, trial_info: TrialInfo, **dask_data_to_scatter: dict[str, Any]) -> None:  # noqa: D102
+        # Wait for a free worker as DaskParallelRunner.submit_trial does
+        if self.count_available_workers() <= 0 and self.is_running():
+            self.wait()
+            self._process_pending_trials()
+
+        if self.count_available_workers() <= 0:
+            log.warning("No workers are available in any cluster. Waiting for new workers...")
+            time.sleep(self._patience)
+            if self.count_available_workers() <= 0 and not self.is_running():
+                raise RuntimeError(
+                    "Tried to execute a job, but no worker of any cluster was available. "
+                    "This likely means that the clusters crashed or no workers were properly configured."
+                )
+
+        submit = functools.partial(self.submit, **dask_data_to_scatter)
+        future = dispatch(submit, trial_info, retry=self.retry, in_flight=self.in_flight, closing=self.closing)
+        with self._condition:
+            self._pending_trials[future] = trial_info
+        future.add_done_callback(self._trial_done)
+
+    def iter_results(self) -> Iterator[tuple[TrialInfo, TrialValue]]:  # noqa: D102
+        self._process_pending_trials()
+        while self._results_queue:
+            yield self._results_queue.pop(0)
+
+    def wait(self) -> None:  # noqa: D102
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._done) > 0 or len(self._pending_trials) == 0)
+
+    def is_running(self) -> bool:  # noqa: D102
+        return len(self._pending_trials) > 0
+
+    def run(
+        self,
+        config: Configuration,
+        instance: str | None = None,
+        budget: float | None = None,
+        seed: int | None = None,
+        **dask_data_to_scatter: dict[str, Any],
+    ) -> tuple[StatusType, float | list[float], float, dict]:  # noqa: D102
+        return self._single_worker.run(config=config, instance=instance, seed=seed, budget=budget)
+
+    def count_available_workers(self) -> int:
+        """Number of trials the clusters can start right away."""
+        return sum(max(cluster.capacity() - cluster.in_flight, 0) for cluster in self.clusters)
+
+    def close(self, force: bool = False) -> None:
+        """Remove the runner from the workers, running trials are cancelled if `force`.
+
+        The clients were passed by the user and stay open, as `DaskParallelRunner` leaves a given client open.
+        """
+        self.closing.set()
+        for cluster in self.clusters:
+            log.info(f"Dask cluster {cluster.name}: {cluster.n_trials} trials, {cluster.n_failed} failed")
+            if force and cluster.client.status == "running":
+                cluster.client.cancel(list(cluster.futures))
+            cluster.shared.close()
+
+    def _process_pending_trials(self) -> None:
+        """Move the finished trials to the results queue, trials whose cluster was lost count as crashed."""
+        with self._condition:
+            done, self._done = self._done, []
+            infos = [self._pending_trials.pop(future) for future in done]
+        for future, info in zip(done, infos):
+            try:
+                _, value = future.result()
+            except Exception as e:
+                value = crashed_trial_value(e, self._crash_cost)
+            self._results_queue.append((info, value))
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import functools
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from pathlib import Path
+
+import cloudpickle
+
+
+class TrialTimeout(RuntimeError):
+    """The trial exceeded `trial_walltime_limit` and was killed."""
+
+
+class TrialMemoryOut(RuntimeError):
+    """The trial exceeded `trial_memory_limit`."""
+
+
+class _RemoteTraceback(Exception):
+    def __init__(self, tb: str) -> None:
+        self.tb = tb
+
+    def __str__(self) -> str:
+        return self.tb
+
+
+class ProcessIsolation(object):
+    def __init__(self, walltime_limit: float | None = None, memory_limit: float | None = None) -> None:
+        """
+        Run every trial in its own python process and enforce resource limits there.
+
+        The call is sent to the process with cloudpickle, so that task functions and configs which the standard
+        pickle can not handle (e.g. functions defined in `__main__`) work. Subprocesses are used instead of
+        multiprocessing, as dask workers are daemonic processes which can not have children. The process starts a
+        new process group, so that processes started by the trial are killed with it.
+
+        Parameters
+        ----------
+        walltime_limit: float | None
+            Seconds after which the process of a trial is killed and `TrialTimeout` is raised.
+        memory_limit: float | None
+            Address space of the process of a trial in MB. Exceeding it raises `TrialMemoryOut`.
+
+        Returns
+        -------
+        None
+
+        """
+        self.walltime_limit = walltime_limit
+        self.memory_limit = memory_limit
+
+    def run(self, function: Callable[[], Any]) -> Any:
+        """
+        Call a function in a new process.
+
+        Parameters
+        ----------
+        function: Callable[[], Any]
+            Function without arguments, e.g. a `functools.partial` of the task function.
+
+        Returns
+        -------
+        Any
+            Result of the function. Exceptions raised by the function are raised again.
+
+        """
+        payload = cloudpickle.dumps(function)
+        fd, result_path = tempfile.mkstemp(suffix=".pkl")
+        os.close(fd)
+        memory = int(self.memory_limit * 1024**2) if self.memory_limit is not None else 0
+        # The process must find the modules the function was pickled by reference with
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        start = time.time()
+        try:
+            process = subprocess.Popen(
+                [sys.executable, "-m", __name__, result_path, str(memory)],
+                stdin=subprocess.PIPE,
+                env=env,
+                start_new_session=True,
+            )
+            try:
+                assert process.stdin is not None
+                process.stdin.write(payload)
+                process.stdin.close()
+                timeout = None if self.walltime_limit is None else max(self.walltime_limit - (time.time() - start), 0)
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.wait()
+                raise TrialTimeout(f"The trial was killed after {self.walltime_limit}s.") from None
+            except BrokenPipeError:
+                process.wait()
+
+            result_file = Path(result_path)
+            if result_file.stat().st_size == 0:
+                if self.memory_limit is not None and process.returncode != 0:
+                    # E.g. killed while allocating, before it could report the MemoryError
+                    raise TrialMemoryOut(f"The trial process died with exit code {process.returncode}.")
+                raise RuntimeError(f"The trial process died with exit code {process.returncode}.")
+            status, value, tb = cloudpickle.loads(result_file.read_bytes())
+        finally:
+            os.remove(result_path)
+
+        if status == "memoryout":
+            raise TrialMemoryOut(f"The trial exceeded the memory limit of {self.memory_limit}MB.")
+        if status == "error":
+            value.__cause__ = _RemoteTraceback(tb)
+            raise value
+        return value
+
+
+class IsolatedTask(object):
+    def __init__(self, task_function: Callable, isolation: ProcessIsolation) -> None:
+        """
+        Call a task function in its own process, for the hydra launcher.
+
+        Parameters
+        ----------
+        task_function: Callable
+            Hydra task function
+        isolation: ProcessIsolation
+            Limits of the process
+
+        Returns
+        -------
+        None
+
+        """
+        self.task_function = task_function
+        self.isolation = isolation
+
+    def __call__(self, cfg: Any, **kwargs: Any) -> Any:
+        return self.isolation.run(functools.partial(self.task_function, cfg, **kwargs))
+
+
+def _main(result_path: str, memory: int) -> None:
+    """Run a pickled function from stdin in this process and write its result."""
+    if memory > 0:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+    # Resolvers of hydra and of the sweeper for interpolations in the config
+    import hydra_plugins.hydra_smac_sweeper.smac_sweeper  # noqa: F401
+    from hydra.core.utils import setup_globals
+
+    setup_globals()
+    try:
+        function = cloudpickle.loads(sys.stdin.buffer.read())
+        result: tuple = ("ok", function(), "")
+    except MemoryError:
+        result = ("memoryout", None, "")
+    except BaseException as e:
+        result = ("error", e, traceback.format_exc())
+    try:
+        data = cloudpickle.dumps(result)
+    except Exception as e:
+        data = cloudpickle.dumps(("error", RuntimeError(repr(result[1])), f"{traceback.format_exc()}{e!r}"))
+    Path(result_path).write_bytes(data)
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import collections
+import logging
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from distributed import Client
+from smac.callback import Callback
+from smac.main.smbo import SMBO
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+
+log = logging.getLogger(__name__)
+
+# Prefix of the names of all metrics
+PREFIX = "smac_sweeper"
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if len(labels) == 0:
+        return ""
+    escaped = {
+        name: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for name, value in labels.items()
+    }
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped.items()) + "}"
+
+
+def _take(trials: collections.Counter[TrialInfo], info: TrialInfo) -> bool:
+    """Remove a trial from a counter, returns whether it was in it."""
+    if trials[info] == 0:
+        return False
+    trials[info] -= 1
+    if trials[info] == 0:
+        del trials[info]
+    return True
+
+
+def worker_utilisation(clients: Sequence[Client]) -> dict[str, float]:
+    """Share of the threads of every dask worker which are executing a task."""
+    utilisation = {}
+    for client in clients:
+        if client.status != "running":
+            continue
+        for address, worker in client.scheduler_info()["workers"].items():
+            executing = worker.get("metrics", {}).get("task_counts", {}).get("executing", 0)
+            utilisation[address] = executing / max(worker["nthreads"], 1)
+    return utilisation
+
+
+class SweepMetrics(Callback):
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        port: int | None = 0,
+        host: str = "127.0.0.1",
+        interval: float = 15.0,
+        rate_window: float = 60.0,
+    ) -> None:
+        """
+        Expose the progress of a sweep as Prometheus metrics.
+
+        The metrics are served over HTTP at `http://host:port/metrics` while the sweep runs and written to `path` in
+        the text format every `interval` seconds, e.g. for the textfile collector of the node exporter on a cluster
+        which cannot be scraped. The file is replaced atomically, so that a reader never sees a partial file.
+
+        Trials are counted when they are asked, dispatched to a worker and told. The time SMAC spends on asking for a
+        trial is the time of fitting the surrogate model and optimizing the acquisition function. The utilisation of
+        the dask workers is read from the `clients` when the metrics are rendered.
+
+        Parameters
+        ----------
+        path: str | Path | None
+            Path of the exported text file, None to not write one.
+        port: int | None
+            Port of the HTTP endpoint, 0 for any free port and None to not serve the metrics.
+        host: str
+            Address the HTTP endpoint binds to.
+        interval: float
+            Seconds between two writes of the text file.
+        rate_window: float
+            Seconds over which the trials per minute are averaged.
+
+        Returns
+        -------
+        None
+
+        """
+        self.path = Path(path) if path is not None else None
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.rate_window = rate_window
+        self.clients: list[Client] = []
+        self.n_asked = 0
+        self.n_told = 0
+        self.n_failed = 0
+        self.ask_seconds = 0.0
+        self.incumbent_cost: dict[str, float] = {}
+        self._told_times: collections.deque[float] = collections.deque()
+        # Trials asked in this sweep which were not told yet, identical trials may be asked more than once
+        self._queued: collections.Counter[TrialInfo] = collections.Counter()
+        self._running: collections.Counter[TrialInfo] = collections.Counter()
+        self._ask_start = 0.0
+        self._start = time.time()
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._stop = threading.Event()
+        self._writer: threading.Thread | None = None
+
+    @property
+    def url(self) -> str | None:
+        """Address of the HTTP endpoint while it is running."""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def dispatched(self, info: TrialInfo, payload_bytes: int | None = None) -> None:
+        """Record that a trial was handed to the runner, executor or launcher, see `TrialProfiler.dispatched`."""
+        with self._lock:
+            if _take(self._queued, info):
+                self._running[info] += 1
+
+    def on_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self._start = time.time()
+        self._stop.clear()
+        if self.port is not None and self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="sweep-metrics-server", daemon=True).start()
+            log.info(f"Serving the metrics of the sweep at {self.url}")
+        if self.path is not None and self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = threading.Thread(target=self._write_periodically, name="sweep-metrics-writer", daemon=True)
+            self._writer.start()
+
+    def on_ask_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self._ask_start = time.time()
+
+    def on_ask_end(self, smbo: SMBO, info: TrialInfo) -> None:  # noqa: D102
+        with self._lock:
+            self.n_asked += 1
+            self.ask_seconds += time.time() - self._ask_start
+            self._queued[info] += 1
+
+    def on_tell_end(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        incumbent_cost = self._incumbent_cost(smbo)
+        now = time.time()
+        with self._lock:
+            self.incumbent_cost = incumbent_cost
+            # Trials which were not asked in this sweep, e.g. of a resumed run, are not counted
+            if not _take(self._running, info) and not _take(self._queued, info):
+                return None
+            self.n_told += 1
+            if value.status != StatusType.SUCCESS:
+                self.n_failed += 1
+            self._told_times.append(now)
+        return None
+
+    def on_end(self, smbo: SMBO) -> None:  # noqa: D102
+        self.close()
+
+    @staticmethod
+    def _incumbent_cost(smbo: SMBO) -> dict[str, float]:
+        """Estimated cost of the incumbent per objective, the lowest of the incumbents with several objectives."""
+        objectives = smbo._scenario.objectives
+        if isinstance(objectives, str):
+            objectives = [objectives]
+        costs: dict[str, float] = {}
+        for config in smbo.intensifier.get_incumbents():
+            cost = smbo.runhistory.average_cost(config)
+            for objective, value in zip(objectives, cost if isinstance(cost, list) else [cost]):
+                costs[objective] = min(costs.get(objective, math.inf), float(value))
+        return costs
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        now = time.time()
+        utilisation = worker_utilisation(self.clients)
+        with self._lock:
+            while len(self._told_times) > 0 and self._told_times[0] < now - self.rate_window:
+                self._told_times.popleft()
+            window = min(self.rate_window, max(now - self._start, 1e-9))
+            metrics: list[tuple[str, str, str, list[tuple[dict[str, str], float]]]] = [
+                ("trials_asked_total", "counter", "Trials asked from SMAC.", [({}, self.n_asked)]),
+                ("trials_completed_total", "counter", "Trials told to SMAC.", [({}, self.n_told)]),
+                ("trials_failed_total", "counter", "Trials told to SMAC which did not succeed.", [({}, self.n_failed)]),
+                ("trials_running", "gauge", "Trials dispatched to a worker and not told yet.", [({}, self.running)]),
+                ("trials_queued", "gauge", "Trials asked and not dispatched to a worker yet.", [({}, self.queued)]),
+                (
+                    "trials_per_minute",
+                    "gauge",
+                    f"Trials told per minute over the last {self.rate_window:g} seconds.",
+                    [({}, 60.0 * len(self._told_times) / window)],
+                ),
+                (
+                    "incumbent_cost",
+                    "gauge",
+                    "Estimated cost of the incumbent per objective.",
+                    [({"objective": objective}, cost) for objective, cost in self.incumbent_cost.items()],
+                ),
+                (
+                    "ask_seconds",
+                    "summary",
+                    "Time SMAC spent on asking for trials, i.e. fitting the surrogate model and optimizing the "
+                    "acquisition function.",
+                    [({}, self.ask_seconds), ({}, self.n_asked)],
+                ),
+                (
+                    "worker_utilisation",
+                    "gauge",
+                    "Share of the threads of a dask worker which are executing a trial.",
+                    [({"worker": worker}, share) for worker, share in sorted(utilisation.items())],
+                ),
+                ("elapsed_seconds", "gauge", "Seconds since the sweep started.", [({}, now - self._start)]),
+            ]
+
+        lines = []
+        for name, kind, description, samples in metrics:
+            name = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            suffixes = ["_sum", "_count"] if kind == "summary" else [""] * len(samples)
+            for suffix, (labels, value) in zip(suffixes, samples):
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @property
+    def running(self) -> int:
+        """Number of trials dispatched and not told yet."""
+        return sum(self._running.values())
+
+    @property
+    def queued(self) -> int:
+        """Number of trials asked and not dispatched yet."""
+        return sum(self._queued.values())
+
+    def write(self) -> None:
+        """Replace the text file with the current metrics."""
+        assert self.path is not None
+        partial = self.path.with_name(self.path.name + ".tmp")
+        partial.write_text(self.render())
+        os.replace(partial, self.path)
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                log.warning(f"Could not write the metrics to {self.path}: {e!r}")
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                log.debug(format % args)
+
+        return MetricsHandler
+
+    def close(self) -> None:
+        """Stop the HTTP endpoint and write the final metrics to the text file."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
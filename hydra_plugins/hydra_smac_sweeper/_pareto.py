@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from hydra_plugins.hydra_smac_sweeper.results import ParetoFront
+from smac.callback import Callback
+from smac.main.smbo import SMBO
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+
+
+class ParetoTracker(Callback):
+    def __init__(self) -> None:
+        """
+        Keep the Pareto front of the successful trials of a multi-objective sweep up to date.
+
+        Trials are only compared with trials of the same budget, every budget has its own front.
+
+        Returns
+        -------
+        None
+
+        """
+        self.fronts: dict[float | None, ParetoFront] = {}
+
+    def on_tell_end(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        if value.status == StatusType.SUCCESS:
+            self.fronts.setdefault(info.budget, ParetoFront()).add(value.cost, info)
+        return None
+
+    @property
+    def front(self) -> ParetoFront:
+        """Front of the trials at the highest budget."""
+        if len(self.fronts) == 0:
+            return ParetoFront()
+        return self.fronts[max(self.fronts, key=lambda budget: float("-inf") if budget is None else budget)]
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from typing import Any, Iterator
+
+import logging
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cloudpickle
+from ConfigSpace import Configuration  # type: ignore[import]
+from hydra_plugins.hydra_smac_sweeper._coalescing import (
+    AttachedFuture,
+    InFlightTrials,
+    dispatch,
+)
+from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+from hydra_plugins.hydra_smac_sweeper._trials import (
+    crashed_trial_value,
+    pack_trial,
+    unpack_trial,
+)
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+from smac.runner import AbstractRunner
+
+log = logging.getLogger(__name__)
+
+# Runner of this worker process, set by `_initialize`
+_runner: AbstractRunner | None = None
+
+
+def _initialize(payload: bytes) -> None:
+    global _runner
+    _runner = cloudpickle.loads(payload)
+
+
+def run_pooled_trial(trial: tuple) -> tuple[tuple, TrialValue]:
+    """Run a packed trial with the runner of this worker process
+
+    Parameters
+    ----------
+    trial : tuple
+        Configuration vector, instance, seed and budget, see `pack_trial`
+
+    Returns
+    -------
+    tuple[tuple, TrialValue]
+        The packed trial and its trial value
+    """
+    assert _runner is not None
+    _, value = _runner.run_wrapper(unpack_trial(_runner._scenario.configspace, trial))
+    return trial, value
+
+
+class ProcessPoolRunner(AbstractRunner):
+    def __init__(
+        self,
+        single_worker: AbstractRunner,
+        n_workers: int,
+        start_method: str | None = None,
+        retry: RetryPolicy | None = None,
+        in_flight: InFlightTrials | None = None,
+    ) -> None:
+        """
+        Run trials in parallel in a pool of local processes, without a dask scheduler.
+
+        The runner, i.e. the task function and the hydra config, is sent to every process once when it starts.
+        A submission only carries the packed trial. Plugs into SMAC in the place of `DaskParallelRunner`.
+
+        Parameters
+        ----------
+        single_worker: AbstractRunner
+            Runner executing a trial in a worker process, e.g. SMAC's `TargetFunctionRunner`.
+        n_workers: int
+            Number of worker processes.
+        start_method: str | None
+            Start method of the processes, e.g. "fork", "forkserver" or "spawn". By default the one of the platform.
+        retry: RetryPolicy | None
+            Policy to run trials again which were lost when a worker process died. All trials running in the pool are
+            lost then, not only the one whose process died.
+        in_flight: InFlightTrials | None
+            Running trials, identical trials are attached to them instead of taking another worker process.
+
+        Returns
+        -------
+        None
+
+        """
+        super().__init__(scenario=single_worker._scenario, required_arguments=single_worker._required_arguments)
+        if n_workers < 1:
+            raise ValueError("n_workers must be positive.")
+        self._single_worker = single_worker
+        self._n_workers = n_workers
+        self._start_method = start_method
+        self.retry = retry
+        self.in_flight = in_flight
+        self._restart_lock = threading.Lock()
+        # Set when the runner shuts down, lost trials are not retried anymore then
+        self.closing = threading.Event()
+        self._payload = cloudpickle.dumps(single_worker)
+        self.runner_bytes = len(self._payload)
+        self._pending_trials: dict[Future, TrialInfo] = {}
+        self.executor = self._start()
+
+    def _start(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self._n_workers,
+            mp_context=multiprocessing.get_context(self._start_method),
+            initializer=_initialize,
+            initargs=(self._payload,),
+        )
+
+    @property
+    def meta(self) -> dict[str, Any]:  # noqa: D102
+        meta = super().meta
+        meta.update({"n_workers": self._n_workers, "single_worker": self._single_worker.meta})
+        return meta
+
+    def submission_bytes(self, info: TrialInfo) -> int:
+        """Size of the data sent to the worker process for a trial."""
+        return len(pickle.dumps((run_pooled_trial, pack_trial(info))))
+
+    def submit(self, trial_info: TrialInfo) -> Future:
+        """Run a trial in the pool, the result of the future is the packed trial and its trial value."""
+        executor = self.executor
+        try:
+            return executor.submit(run_pooled_trial, pack_trial(trial_info))
+        except BrokenProcessPool:
+            # A worker process died, e.g. killed by the out of memory killer. The pool can not be used anymore.
+            with self._restart_lock:
+                # Retries are submitted from other threads, the pool is only restarted once
+                if self.executor is executor:
+                    log.warning("A worker process of the pool died, restarting the pool.")
+                    executor.shutdown(wait=False)
+                    self.executor = self._start()
+            return self.executor.submit(run_pooled_trial, pack_trial(trial_info))
+
+    def submit_trial(self, trial_info: TrialInfo, **dask_data_to_scatter: dict[str, Any]) -> None:  # noqa: D102
+        if len(dask_data_to_scatter) > 0:
+            raise ValueError("data_to_scatter is only supported by dask.")
+        if self.count_available_workers() <= 0:
+            # Block until a worker is free as DaskParallelRunner does
+            wait(self._pending_trials, return_when=FIRST_COMPLETED)
+            self._process_pending_trials()
+        future = dispatch(self.submit, trial_info, retry=self.retry, in_flight=self.in_flight, closing=self.closing)
+        self._pending_trials[future] = trial_info
+
+    def iter_results(self) -> Iterator[tuple[TrialInfo, TrialValue]]:  # noqa: D102
+        self._process_pending_trials()
+        while self._results_queue:
+            yield self._results_queue.pop(0)
+
+    def wait(self) -> None:  # noqa: D102
+        if self.is_running():
+            wait(self._pending_trials, return_when=FIRST_COMPLETED)
+
+    def is_running(self) -> bool:  # noqa: D102
+        return len(self._pending_trials) > 0
+
+    def run(
+        self,
+        config: Configuration,
+        instance: str | None = None,
+        budget: float | None = None,
+        seed: int | None = None,
+        **dask_data_to_scatter: dict[str, Any],
+    ) -> tuple[StatusType, float | list[float], float, dict]:  # noqa: D102
+        return self._single_worker.run(config=config, instance=instance, seed=seed, budget=budget)
+
+    def count_available_workers(self) -> int:
+        """Number of idle worker processes."""
+        return self._n_workers - sum(not isinstance(trial, AttachedFuture) for trial in self._pending_trials)
+
+    def close(self, force: bool = False) -> None:
+        """Shut the worker processes down, running trials are cancelled and their processes terminated if `force`."""
+        self.closing.set()
+        if not force:
+            self.executor.shutdown(wait=True)
+            return
+        for trial in self._pending_trials:
+            trial.cancel()
+        # The executor forgets its processes on shutdown
+        processes = list((self.executor._processes or {}).values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+    def _process_pending_trials(self) -> None:
+        """Move the finished trials to the results queue, trials whose process died count as crashed."""
+        done = [trial for trial in self._pending_trials if trial.done()]
+        for trial in done:
+            info = self._pending_trials.pop(trial)
+            try:
+                _, value = trial.result()
+            except Exception as e:
+                value = crashed_trial_value(e, self._crash_cost)
+            self._results_queue.append((info, value))
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+import cloudpickle
+from distributed import get_worker
+from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+from hydra_plugins.hydra_smac_sweeper._process_pool_runner import ProcessPoolRunner
+from hydra_plugins.hydra_smac_sweeper._shared_runner import (
+    SharedDaskParallelRunner,
+    SharedRunner,
+)
+from smac.callback import Callback
+from smac.main.smbo import SMBO
+from smac.runhistory import TrialInfo, TrialValue
+from smac.runner import AbstractRunner, DaskParallelRunner
+
+log = logging.getLogger(__name__)
+
+# Key of the measurements of the worker in the additional info returned by the target function
+PROFILE_KEY = "_profile"
+
+
+def get_worker_id() -> str:
+    """Address of the dask worker running the current task, or host and pid outside of dask."""
+    try:
+        return get_worker().address
+    except ValueError:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def attach_profile(result: Any, profile: dict[str, Any]) -> tuple[Any, dict[str, Any]]:
+    """Attach the measurements of a trial to the result of the task function
+
+    SMAC stores the second element of a returned tuple as additional info of the trial.
+
+    Parameters
+    ----------
+    result : Any
+        Result of the task function, either the cost or a tuple of cost and additional info
+    profile : dict[str, Any]
+        Measurements of the trial
+
+    Returns
+    -------
+    tuple[Any, dict[str, Any]]
+        Cost and additional info including the measurements
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], dict):
+        return result[0], {**result[1], PROFILE_KEY: profile}
+    return result, {PROFILE_KEY: profile}
+
+
+class TrialProfiler(Callback):
+    def __init__(self, path: str | Path) -> None:
+        """
+        Record the life cycle of every trial.
+
+        For every trial, the time it was asked, dispatched to the runner, started and finished by the worker and told
+        is written as one json line to `path`, together with the time SMAC spent on asking (i.e. fitting the
+        surrogate model and optimizing the acquisition function) and telling, the size of the payload sent to the
+        worker, the worker and the time spent on materializing the hydra config and in the task function. At the end
+        a summary of where the time went is logged.
+
+        Timestamps taken on the workers (started, finished) are compared to timestamps of the sweeper, the clocks of
+        the machines should be synchronized.
+
+        Parameters
+        ----------
+        path: str | Path
+            Path of the jsonl file, which is appended to.
+
+        Returns
+        -------
+        None
+
+        """
+        self.path = Path(path)
+        self.runner_bytes = 0
+        self.submission_bytes: Callable[[TrialInfo], int] = self._pickled_bytes
+        self.totals: dict[str, float] = {}
+        self._trials: dict[TrialInfo, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._ask_start = 0.0
+        self._tell_start = 0.0
+        self._start = 0.0
+        self._file: Any = None
+
+    def measure_runner(self, runner: AbstractRunner | SharedRunner) -> None:
+        """Measure the size of the runner, which is sent to the worker together with every trial."""
+        if isinstance(runner, SharedDaskParallelRunner):
+            runner = runner.shared
+        if isinstance(runner, (SharedRunner, ProcessPoolRunner, FederatedRunner)):
+            # The runner was shipped to the workers once, a submission only carries the packed trial
+            self.submission_bytes = runner.submission_bytes
+            return
+        if isinstance(runner, DaskParallelRunner):
+            runner = runner._single_worker
+        try:
+            self.runner_bytes = len(cloudpickle.dumps(runner))
+        except Exception as e:
+            log.debug(f"Could not measure the size of the runner: {e}")
+
+    def _pickled_bytes(self, info: TrialInfo) -> int:
+        return self.runner_bytes + len(cloudpickle.dumps(info))
+
+    def dispatched(self, info: TrialInfo, payload_bytes: int | None = None) -> None:
+        """Record that a trial was handed to the runner, executor or launcher.
+
+        Parameters
+        ----------
+        info: TrialInfo
+            Trial
+        payload_bytes: int | None
+            Size of the data sent to the worker, by default measured with `submission_bytes`.
+
+        """
+        now = time.time()
+        if payload_bytes is None:
+            payload_bytes = self.submission_bytes(info)
+        with self._lock:
+            if info in self._trials:
+                self._trials[info].update(dispatched=now, payload_bytes=payload_bytes)
+
+    def on_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self._start = time.time()
+        self.totals = {
+            "trials": 0,
+            "waiting": 0.0,
+            "transfer": 0.0,
+            "materialize": 0.0,
+            "task": 0.0,
+            "worker": 0.0,
+            "result": 0.0,
+            "ask": 0.0,
+            "tell": 0.0,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+
+    def on_ask_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self._ask_start = time.time()
+
+    def on_ask_end(self, smbo: SMBO, info: TrialInfo) -> None:  # noqa: D102
+        now = time.time()
+        with self._lock:
+            self._trials[info] = {"asked": now, "ask_time": now - self._ask_start}
+
+    def on_tell_start(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        self._tell_start = time.time()
+        # The measurements of the worker are not kept in the runhistory
+        with self._lock:
+            profile = value.additional_info.pop(PROFILE_KEY, {})
+            if info in self._trials:
+                self._trials[info].update(profile)
+        return None
+
+    def on_tell_end(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        now = time.time()
+        with self._lock:
+            record = self._trials.pop(info, None)
+        # Trials which were not asked, e.g. prior observations, are not profiled
+        if record is None or self._file is None:
+            return None
+
+        record.update(
+            config_id=smbo.runhistory.get_config_id(info.config),
+            instance=info.instance,
+            seed=info.seed,
+            budget=info.budget,
+            status=value.status.name,
+            started=value.starttime,
+            finished=value.endtime,
+            told=now,
+            tell_time=now - self._tell_start,
+        )
+        record.setdefault("dispatched", record["asked"])
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+        materialize = record.get("materialize_time", 0.0)
+        task = record.get("task_time", value.endtime - value.starttime)
+        totals = self.totals
+        totals["trials"] += 1
+        totals["waiting"] += record["dispatched"] - record["asked"]
+        totals["transfer"] += max(record["started"] - record["dispatched"], 0.0)
+        totals["materialize"] += materialize
+        totals["task"] += task
+        totals["worker"] += max(record["finished"] - record["started"] - materialize - task, 0.0)
+        totals["result"] += max(now - record["finished"], 0.0)
+        totals["ask"] += record["ask_time"]
+        totals["tell"] += record["tell_time"]
+        return None
+
+    def on_end(self, smbo: SMBO) -> None:  # noqa: D102
+        self.close()
+        log.info(self.summary())
+
+    def close(self) -> None:
+        """Close the jsonl file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self) -> str:
+        """Summary of the time spent in the life cycle of the trials.
+
+        Returns
+        -------
+        str
+            Table of the time spent per phase, relative to the life time of all trials (asked to told).
+            The time SMAC spent on asking and telling is relative to the walltime of the sweep.
+
+        """
+        totals = self.totals
+        phases = {
+            "Waiting for a worker": totals["waiting"],
+            "Transfer to the worker": totals["transfer"],
+            "Materializing the config": totals["materialize"],
+            "Task function": totals["task"],
+            "Other worker overhead": totals["worker"],
+            "Returning the result": totals["result"],
+        }
+        lifetime = sum(phases.values())
+        walltime = time.time() - self._start
+        lines = [f"Trial profile ({int(totals['trials'])} trials, written to {self.path}):"]
+        for name, seconds in phases.items():
+            share = seconds / lifetime if lifetime > 0 else 0.0
+            lines.append(f"  {name:<26} {seconds:10.3f}s {share:7.1%}")
+        for name, seconds in {"SMAC ask": totals["ask"], "SMAC tell": totals["tell"]}.items():
+            share = seconds / walltime if walltime > 0 else 0.0
+            lines.append(f"  {name:<26} {seconds:10.3f}s {share:7.1%} of the walltime")
+        return "\n".join(lines)
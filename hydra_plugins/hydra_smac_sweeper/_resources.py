@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Mapping
+
+import math
+from types import SimpleNamespace
+
+from distributed import Client
+from smac.runhistory import TrialInfo
+
+# Names which can be used in a resource expression besides the hyperparameters, the budget, instance and seed
+_FUNCTIONS = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "int": int,
+    "float": float,
+    "ceil": math.ceil,
+    "floor": math.floor,
+    "log": math.log,
+    "log2": math.log2,
+    "sqrt": math.sqrt,
+}
+
+
+def nest(values: Mapping[str, Any]) -> dict[str, Any]:
+    """Nest dotted names of hyperparameters, e.g. `model.width`, in namespaces, so that expressions can access them."""
+    nested: dict[str, Any] = {}
+    for name, value in values.items():
+        *parents, leaf = name.split(".")
+        node = nested
+        for parent in parents:
+            node = node.setdefault(parent, {})
+            if not isinstance(node, dict):
+                raise ValueError(f"The hyperparameter `{name}` is nested in another hyperparameter.")
+        if isinstance(node.get(leaf, None), dict):
+            raise ValueError(f"The hyperparameter `{name}` contains other hyperparameters.")
+        node[leaf] = value
+
+    def to_namespace(node: Any) -> Any:
+        if isinstance(node, dict):
+            return SimpleNamespace(**{key: to_namespace(value) for key, value in node.items()})
+        return node
+
+    return {key: to_namespace(value) for key, value in nested.items()}
+
+
+class TrialResources(object):
+    def __init__(self, resources: Mapping[str, Any]) -> None:
+        """
+        Abstract resources which a trial needs on a dask worker, depending on its budget and configuration.
+
+        Every resource is either a fixed amount, a python expression over the hyperparameters, `budget`, `instance`
+        and `seed` (e.g. "2 * n_layers" or "16 if budget > 10 else 2"), or a table from budgets to amounts or
+        expressions. With a table, the entry of the largest budget which is not larger than the budget of the trial
+        is used. Inactive hyperparameters are None in an expression. Hyperparameters with dotted names, i.e. nested
+        keys of the hydra config, are attributes, e.g. "4 * model.width".
+
+        A trial only runs on a worker which provides enough of every resource, e.g. started with
+        `--resources "memory=64"`. Several trials run on a worker at the same time as long as its resources last.
+
+        Parameters
+        ----------
+        resources: Mapping[str, Any]
+            Resource names to amounts, expressions or tables by budget.
+
+        Returns
+        -------
+        None
+
+        """
+        self.resources: dict[str, Any] = {}
+        for name, spec in resources.items():
+            if isinstance(spec, Mapping):
+                table = [(float(budget), self._compile(name, value)) for budget, value in spec.items()]
+                if len(table) == 0:
+                    raise ValueError(f"The budget table of the resource `{name}` is empty.")
+                self.resources[name] = sorted(table, key=lambda entry: entry[0])
+            else:
+                self.resources[name] = self._compile(name, spec)
+
+    @staticmethod
+    def _compile(name: str, spec: Any) -> Any:
+        if isinstance(spec, str):
+            try:
+                return compile(spec, f"<resource {name}>", "eval")
+            except SyntaxError as e:
+                raise ValueError(f"Invalid expression for the resource `{name}`: {spec}") from e
+        if not isinstance(spec, (int, float)):
+            raise ValueError(f"The resource `{name}` must be a number or an expression, got {spec!r}.")
+        return spec
+
+    def __call__(self, info: TrialInfo) -> dict[str, float]:
+        """Amount of every resource the trial needs."""
+        values = {name: None for name in info.config.configuration_space.get_hyperparameter_names()}
+        values.update(dict(info.config))
+        namespace = nest(values)
+        namespace.update(budget=info.budget, instance=info.instance, seed=info.seed)
+
+        amounts = {}
+        for name, spec in self.resources.items():
+            if isinstance(spec, list):
+                if info.budget is None:
+                    raise ValueError(f"The resource `{name}` depends on the budget, but the trial has none.")
+                # The smallest budget applies to trials below it
+                spec = spec[0][1]
+                for budget, value in self.resources[name]:
+                    if budget <= info.budget:
+                        spec = value
+            if not isinstance(spec, (int, float)):
+                spec = eval(spec, {"__builtins__": {}, **_FUNCTIONS}, namespace)
+            amounts[name] = float(spec)
+            if amounts[name] < 0:
+                raise ValueError(f"The trial needs a negative amount of the resource `{name}`: {amounts[name]}")
+        return amounts
+
+    def missing(self, client: Client) -> list[str]:
+        """Names of the resources which none of the workers connected to the client provides."""
+        workers = client.scheduler_info()["workers"].values()
+        provided = set().union(*(worker.get("resources", {}) for worker in workers))
+        return [name for name in self.resources if name not in provided]
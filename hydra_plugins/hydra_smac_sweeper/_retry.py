@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import logging
+import threading
+from concurrent.futures import CancelledError, Future
+from concurrent.futures.process import BrokenProcessPool
+
+from distributed import KilledWorker
+from distributed.comm import CommClosedError
+from smac.runhistory import TrialInfo
+
+# Additional info of a trial which was retried, the number of retries
+RETRIES_KEY = "retries"
+
+# Errors of the workers, connections and processes running a trial. Exceptions of the task function are caught by
+# the runner on the worker and never raised by the future of a trial.
+INFRASTRUCTURE_ERRORS = (KilledWorker, CommClosedError, CancelledError, BrokenProcessPool, ConnectionError)
+
+log = logging.getLogger(__name__)
+
+
+class TrialLost(RuntimeError):
+    def __init__(self, retries: int) -> None:
+        """The trial was lost to infrastructure errors in every attempt, the last one is the cause."""
+        super().__init__(f"The trial was lost to infrastructure errors {retries + 1} times.")
+        self.retries = retries
+
+
+def is_infrastructure_error(error: BaseException) -> bool:
+    """Whether a trial failed because of the infrastructure, e.g. a lost worker or scheduler, not the task."""
+    return isinstance(error, INFRASTRUCTURE_ERRORS)
+
+
+class RetryPolicy(object):
+    def __init__(self, max_retries: int = 3, backoff: float = 1.0, max_backoff: float = 60.0) -> None:
+        """
+        Run trials again which were lost to a failure of the infrastructure, e.g. a preempted node.
+
+        A trial is submitted again after a backoff which doubles with every retry, without blocking the other
+        trials. After `max_retries` retries the error is raised and the trial is told to SMAC as crashed. A trial
+        which was retried has the number of retries in its additional info. Trials are not retried while the runner
+        shuts down, e.g. the ones it cancelled.
+
+        Parameters
+        ----------
+        max_retries: int
+            Maximum number of retries of a trial, 0 disables retries
+        backoff: float
+            Seconds before the first retry
+        max_backoff: float
+            Maximum seconds between two retries
+
+        Returns
+        -------
+        None
+
+        """
+        if max_retries < 0 or backoff < 0:
+            raise ValueError("max_retries and backoff must not be negative.")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.n_retries = 0
+        self._lock = threading.Lock()
+
+    def delay(self, retry: int) -> float:
+        """Seconds before the `retry`-th retry, counting from 1."""
+        return min(self.backoff * 2 ** (retry - 1), self.max_backoff)
+
+    def submit(
+        self, submit: Callable[[TrialInfo], Any], trial_info: TrialInfo, closing: threading.Event | None = None
+    ) -> Future:
+        """
+        Submit a trial and submit it again if it is lost to an infrastructure error.
+
+        Parameters
+        ----------
+        submit: Callable[[TrialInfo], Any]
+            Submits a trial and returns its future, e.g. `SharedRunner.submit`. The result of the future is a tuple
+            of the trial and its trial value.
+        trial_info: TrialInfo
+            Trial to run
+        closing: threading.Event | None
+            Set when the runner shuts down, the trial is not retried anymore then.
+
+        Returns
+        -------
+        Future
+            Future of the trial, its result is the trial and its trial value. Errors which are no infrastructure errors
+            are raised, `TrialLost` if the trial was lost in every attempt.
+
+        """
+        result: Future = Future()
+        result.set_running_or_notify_cancel()
+
+        def attempt(retry: int, error: BaseException | None = None) -> None:
+            if error is not None and closing is not None and closing.is_set():
+                # The runner shut down during the backoff
+                result.set_exception(error)
+                return
+            try:
+                future = submit(trial_info)
+            except Exception as e:
+                # The first submission fails like the submit function, retries are submitted in the background
+                if retry == 0:
+                    raise
+                failed(retry, e)
+                return
+            future.add_done_callback(lambda future: finished(retry, future))
+
+        def finished(retry: int, future: Any) -> None:
+            try:
+                trial, value = future.result()
+            except BaseException as e:
+                failed(retry, e)
+                return
+            if retry > 0:
+                value.additional_info[RETRIES_KEY] = retry
+            result.set_result((trial, value))
+
+        def failed(retry: int, error: BaseException) -> None:
+            shutdown = closing is not None and closing.is_set()
+            if retry < self.max_retries and is_infrastructure_error(error) and not shutdown:
+                delay = self.delay(retry + 1)
+                log.warning(f"A trial was lost to {error!r}, retry {retry + 1}/{self.max_retries} in {delay:.1f}s.")
+                with self._lock:
+                    self.n_retries += 1
+                timer = threading.Timer(delay, attempt, args=(retry + 1, error))
+                timer.daemon = True
+                timer.start()
+                return
+            if retry > 0 and is_infrastructure_error(error):
+                lost = TrialLost(retry)
+                lost.__cause__ = error
+                error = lost
+            result.set_exception(error)
+
+        attempt(0)
+        return result
+
+    def wrap(
+        self, submit: Callable[[TrialInfo], Any], closing: threading.Event | None = None
+    ) -> Callable[[TrialInfo], Future]:
+        """Submit function which retries the trials until `closing` is set, e.g. for `AskTellDriver`."""
+        if self.max_retries == 0:
+            return submit
+        return lambda trial_info: self.submit(submit, trial_info, closing=closing)
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import functools
+import logging
+import threading
+import time
+import uuid
+
+import cloudpickle
+from distributed import Client, Future, WorkerPlugin
+from hydra_plugins.hydra_smac_sweeper._coalescing import (
+    AttachedFuture,
+    InFlightTrials,
+    dispatch,
+)
+from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+from hydra_plugins.hydra_smac_sweeper._trials import (
+    crashed_trial_value,
+    pack_trial,
+    unpack_trial,
+)
+from smac.runhistory import TrialInfo, TrialValue
+from smac.runner import AbstractRunner, DaskParallelRunner
+
+log = logging.getLogger(__name__)
+
+# Runners shipped to this worker by `SharedRunnerPlugin`, by key
+shared_runners: dict[str, AbstractRunner] = {}
+
+
+class SharedRunnerPlugin(WorkerPlugin):
+    """Keep a runner on every worker, including workers which join later."""
+
+    def __init__(self, key: str, runner: AbstractRunner) -> None:
+        self.name = f"hydra-smac-sweeper-{key}"
+        self.key = key
+        self.runner = runner
+
+    def setup(self, worker: Any) -> None:  # noqa: D102
+        shared_runners[self.key] = self.runner
+
+    def teardown(self, worker: Any) -> None:  # noqa: D102
+        shared_runners.pop(self.key, None)
+
+
+def run_shared_trial(key: str, trial: tuple, **dask_data_to_scatter: dict[str, Any]) -> tuple[tuple, TrialValue]:
+    """Run a packed trial with a runner shipped by `SharedRunnerPlugin`
+
+    Parameters
+    ----------
+    key : str
+        Key of the runner
+    trial : tuple
+        Configuration vector, instance, seed and budget, see `pack_trial`
+
+    Returns
+    -------
+    tuple[tuple, TrialValue]
+        The packed trial and its trial value, like the trial info and value of `AbstractRunner.run_wrapper`
+    """
+    runner = shared_runners[key]
+    info = unpack_trial(runner._scenario.configspace, trial)
+    _, value = runner.run_wrapper(info, **dask_data_to_scatter)
+    return trial, value
+
+
+class SharedRunner(object):
+    def __init__(
+        self,
+        client: Client,
+        runner: AbstractRunner,
+        resources: Callable[[TrialInfo], dict[str, float]] | None = None,
+    ) -> None:
+        """
+        Ship a runner, i.e. the task function and the hydra config, to the workers of a dask client once.
+
+        Submissions only carry the configuration vector, instance, seed and budget of a trial instead of the pickled
+        runner and trial info, which contain the whole hydra config and configuration space.
+
+        Parameters
+        ----------
+        client: Client
+            Dask client
+        runner: AbstractRunner
+            Runner executing the trials on the workers, e.g. SMAC's `TargetFunctionRunner`
+        resources: Callable[[TrialInfo], dict[str, float]] | None
+            Dask worker resources which a trial needs, e.g. `TrialResources`. By default a trial runs on any worker.
+
+        Returns
+        -------
+        None
+
+        """
+        self.client = client
+        self.key = uuid.uuid4().hex
+        self.resources = resources
+        self.runner_bytes = len(cloudpickle.dumps(runner))
+        # Set when the runner shuts down, lost trials are not retried anymore then
+        self.closing = threading.Event()
+        self.plugin = SharedRunnerPlugin(self.key, runner)
+        client.register_plugin(self.plugin)
+
+        info = TrialInfo(config=runner._scenario.configspace.get_default_configuration())
+        unshared_bytes = self.runner_bytes + len(cloudpickle.dumps(info))
+        log.info(
+            f"Shipped the task function and config to the dask workers ({self.runner_bytes} bytes). A submission "
+            f"carries {self.submission_bytes(info)} bytes instead of {unshared_bytes}."
+        )
+
+    def submission_bytes(self, info: TrialInfo) -> int:
+        """Size of the data sent to the worker for a trial."""
+        return len(cloudpickle.dumps((run_shared_trial, self.key, pack_trial(info))))
+
+    def submit(self, trial_info: TrialInfo, **dask_data_to_scatter: dict[str, Any]) -> Future:
+        """Run a trial on the dask client, the result of the future is the packed trial and its trial value."""
+        resources = self.resources(trial_info) if self.resources is not None else None
+        # Not pure, the same trial may be submitted twice
+        return self.client.submit(
+            run_shared_trial, self.key, pack_trial(trial_info), pure=False, resources=resources, **dask_data_to_scatter
+        )
+
+    def close(self) -> None:
+        """Remove the runner from the workers."""
+        self.closing.set()
+        if self.client.status == "running":
+            self.client.unregister_worker_plugin(self.plugin.name)
+
+
+class SharedDaskParallelRunner(DaskParallelRunner):
+    def __init__(
+        self,
+        runner: DaskParallelRunner,
+        resources: Callable[[TrialInfo], dict[str, float]] | None = None,
+        retry: RetryPolicy | None = None,
+        in_flight: InFlightTrials | None = None,
+    ) -> None:
+        """
+        Take over SMAC's dask runner and submit trials with a `SharedRunner`.
+
+        Parameters
+        ----------
+        runner: DaskParallelRunner
+            Runner created by the SMAC facade. Its client is taken over and closed by this runner, if it was created
+            by SMAC.
+        resources: Callable[[TrialInfo], dict[str, float]] | None
+            Dask worker resources which a trial needs, see `SharedRunner`.
+        retry: RetryPolicy | None
+            Policy to run trials again which were lost, e.g. with their worker. Otherwise they crash.
+        in_flight: InFlightTrials | None
+            Running trials, identical trials are attached to them instead of taking another worker.
+
+        Returns
+        -------
+        None
+
+        """
+        super().__init__(single_worker=runner._single_worker, patience=runner._patience, dask_client=runner._client)
+        self._close_client_at_del = runner._close_client_at_del
+        self._scheduler_file = runner._scheduler_file
+        runner._close_client_at_del = False
+        self.shared = SharedRunner(self._client, self._single_worker, resources=resources)
+        self.retry = retry
+        self.in_flight = in_flight
+        self._trial_infos: dict[int, TrialInfo] = {}
+        # Set when a pending trial finishes
+        self._finished = threading.Event()
+
+    def submit_trial(self, trial_info: TrialInfo, **dask_data_to_scatter: dict[str, Any]) -> None:  # noqa: D102
+        # Wait for a free worker as DaskParallelRunner.submit_trial does
+        if self.count_available_workers() <= 0:
+            self.wait()
+            self._process_pending_trials()
+
+        if self.count_available_workers() <= 0:
+            log.warning("No workers are available. This could mean workers crashed. Waiting for new workers...")
+            time.sleep(self._patience)
+            if self.count_available_workers() <= 0:
+                raise RuntimeError(
+                    "Tried to execute a job, but no worker was ever available."
+                    "This likely means that a worker crashed or no workers were properly configured."
+                )
+
+        submit = functools.partial(self.shared.submit, **dask_data_to_scatter)
+        trial = dispatch(submit, trial_info, retry=self.retry, in_flight=self.in_flight, closing=self.shared.closing)
+        self._trial_infos[id(trial)] = trial_info
+        # Retried and attached trials have futures of the standard library, the others dask futures
+        trial.add_done_callback(lambda _: self._finished.set())
+        self._pending_trials.append(trial)
+
+    def wait(self) -> None:  # noqa: D102
+        if not self.is_running():
+            return
+        # Trials which finished before are not processed yet and return at once
+        self._finished.clear()
+        if any(trial.done() for trial in self._pending_trials):
+            return
+        self._finished.wait()
+
+    def count_available_workers(self) -> int:  # noqa: D102
+        running = [trial for trial in self._pending_trials if not isinstance(trial, AttachedFuture)]
+        return sum(self._client.nthreads().values()) - len(running)
+
+    def _process_pending_trials(self) -> None:
+        # The workers return the packed trial, the result is the trial info as submitted
+        done = [trial for trial in self._pending_trials if trial.done()]
+        for trial in done:
+            try:
+                _, value = trial.result()
+            except Exception as e:
+                value = crashed_trial_value(e, self._crash_cost)
+            self._results_queue.append((self._trial_infos.pop(id(trial)), value))
+            self._pending_trials.remove(trial)
+
+    def close(self, force: bool = False) -> None:  # noqa: D102
+        self.shared.close()
+        super().close(force=force)
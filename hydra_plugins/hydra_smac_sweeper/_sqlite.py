@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Any
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class SQLiteDatabase(object):
+    def __init__(self, path: str | Path, timeout: float = 30.0) -> None:
+        """
+        SQLite database which can be shared by several threads and processes.
+
+        Every process opens its own connection on first use, threads of a process share it under a lock. Pickled
+        copies, e.g. on a dask worker, open a new connection. Subclasses create their tables in `create_tables`.
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the database file
+        timeout : float
+            Seconds to wait for a lock on the database
+
+        Returns
+        -------
+        None
+
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def create_tables(self, connection: sqlite3.Connection) -> None:
+        """Create the tables of the database if they do not exist yet."""
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current process, opened on first use."""
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path), timeout=self.timeout, check_same_thread=False)
+            self._pid = os.getpid()
+            with self._connection:
+                self.create_tables(self._connection)
+        return self._connection
+
+    def close(self) -> None:
+        """Close the connection of the current process."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
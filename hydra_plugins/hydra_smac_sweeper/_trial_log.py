@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Any
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from smac.callback import Callback
+from smac.main.smbo import SMBO
+from smac.runhistory import TrialInfo, TrialValue
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+class TrialLog(Callback):
+    def __init__(self, path: str | Path, sync_every: int = 100, sync_interval: float = 5.0) -> None:
+        """
+        Append every finished trial as one json line to a log in the sweep directory.
+
+        A record holds the config (hyperparameter name to value), cost, instance, seed, budget, status, timings and
+        additional info of the trial. Every record is written as soon as the trial is told, so that the log can be
+        tailed while the sweep runs. The file is synced to disk in batches, a crash loses at most the records since
+        the last sync. Trials told before the sweep starts, e.g. when resuming, are not written again.
+
+        Parameters
+        ----------
+        path: str | Path
+            Path of the jsonl file, which is appended to.
+        sync_every: int
+            The file is synced to disk after this many records.
+        sync_interval: float
+            The file is synced to disk when a record is written this many seconds after the last sync.
+
+        Returns
+        -------
+        None
+
+        """
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.n_records = 0
+        self._unsynced = 0
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        self._file: Any = None
+
+    def on_start(self, smbo: SMBO) -> None:  # noqa: D102
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a")
+        self._last_sync = time.time()
+
+    def on_tell_end(self, smbo: SMBO, info: TrialInfo, value: TrialValue) -> bool | None:  # noqa: D102
+        if self._file is None:
+            return None
+        self.write(
+            {
+                "config_id": smbo.runhistory.get_config_id(info.config),
+                "config": dict(info.config),
+                "instance": info.instance,
+                "seed": info.seed,
+                "budget": info.budget,
+                "cost": value.cost,
+                "status": value.status.name,
+                "starttime": value.starttime,
+                "endtime": value.endtime,
+                "time": value.time,
+                "additional_info": value.additional_info,
+            }
+        )
+        return None
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Append a record and flush it, so that readers tailing the log see it right away."""
+        line = json.dumps(record, default=_to_json) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.n_records += 1
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.time() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def on_end(self, smbo: SMBO) -> None:  # noqa: D102
+        self.close()
+
+    def close(self) -> None:
+        """Sync and close the jsonl file."""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import Any
+
+import time
+import traceback
+
+import numpy as np
+from ConfigSpace import Configuration, ConfigurationSpace  # type: ignore[import]
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+
+
+def pack_trial(info: TrialInfo) -> tuple:
+    """Compact representation of a trial which is sent to a worker: configuration vector, instance, seed, budget."""
+    return info.config.get_array(), info.instance, info.seed, info.budget
+
+
+def unpack_trial(configspace: ConfigurationSpace, trial: tuple) -> TrialInfo:
+    """Rebuild the trial info of a packed trial, see `pack_trial`."""
+    vector, instance, seed, budget = trial
+    config = Configuration(configspace, vector=np.asarray(vector))
+    return TrialInfo(config=config, instance=instance, seed=seed, budget=budget)
+
+
+def crashed_trial_value(error: BaseException, cost: float | list[float]) -> TrialValue:
+    """Trial value of a trial whose future failed, e.g. because its worker died."""
+    from hydra_plugins.hydra_smac_sweeper._retry import RETRIES_KEY, TrialLost
+
+    now = time.time()
+    additional_info: dict[str, Any] = {
+        "traceback": "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+        "error": repr(error),
+    }
+    if isinstance(error, TrialLost):
+        additional_info[RETRIES_KEY] = error.retries
+    return TrialValue(cost=cost, status=StatusType.CRASHED, starttime=now, endtime=now, additional_info=additional_info)
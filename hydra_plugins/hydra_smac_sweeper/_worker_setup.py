@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import gc
+import inspect
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from hydra.utils import get_method
+from hydra_plugins.hydra_smac_sweeper.trial_cache import get_target_identity
+from omegaconf import DictConfig
+
+log = logging.getLogger(__name__)
+
+# Results of the worker setups which ran in this process by key, the least recently used first
+_states: OrderedDict[str, Any] = OrderedDict()
+_states_lock = threading.Lock()
+
+
+def accepts_worker_state(task_function: Callable) -> bool:
+    """Whether the task function can be called with a `worker_state` keyword argument."""
+    parameters = inspect.signature(task_function).parameters.values()
+    return any(p.name == "worker_state" or p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+
+def get_available_memory() -> float:
+    """Fraction of the memory of the machine which is available."""
+    import psutil
+
+    memory = psutil.virtual_memory()
+    return memory.available / memory.total
+
+
+class WorkerSetup(object):
+    def __init__(
+        self,
+        setup: Callable[[DictConfig], Any] | str,
+        config: DictConfig,
+        min_available_memory: float | None = None,
+    ) -> None:
+        """
+        Run an expensive setup, e.g. loading a dataset, once per worker process and reuse its result in every trial.
+
+        The result is cached in the process by the setup function and the config, so it is shared by all trials and
+        threads of a dask worker or launcher process.
+
+        Parameters
+        ----------
+        setup: Callable[[DictConfig], Any] | str
+            Function (or its import path) which gets the hydra config of the sweep and returns the state of the worker.
+        config: DictConfig
+            Hydra config of the sweep, without the hyperparameters of a trial.
+        min_available_memory: float | None
+            If the available memory of the machine drops below this fraction after a trial, the cached states are
+            released and the setup runs again for the next trial. By default, states are never released.
+
+        Returns
+        -------
+        None
+
+        """
+        if isinstance(setup, str):
+            setup = get_method(setup)
+        if min_available_memory is not None and not 0 <= min_available_memory < 1:
+            raise ValueError(f"min_available_memory must be a fraction, got {min_available_memory}.")
+        self.setup = setup
+        self.config = config
+        self.min_available_memory = min_available_memory
+        self.key = get_target_identity(setup, config)
+
+    def get(self) -> Any:
+        """Get the state of the worker, run the setup if it did not run in this process yet."""
+        with _states_lock:
+            if self.key in _states:
+                _states.move_to_end(self.key)
+                return _states[self.key]
+
+            # Other threads wait for the setup instead of running it again
+            start = time.time()
+            state = self.setup(self.config)
+            _states[self.key] = state
+            name = getattr(self.setup, "__qualname__", self.setup)
+            log.info(f"Worker setup {name} took {time.time() - start:.2f}s.")
+            return state
+
+    def release_if_low_memory(self) -> None:
+        """Release cached states, the least recently used first, while the available memory is too low."""
+        if self.min_available_memory is None:
+            return
+        with _states_lock:
+            while len(_states) > 0 and get_available_memory() < self.min_available_memory:
+                key, _ = _states.popitem(last=False)
+                gc.collect()
+                log.warning(f"Released the worker state {key[:8]}, the available memory is low.")
+
+
+class WorkerTask(object):
+    def __init__(self, task_function: Callable, worker_setup: WorkerSetup) -> None:
+        """
+        Call a task function with the state of the worker, for the hydra launcher.
+
+        Parameters
+        ----------
+        task_function: Callable
+            Hydra task function with a `worker_state` argument.
+        worker_setup: WorkerSetup
+            Setup of the worker state.
+
+        Returns
+        -------
+        None
+
+        """
+        self.task_function = task_function
+        self.worker_setup = worker_setup
+
+    def __call__(self, cfg: DictConfig) -> Any:
+        result = self.task_function(cfg, worker_state=self.worker_setup.get())
+        self.worker_setup.release_if_low_memory()
+        return result
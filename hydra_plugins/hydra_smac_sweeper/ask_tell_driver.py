@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+if TYPE_CHECKING:
+    from ConfigSpace import Configuration  # type: ignore[import]
+    from smac.facade.abstract_facade import AbstractFacade
+    from smac.runhistory import TrialInfo, TrialValue
+
+log = logging.getLogger(__name__)
+
+
+class AskTellDriver(object):
+    def __init__(
+        self,
+        smac: AbstractFacade,
+        executor: Any,
+        max_in_flight: int = 1,
+        batch_size: int = 1,
+        on_dispatch: Callable[[TrialInfo], None] | None = None,
+        submit: Callable[[TrialInfo], Any] | None = None,
+    ) -> None:
+        """
+        Asynchronous ask/tell loop around a SMAC facade.
+
+        Trials are submitted to `executor` until `max_in_flight` trials are running. A background thread asks SMAC
+        for the next trials (and thereby refits the surrogate model) while the trials run, so that a free slot can
+        be refilled immediately. Results are told back as soon as each trial finishes.
+
+        Parameters
+        ----------
+        smac: AbstractFacade
+            Instance of a SMAC facade. Its runner must be a serial runner, e.g. `TargetFunctionRunner`.
+        executor: Any
+            Object with a `submit(fn, *args, **kwargs)` method returning a future which supports
+            `add_done_callback` and `result`, e.g. a `dask.distributed.Client` or a
+            `concurrent.futures.Executor`.
+        max_in_flight: int
+            Maximum number of trials running at the same time.
+        batch_size: int
+            Number of trials asked from SMAC ahead of time.
+        on_dispatch: Callable[[TrialInfo], None] | None
+            Called with every trial after it was submitted to the executor.
+        submit: Callable[[TrialInfo], Any] | None
+            Submits a trial and returns its future, e.g. `SharedRunner.submit`. The result of the future must be a
+            tuple of the trial (in any form) and its trial value. By default, SMAC's runner is submitted to
+            `executor`.
+
+        Returns
+        -------
+        None
+
+        """
+        if max_in_flight < 1 or batch_size < 1:
+            raise ValueError("max_in_flight and batch_size must be positive.")
+
+        self.smac = smac
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.on_dispatch = on_dispatch
+        self.submit = submit if submit is not None else self._submit
+
+        # Guards all calls into SMAC, ask and tell are not thread-safe
+        self._smac_lock = threading.Lock()
+        # Guards the asked but not yet submitted trials
+        self._condition = threading.Condition()
+        self._asked: deque[TrialInfo] = deque()
+        self._asking_done = False
+        self._ask_error: Exception | None = None
+        self._stop = False
+
+        self._done: queue.Queue = queue.Queue()
+        self._in_flight: dict[Any, TrialInfo] = {}
+
+        self.stats: dict[str, float] = {}
+
+    def run(self) -> Configuration | list[Configuration] | None:
+        """
+        Run the optimization until SMAC's budget is exhausted.
+
+        Returns
+        -------
+        Configuration | list[Configuration] | None
+            Incumbent (best) configuration, the incumbents on the Pareto front with several objectives.
+
+        """
+        optimizer = self.smac.optimizer
+        if optimizer._start_time is None:
+            optimizer._start_time = time.time()
+        for callback in optimizer._callbacks:
+            callback.on_start(optimizer)
+
+        asker = threading.Thread(target=self._ask_loop, name="smac-asker", daemon=True)
+        asker.start()
+
+        start = time.time()
+        busy_time = 0.0
+        n_told = 0
+        try:
+            while True:
+                self._fill()
+                if len(self._in_flight) == 0:
+                    with self._condition:
+                        if self._asking_done and len(self._asked) == 0:
+                            break
+                        if len(self._asked) == 0:
+                            self._condition.wait()
+                    continue
+
+                future = self._done.get()
+                info = self._in_flight.pop(future)
+                # Refill the slot before telling, telling waits for a running refit
+                self._fill()
+
+                value = self._get_result(future, info)
+                busy_time += value.endtime - value.starttime
+                with self._smac_lock:
+                    self.smac.tell(info, value, save=False)
+                    optimizer._used_target_function_walltime += value.time
+                    n_told += 1
+                    if optimizer._stop:
+                        self._request_stop()
+        finally:
+            self._request_stop()
+            asker.join()
+        if self._ask_error is not None:
+            raise self._ask_error
+
+        with self._smac_lock:
+            optimizer.save()
+            if optimizer.budget_exhausted:
+                optimizer._finished = True
+            for callback in optimizer._callbacks:
+                callback.on_end(optimizer)
+
+        elapsed = time.time() - start
+        capacity = elapsed * self.max_in_flight
+        self.stats = {
+            "trials": n_told,
+            "elapsed": elapsed,
+            "busy_time": busy_time,
+            "utilisation": busy_time / capacity if capacity > 0 else 0.0,
+        }
+        log.info(
+            f"Worker utilisation: {self.stats['utilisation']:.1%} "
+            f"({busy_time:.2f}s busy of {capacity:.2f}s capacity, {self.max_in_flight} slots, {n_told} trials)"
+        )
+
+        if self.smac.scenario.count_objectives() > 1:
+            return self.smac.intensifier.get_incumbents()
+        return self.smac.intensifier.get_incumbent()
+
+    def _fill(self) -> None:
+        """Submit asked trials until `max_in_flight` trials are running."""
+        with self._condition:
+            while len(self._in_flight) < self.max_in_flight and len(self._asked) > 0:
+                info = self._asked.popleft()
+                future = self.submit(info)
+                self._in_flight[future] = info
+                future.add_done_callback(self._done.put)
+                if self.on_dispatch is not None:
+                    self.on_dispatch(info)
+            self._condition.notify_all()
+
+    def _submit(self, info: TrialInfo) -> Any:
+        return self.executor.submit(self.smac._runner.run_wrapper, trial_info=info)
+
+    def _ask_loop(self) -> None:
+        """Ask SMAC for new trials in the background."""
+        optimizer = self.smac.optimizer
+        try:
+            while True:
+                with self._condition:
+                    while not self._stop and len(self._asked) >= self.batch_size:
+                        self._condition.wait()
+                    if self._stop:
+                        return
+
+                with self._smac_lock:
+                    if optimizer.budget_exhausted or optimizer._stop:
+                        return
+                    info = self.smac.ask()
+
+                with self._condition:
+                    self._asked.append(info)
+                    self._condition.notify_all()
+        except StopIteration:
+            return
+        except Exception as e:
+            self._ask_error = e
+        finally:
+            with self._condition:
+                self._asking_done = True
+                self._condition.notify_all()
+
+    def _request_stop(self) -> None:
+        with self._condition:
+            self._stop = True
+            self._condition.notify_all()
+
+    def _get_result(self, future: Any, info: TrialInfo) -> TrialValue:
+        """Get the trial value of a finished future, failures of the executor count as crashes."""
+        from hydra_plugins.hydra_smac_sweeper._trials import crashed_trial_value
+
+        try:
+            _, value = future.result()
+        except Exception as e:
+            value = crashed_trial_value(e, self.smac.scenario.crash_cost)
+        return value
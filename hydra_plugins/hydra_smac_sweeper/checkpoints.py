@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+if TYPE_CHECKING:
+    from ConfigSpace import Configuration  # type: ignore[import]
+
+# Config keys which receive the checkpoint directory of a trial and the budget its checkpoint was trained with
+CHECKPOINT_DIR_KEY = "checkpoint_dir"
+PREVIOUS_BUDGET_KEY = "previous_budget"
+
+
+class Checkpoints(object):
+    def __init__(self, path: str | Path) -> None:
+        """
+        Stable checkpoint directories for the trials of a multi-fidelity sweep.
+
+        A configuration gets the same directory at every budget, so that the task function can continue training
+        from the checkpoint of the previous rung instead of starting from scratch. The budget of the trial which
+        finished last in a directory, i.e. the budget its checkpoint was trained with, is recorded in `budget.json`.
+        The directories can be shared by processes and machines.
+
+        Parameters
+        ----------
+        path: str | Path
+            Directory containing the checkpoint directories of all trials.
+
+        Returns
+        -------
+        None
+
+        """
+        self.path = Path(path)
+
+    def get_directory(
+        self, config: Configuration, seed: int | None = None, instance: str | None = None, target_identity: str = ""
+    ) -> Path:
+        """Checkpoint directory of a configuration, the same for all budgets. It is created if it does not exist."""
+        h = hashlib.sha256()
+        h.update(config.get_array().tobytes())
+        h.update(repr((seed, instance, target_identity)).encode())
+        directory = self.path / h.hexdigest()[:32]
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+
+    def get_previous_budget(self, directory: Path, budget: float | None = None) -> float | None:
+        """Budget of the checkpoint in the directory, None if there is none or it is not below `budget`."""
+        try:
+            previous = json.loads((directory / "budget.json").read_text())["budget"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+        if previous is None or (budget is not None and previous >= budget):
+            # E.g. the same configuration in another bracket of hyperband, its checkpoint is too far trained
+            return None
+        return previous
+
+    def finished(self, directory: Path, budget: float | None = None) -> None:
+        """Record that a trial finished in the directory, its checkpoint replaced the one of any previous budget."""
+        # Write atomically, concurrent trials must not see a partial file
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"budget": budget}, f)
+        os.replace(tmp, directory / "budget.json")
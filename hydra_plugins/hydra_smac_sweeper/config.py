@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from dataclasses import dataclass, field
 
@@ -12,6 +12,38 @@ class SMACSweeperConfig:
     scenario: Dict[str, Any] = field(default_factory=dict)
     smac_class: Optional[str] = None
     smac_kwargs: Optional[Dict] = None
+    use_launcher: bool = False
+    batch_size: Optional[int] = None
+    async_ask_tell: bool = False
+    max_in_flight: Optional[int] = None
+    trial_cache: bool = False
+    trial_cache_kwargs: Dict[str, Any] = field(default_factory=dict)
+    resume: bool = False
+    warm_start_from: List[str] = field(default_factory=list)
+    elastic_scaling: bool = False
+    elastic_scaling_kwargs: Dict[str, Any] = field(default_factory=dict)
+    profiling: bool = False
+    profiling_kwargs: Dict[str, Any] = field(default_factory=dict)
+    verbose: bool = False
+    search_space_cache_dir: Optional[str] = None
+    worker_setup: Optional[str] = None
+    worker_setup_kwargs: Dict[str, Any] = field(default_factory=dict)
+    checkpointing: bool = False
+    checkpointing_kwargs: Dict[str, Any] = field(default_factory=dict)
+    early_stopping: bool = False
+    early_stopping_kwargs: Dict[str, Any] = field(default_factory=dict)
+    process_pool: bool = False
+    process_pool_kwargs: Dict[str, Any] = field(default_factory=dict)
+    trial_log: bool = False
+    trial_log_kwargs: Dict[str, Any] = field(default_factory=dict)
+    batch_evaluation: bool = False
+    trial_resources: Dict[str, Any] = field(default_factory=dict)
+    clusters: List[Dict[str, Any]] = field(default_factory=list)
+    retries: int = 0
+    retry_backoff: float = 1.0
+    coalesce_trials: bool = True
+    metrics: bool = False
+    metrics_kwargs: Dict[str, Any] = field(default_factory=dict)
 
 
 ConfigStore.instance().store(group="hydra/sweeper", name="SMAC", node=SMACSweeperConfig, provider="hydra_smac_sweeper")
@@ -0,0 +1,13 @@
+"""Report intermediate costs from a task function, see `report`.
+
+The implementation lives in a private module, which hydra's plugin scan does not import again. The state of the
+running trial must be the same object in the task function and in the sweeper.
+"""
+
+from hydra_plugins.hydra_smac_sweeper._early_stopping import (
+    EARLY_STOPPED_KEY,
+    TrialStopped,
+    report,
+)
+
+__all__ = ["EARLY_STOPPED_KEY", "TrialStopped", "report"]
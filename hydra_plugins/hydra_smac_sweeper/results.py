@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+import json
+import logging
+from pathlib import Path
+
+from hydra_plugins.hydra_smac_sweeper.warm_start import find_runhistories
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from smac.runhistory import RunHistory
+
+log = logging.getLogger(__name__)
+
+# Columns of a trial in the results table, hyperparameters with one of these names get the prefix "config."
+TRIAL_COLUMNS = ["config_id", "instance", "seed", "budget", "status", "starttime", "endtime", "time", "retries"]
+
+
+def read_trial_log(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Read the records of a trial log
+
+    Parameters
+    ----------
+    path : str | Path
+        Path of the jsonl file written with `trial_log`
+
+    Returns
+    -------
+    Iterator[dict[str, Any]]
+        Records in the order the trials were told. A partially written last line, e.g. of a sweep which is still
+        running or crashed while writing, is skipped.
+    """
+    with open(path) as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                log.warning(f"Skipping a corrupt record in {path}.")
+
+
+def _to_frame(rows: Iterable[tuple[dict[str, Any], dict[str, Any], Any]]) -> pd.DataFrame:
+    """Table of (config, trial columns, cost) rows, the cost is split into one column per objective."""
+    import numpy as np
+    import pandas as pd
+
+    configs, trials, costs = [], [], []
+    for config, trial, cost in rows:
+        configs.append(config)
+        trials.append(trial)
+        costs.append(cost)
+
+    trial_frame = pd.DataFrame(trials, columns=TRIAL_COLUMNS)
+    config_frame = pd.DataFrame(configs)
+    config_frame.columns = [f"config.{name}" if name in TRIAL_COLUMNS else name for name in config_frame.columns]
+    cost_array = np.asarray(costs, dtype=float)
+    if cost_array.ndim == 2:
+        cost_frame = pd.DataFrame(cost_array, columns=[f"cost_{i}" for i in range(cost_array.shape[1])])
+    else:
+        cost_frame = pd.DataFrame({"cost": cost_array})
+    return pd.concat([trial_frame[["config_id"]], config_frame, cost_frame, trial_frame.iloc[:, 1:]], axis=1)
+
+
+def runhistory_to_frame(runhistory: RunHistory) -> pd.DataFrame:
+    """Turn a runhistory into a table with one row per trial
+
+    Parameters
+    ----------
+    runhistory : RunHistory
+        Runhistory of a SMAC facade, e.g. `smac.runhistory`
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns `config_id`, one per hyperparameter, `cost` (`cost_0`, `cost_1`, ... with several objectives),
+        `instance`, `seed`, `budget`, `status`, `starttime`, `endtime`, `time` and `retries`, the number of times the
+        trial was run again after it was lost to an infrastructure error. Inactive hyperparameters are NaN.
+    """
+    from hydra_plugins.hydra_smac_sweeper._retry import RETRIES_KEY
+
+    rows = []
+    for key, value in runhistory.items():
+        trial = {
+            "config_id": key.config_id,
+            "instance": key.instance,
+            "seed": key.seed,
+            "budget": key.budget,
+            "status": value.status.name,
+            "starttime": value.starttime,
+            "endtime": value.endtime,
+            "time": value.time,
+            "retries": value.additional_info.get(RETRIES_KEY, 0),
+        }
+        rows.append((dict(runhistory.get_config(key.config_id)), trial, value.cost))
+    return _to_frame(rows)
+
+
+def _trial_log_rows(path: Path) -> Iterator[tuple[dict[str, Any], dict[str, Any], Any]]:
+    from hydra_plugins.hydra_smac_sweeper._retry import RETRIES_KEY
+
+    for record in read_trial_log(path):
+        trial = {column: record.get(column) for column in TRIAL_COLUMNS}
+        trial["retries"] = record.get("additional_info", {}).get(RETRIES_KEY, 0)
+        yield record["config"], trial, record["cost"]
+
+
+def _runhistory_rows(path: Path) -> Iterator[tuple[dict[str, Any], dict[str, Any], Any]]:
+    from hydra_plugins.hydra_smac_sweeper._retry import RETRIES_KEY
+    from smac.runhistory import StatusType
+
+    with open(path) as fp:
+        data = json.load(fp)
+    for config_id, instance, seed, budget, cost, time, status, starttime, endtime, additional_info in data["data"]:
+        trial = {
+            "config_id": config_id,
+            "instance": instance,
+            "seed": seed,
+            "budget": budget,
+            "status": StatusType(status).name,
+            "starttime": starttime,
+            "endtime": endtime,
+            "time": time,
+            "retries": additional_info.get(RETRIES_KEY, 0),
+        }
+        yield data["configs"][str(config_id)], trial, cost
+
+
+def load_results(path: str | Path) -> pd.DataFrame:
+    """Load the trials of a sweep as a table
+
+    The trial log is used if the sweep wrote one, it contains every trial as soon as it finished. Otherwise the most
+    recent runhistory of SMAC is read. Write the table to parquet or feather with pandas for other tools.
+
+    Parameters
+    ----------
+    path : str | Path
+        Hydra sweep directory, a `trials.jsonl` trial log or a `runhistory.json` file
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per trial, see `runhistory_to_frame` for the columns
+    """
+    path = Path(path)
+    if path.is_dir() and (path / "trials.jsonl").exists():
+        path = path / "trials.jsonl"
+    if path.suffix == ".jsonl":
+        return _to_frame(_trial_log_rows(path))
+    runhistories = find_runhistories(path)
+    if len(runhistories) == 0:
+        raise FileNotFoundError(f"Neither a trial log nor a runhistory was found in {path}.")
+    return _to_frame(_runhistory_rows(runhistories[-1]))
+
+
+def cost_columns(results: pd.DataFrame) -> list[str]:
+    """Names of the cost columns of a results table, one per objective."""
+    if "cost" in results.columns:
+        return ["cost"]
+    return [column for column in results.columns if column.startswith("cost_")]
+
+
+def top_k(results: pd.DataFrame, k: int, by: str = "cost") -> pd.DataFrame:
+    """The `k` trials with the lowest value of the column `by`."""
+    return results.nsmallest(k, by)
+
+
+def aggregate_by_budget(results: pd.DataFrame, by: str = "cost") -> pd.DataFrame:
+    """Number of trials and minimum, median and mean of the column `by` per budget."""
+    return results.groupby("budget", dropna=False)[by].agg(["count", "min", "median", "mean"])
+
+
+def non_dominated(costs: np.ndarray) -> np.ndarray:
+    """Find the points which no other point dominates
+
+    Points are visited in lexicographic order, the first remaining point is always on the front and removes every
+    point it dominates at once. This needs one vectorised comparison per point on the front instead of comparing all
+    pairs of points.
+
+    Parameters
+    ----------
+    costs : np.ndarray
+        Costs of shape (n_points, n_objectives), lower is better
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask of the points on the Pareto front. Points with equal costs are all on the front.
+    """
+    import numpy as np
+
+    costs = np.asarray(costs, dtype=float)
+    if costs.ndim == 1:
+        costs = costs[:, None]
+    mask = np.zeros(len(costs), dtype=bool)
+    remaining = np.lexsort(costs.T[::-1])
+    while remaining.size > 0:
+        best = costs[remaining[0]]
+        mask[remaining[0]] = True
+        candidates = costs[remaining]
+        dominated = np.all(candidates >= best, axis=1) & np.any(candidates > best, axis=1)
+        dominated[0] = True
+        remaining = remaining[~dominated]
+    return mask
+
+
+class ParetoFront(object):
+    def __init__(self) -> None:
+        """
+        Pareto front which is updated with every new point instead of being recomputed from all points.
+
+        A new point is compared with the points on the front only: it is rejected if one of them dominates it,
+        otherwise it removes the points it dominates. Both checks are one vectorised comparison.
+
+        Returns
+        -------
+        None
+
+        """
+        self.costs: np.ndarray | None = None
+        self.items: list[Any] = []
+
+    def add(self, cost: float | list[float], item: Any = None) -> bool:
+        """Add a point with the costs of every objective, lower is better. Returns whether it is on the front."""
+        import numpy as np
+
+        point = np.atleast_1d(np.asarray(cost, dtype=float))
+        if self.costs is None:
+            self.costs = np.empty((0, len(point)))
+        dominating = np.all(self.costs <= point, axis=1) & np.any(self.costs < point, axis=1)
+        if np.any(dominating):
+            return False
+        keep = ~(np.all(self.costs >= point, axis=1) & np.any(self.costs > point, axis=1))
+        self.costs = np.vstack([self.costs[keep], point])
+        self.items = [existing for existing, kept in zip(self.items, keep) if kept] + [item]
+        return True
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def pareto_front(results: pd.DataFrame, objectives: list[str] | None = None) -> pd.DataFrame:
+    """Trials on the Pareto front of the `objectives` columns, by default the cost columns."""
+    if objectives is None:
+        objectives = cost_columns(results)
+    return results[non_dominated(results[objectives].to_numpy())]
@@ -1,50 +1,206 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 
+import hashlib
 import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
 
-from ConfigSpace import ConfigurationSpace  # type: ignore[import]
-from ConfigSpace.read_and_write import json as csjson  # type: ignore[import]
-from omegaconf import DictConfig, ListConfig
+from omegaconf import DictConfig, OmegaConf
 
+if TYPE_CHECKING:
+    from ConfigSpace import ConfigurationSpace  # type: ignore[import]
 
-class JSONCfgEncoder(json.JSONEncoder):
-    """Encode DictConfigs.
 
-    Convert DictConfigs to normal dicts.
+# Keys a hyperparameter of a yaml search space may omit
+HYPERPARAMETER_DEFAULTS: dict[str, Any] = {"default": None, "log": False, "q": None}
+
+# Pickled configuration spaces by content hash, see `search_space_to_config_space`
+_config_space_cache: dict[str, bytes] = {}
+
+
+# Classes of the hyperparameters, conditions and forbidden relations by their type in ConfigSpace's json format
+NUMERICAL_HYPERPARAMETERS = {
+    "uniform_float": "UniformFloatHyperparameter",
+    "uniform_int": "UniformIntegerHyperparameter",
+    "normal_float": "NormalFloatHyperparameter",
+    "normal_int": "NormalIntegerHyperparameter",
+}
+CONDITIONS = {
+    "EQ": "EqualsCondition",
+    "NEQ": "NotEqualsCondition",
+    "GT": "GreaterThanCondition",
+    "LT": "LessThanCondition",
+}
+FORBIDDEN_RELATIONS = {
+    "LESS": "ForbiddenLessThanRelation",
+    "EQUALS": "ForbiddenEqualsRelation",
+    "GREATER": "ForbiddenGreaterThanRelation",
+}
+
+
+def _build_hyperparameter(hp: dict[str, Any]) -> Any:
+    import ConfigSpace  # type: ignore[import]
+
+    kind, name = hp["type"], hp["name"]
+    if kind == "constant":
+        return ConfigSpace.Constant(name=name, value=hp["value"])
+    if kind == "unparametrized":
+        return ConfigSpace.UnParametrizedHyperparameter(name=name, value=hp["value"])
+    if kind == "categorical":
+        return ConfigSpace.CategoricalHyperparameter(
+            name=name, choices=hp["choices"], default_value=hp["default"], weights=hp.get("weights", None)
+        )
+    if kind == "ordinal":
+        return ConfigSpace.OrdinalHyperparameter(name=name, sequence=hp["sequence"], default_value=hp["default"])
+    if kind not in NUMERICAL_HYPERPARAMETERS:
+        raise ValueError(f"The hyperparameter {name} has the unknown type {kind}.")
+    kwargs = {key: hp[key] for key in ["lower", "upper", "mu", "sigma", "q"] if hp.get(key, None) is not None}
+    hp_class = getattr(ConfigSpace, NUMERICAL_HYPERPARAMETERS[kind])
+    return hp_class(name=name, default_value=hp["default"], log=hp["log"], **kwargs)
+
+
+def _build_condition(condition: dict[str, Any], hyperparameters: dict[str, Any]) -> Any:
+    import ConfigSpace  # type: ignore[import]
+
+    kind = condition["type"]
+    if kind in ["AND", "OR"]:
+        conjunction = ConfigSpace.AndConjunction if kind == "AND" else ConfigSpace.OrConjunction
+        return conjunction(*[_build_condition(c, hyperparameters) for c in condition["conditions"]])
+    child, parent = hyperparameters[condition["child"]], hyperparameters[condition["parent"]]
+    if kind == "IN":
+        return ConfigSpace.InCondition(child, parent, condition["values"])
+    if kind not in CONDITIONS:
+        raise ValueError(f"The condition of {condition['child']} has the unknown type {kind}.")
+    return getattr(ConfigSpace, CONDITIONS[kind])(child, parent, condition["value"])
+
+
+def _build_forbidden(forbidden: dict[str, Any], hyperparameters: dict[str, Any]) -> Any:
+    import ConfigSpace  # type: ignore[import]
+
+    kind = forbidden["type"]
+    if kind == "AND":
+        return ConfigSpace.ForbiddenAndConjunction(
+            *[_build_forbidden(f, hyperparameters) for f in forbidden["clauses"]]
+        )
+    if kind == "EQUALS":
+        return ConfigSpace.ForbiddenEqualsClause(hyperparameters[forbidden["name"]], forbidden["value"])
+    if kind == "IN":
+        return ConfigSpace.ForbiddenInClause(hyperparameters[forbidden["name"]], forbidden["values"])
+    if kind == "RELATION" and forbidden["lambda"] in FORBIDDEN_RELATIONS:
+        relation = getattr(ConfigSpace, FORBIDDEN_RELATIONS[forbidden["lambda"]])
+        return relation(hyperparameters[forbidden["left"]], hyperparameters[forbidden["right"]])
+    raise ValueError(f"The forbidden clause {forbidden} has an unknown type.")
+
+
+def build_config_space(search_space: DictConfig | dict[str, Any]) -> ConfigurationSpace:
+    """Build a configuration space from a search space of a hydra config
+
+    The hyperparameters, conditions and forbiddens are constructed directly with the public classes of ConfigSpace,
+    without a round trip through its json reader, and added in bulk. The search space is not modified.
+
+    Parameters
+    ----------
+    search_space : DictConfig | dict[str, Any]
+        Search space with `hyperparameters` by name (or a list of hyperparameters with a `name`) and optional
+        `conditions` and `forbiddens` in ConfigSpace's json format
+
+    Returns
+    -------
+    ConfigurationSpace
+        Configuration space
     """
+    from ConfigSpace import ConfigurationSpace  # type: ignore[import]
 
-    def default(self, obj: DictConfig | ListConfig | Any) -> Any:
-        """Modify default of JSON encoder
-
-        Parameters
-        ----------
-        obj : DictConfig | ListConfig | Any
-            Object to encode
-
-        Returns
-        -------
-        Any
-            Encoded object
-        """
-        if isinstance(obj, DictConfig):
-            return dict(obj)
-        elif isinstance(obj, ListConfig):
-            parsed_list = []
-            for o in obj:
-                if type(o) == DictConfig:
-                    o = dict(o)
-                elif type(o) == ListConfig:
-                    o = list(o)
-                parsed_list.append(o)
-
-            return parsed_list  # [dict(o) for o in obj]
-        return json.JSONEncoder.default(self, obj)
+    if isinstance(search_space, DictConfig):
+        search_space = OmegaConf.to_container(search_space, resolve=True)  # type: ignore[assignment]
+    assert isinstance(search_space, dict)
+
+    hyperparameters = search_space["hyperparameters"]
+    if isinstance(hyperparameters, dict):
+        hyperparameters = [{"name": name, **hp} for name, hp in hyperparameters.items()]
+
+    cs = ConfigurationSpace(name=search_space.get("name", None))
+    built = [_build_hyperparameter({**HYPERPARAMETER_DEFAULTS, **hp}) for hp in hyperparameters]
+    cs.add_hyperparameters(built)
+    hps = {hp.name: hp for hp in built}
+    conditions = search_space.get("conditions", None) or []
+    cs.add_conditions([_build_condition(condition, hps) for condition in conditions])
+    forbiddens = search_space.get("forbiddens", None) or []
+    cs.add_forbidden_clauses([_build_forbidden(forbidden, hps) for forbidden in forbiddens])
+    return cs
+
+
+def get_search_space_key(content: str) -> str:
+    """Hash the content of a search space together with the version of ConfigSpace
+
+    Parameters
+    ----------
+    content : str
+        Serialized search space
+
+    Returns
+    -------
+    str
+        Key of the configuration space in the cache
+    """
+    import ConfigSpace  # type: ignore[import]
+
+    return hashlib.sha256(f"{ConfigSpace.__version__}\n{content}".encode()).hexdigest()
+
+
+def load_or_build_config_space(
+    key: str, build: Callable[[], ConfigurationSpace], cache_dir: str | Path | None = None
+) -> ConfigurationSpace:
+    """Get a configuration space from the cache or build and cache it
+
+    Every call returns a new copy, so the caller can seed the configuration space.
+
+    Parameters
+    ----------
+    key : str
+        Content hash of the search space, see `get_search_space_key`
+    build : Callable[[], ConfigurationSpace]
+        Builds the configuration space on a cache miss
+    cache_dir : str | Path | None, optional
+        Directory of pickled configuration spaces shared by sweeps and workers, by default they are only cached in
+        memory
+
+    Returns
+    -------
+    ConfigurationSpace
+        Configuration space
+    """
+    data = _config_space_cache.get(key, None)
+    path = Path(cache_dir) / f"{key}.pkl" if cache_dir is not None else None
+    if data is None and path is not None and path.exists():
+        data = path.read_bytes()
+    if data is not None:
+        try:
+            cs = pickle.loads(data)
+            _config_space_cache[key] = data
+            return cs
+        except Exception:
+            # E.g. a truncated file, build the configuration space again
+            pass
+
+    data = pickle.dumps(build())
+    _config_space_cache[key] = data
+    if path is not None:
+        # Write atomically, other sweeps or workers may read the file at the same time
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return pickle.loads(data)
 
 
 def search_space_to_config_space(
-    search_space: str | DictConfig | ConfigurationSpace, seed: int | None = None
+    search_space: str | DictConfig | ConfigurationSpace, seed: int | None = None, cache_dir: str | Path | None = None
 ) -> ConfigurationSpace:
     """
     Convert hydra search space to SMAC's configuration space.
@@ -73,6 +229,10 @@ def search_space_to_config_space(
         If it already is a ConfigurationSpace, just optionally seed it.
     seed : Optional[int]
         Optional seed to seed configuration space.
+    cache_dir : str | Path | None
+        Directory in which configuration spaces are cached as pickles by a hash of the search space, so repeated
+        sweeps and workers do not build the same configuration space again. By default, configuration spaces are only
+        cached in memory.
 
 
     Example of a json-serialized ConfigurationSpace file.
@@ -106,33 +266,21 @@ def search_space_to_config_space(
     -------
     ConfigurationSpace
     """
+    from ConfigSpace import ConfigurationSpace  # type: ignore[import]
+    from ConfigSpace.read_and_write import json as csjson  # type: ignore[import]
+
     if type(search_space) == str:
         with open(search_space, "r") as f:
             jason_string = f.read()
-        cs = csjson.read(jason_string)
+        cs = load_or_build_config_space(
+            get_search_space_key(jason_string), lambda: csjson.read(jason_string), cache_dir=cache_dir
+        )
     elif type(search_space) == DictConfig:
-        # reorder hyperparameters as List[Dict]
-        hyperparameters = []
-        for name, cfg in search_space.hyperparameters.items():
-            cfg["name"] = name
-            if "default" not in cfg:
-                cfg["default"] = None
-            if "log" not in cfg:
-                cfg["log"] = False
-            # Quantization factor
-            if "q" not in cfg:
-                cfg["q"] = None
-            hyperparameters.append(cfg)
-        search_space.hyperparameters = hyperparameters
-
-        if "conditions" not in search_space:
-            search_space["conditions"] = []
-
-        if "forbiddens" not in search_space:
-            search_space["forbiddens"] = []
-
-        jason_string = json.dumps(search_space, cls=JSONCfgEncoder)
-        cs = csjson.read(jason_string)
+        container = OmegaConf.to_container(search_space, resolve=True)
+        content = json.dumps(container, sort_keys=True, default=str)
+        cs = load_or_build_config_space(
+            get_search_space_key(content), lambda: build_config_space(container), cache_dir=cache_dir
+        )
     elif type(search_space) == ConfigurationSpace:
         cs = search_space
     else:
@@ -4,7 +4,38 @@ from typing import Any
 
 from hydra.plugins.sweeper import Sweeper
 from hydra.types import HydraContext, TaskFunction
-from omegaconf import DictConfig
+from hydra.utils import get_class, get_method, instantiate
+from omegaconf import DictConfig, OmegaConf
+
+
+def create_cluster(cluster_cfg: DictConfig, n_workers: int = 1) -> Any:
+    """Create Dask cluster to schedule jobs on
+
+    Parameters
+    ----------
+    cluster_cfg : DictConfig
+        Configuration for the cluster
+    n_workers : int, optional
+        Number of workers, by default 1
+
+    Returns
+    -------
+    JobQueueCluster
+        Dask cluster
+    """
+    # Hydra imports this module for every run, the cluster libraries are only imported when a cluster is created
+    from distributed.deploy.local import LocalCluster
+
+    cluster = instantiate(cluster_cfg)
+    if not isinstance(cluster, LocalCluster):
+        cluster.scale(jobs=n_workers)
+    return cluster
+
+
+# The resolvers are needed when hydra instantiates the sweeper, i.e. before the backend is imported
+OmegaConf.register_new_resolver("get_class", get_class, replace=True)
+OmegaConf.register_new_resolver("get_method", get_method, replace=True)
+OmegaConf.register_new_resolver("create_cluster", create_cluster, replace=True)
 
 
 class SMACSweeper(Sweeper):
@@ -1,65 +1,554 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+from typing import TYPE_CHECKING, Any, Callable, Hashable
 
+import copy
+import dataclasses
+import functools
+import inspect
 import logging
+import pickle
+import re
+import threading
+import time
+import traceback
 import warnings
+from collections.abc import Mapping, Sequence
 from pathlib import Path
 
-from ConfigSpace import Configuration, ConfigurationSpace  # type: ignore[import]
-from dask_jobqueue import JobQueueCluster  # type: ignore[import]
-from distributed.deploy.local import LocalCluster
+import numpy as np
 from hydra.core.plugins import Plugins
-from hydra.core.utils import setup_globals
+from hydra.core.utils import JobReturn, JobStatus, setup_globals
 from hydra.plugins.sweeper import Sweeper
 from hydra.types import HydraContext, TaskFunction
-from hydra.utils import get_class, get_method, instantiate
+from hydra.utils import get_class
+from hydra_plugins.hydra_smac_sweeper._early_stopping import (
+    EARLY_STOPPED_KEY,
+    MedianStoppingRule,
+    ReportingTask,
+    run_reporting,
+)
+from hydra_plugins.hydra_smac_sweeper._isolation import IsolatedTask, ProcessIsolation
+from hydra_plugins.hydra_smac_sweeper._worker_setup import (
+    WorkerSetup,
+    WorkerTask,
+    accepts_worker_state,
+)
+from hydra_plugins.hydra_smac_sweeper.ask_tell_driver import AskTellDriver
+from hydra_plugins.hydra_smac_sweeper.checkpoints import (
+    CHECKPOINT_DIR_KEY,
+    PREVIOUS_BUDGET_KEY,
+    Checkpoints,
+)
 from hydra_plugins.hydra_smac_sweeper.search_space_encoding import (
     search_space_to_config_space,
 )
-from omegaconf import DictConfig, OmegaConf
-from rich import print as printr
-from smac.facade.abstract_facade import AbstractFacade
-from smac.runner import DaskParallelRunner
-from smac.scenario import Scenario
+from hydra_plugins.hydra_smac_sweeper.trial_cache import (
+    TrialCache,
+    get_target_identity,
+    get_trial_key,
+)
+from hydra_plugins.hydra_smac_sweeper.warm_start import (
+    find_runhistories,
+    load_optimization_state,
+    load_trials,
+)
+from omegaconf import DictConfig, ListConfig, Node, OmegaConf, ValueNode
+
+# SMAC, ConfigSpace and dask take seconds to import. Hydra imports the plugin for every run, they are only
+# imported once a sweep is set up.
+if TYPE_CHECKING:
+    from ConfigSpace import Configuration, ConfigurationSpace  # type: ignore[import]
+    from distributed import Client
+    from hydra_plugins.hydra_smac_sweeper._coalescing import InFlightTrials
+    from hydra_plugins.hydra_smac_sweeper._elastic_scaling import ElasticScaler
+    from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+    from hydra_plugins.hydra_smac_sweeper._metrics import SweepMetrics
+    from hydra_plugins.hydra_smac_sweeper._pareto import ParetoTracker
+    from hydra_plugins.hydra_smac_sweeper._process_pool_runner import ProcessPoolRunner
+    from hydra_plugins.hydra_smac_sweeper._profiling import TrialProfiler
+    from hydra_plugins.hydra_smac_sweeper._resources import TrialResources
+    from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+    from hydra_plugins.hydra_smac_sweeper._trial_log import TrialLog
+    from smac.callback import Callback
+    from smac.facade.abstract_facade import AbstractFacade
+    from smac.runhistory import TrialInfo, TrialValue
+    from smac.runner import AbstractRunner
+    from smac.scenario import Scenario
 
 log = logging.getLogger(__name__)
 
 
-def create_cluster(cluster_cfg: DictConfig, n_workers: int = 1) -> JobQueueCluster:
-    """Create Dask cluster to schedule jobs on
+def format_override_value(value: Any) -> str:
+    """Format a python value for the hydra override grammar
+
+    Strings are always quoted so that e.g. the categorical choice "1" is not parsed as an int.
+
+    Parameters
+    ----------
+    value : Any
+        Value to format
+
+    Returns
+    -------
+    str
+        Value as it can be used on the right hand side of an override
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        # Backslashes only need escaping in front of a quote
+        escaped = re.sub(r"(\\+)(?='|$)", r"\1\1", value).replace("'", "\\'")
+        return f"'{escaped}'"
+    return str(value)
+
+
+def trial_to_overrides(trial_info: TrialInfo, budget_variable: str | None = None) -> list[str]:
+    """Translate a SMAC trial into hydra overrides
+
+    Mirrors the translation done by `TargetFunction`: hyperparameters must exist in the config,
+    seed, budget and instance are added if missing.
+
+    Parameters
+    ----------
+    trial_info : TrialInfo
+        Trial as returned by `smac.ask()`
+    budget_variable : str | None, optional
+        Config key which receives the budget, by default None
+
+    Returns
+    -------
+    list[str]
+        Overrides for a single job
+    """
+    overrides = [f"{k}={format_override_value(v)}" for k, v in dict(trial_info.config).items()]
+    overrides.append(f"++seed={format_override_value(trial_info.seed)}")
+    if budget_variable is not None:
+        overrides.append(f"++{budget_variable}={format_override_value(trial_info.budget)}")
+    overrides.append(f"++instance={format_override_value(trial_info.instance)}")
+    return overrides
+
+
+def get_objectives(scenario: Scenario) -> list[str]:
+    """Names of the objectives of a scenario, SMAC's default is a single objective called "cost"."""
+    if isinstance(scenario.objectives, str):
+        return [scenario.objectives]
+    return list(scenario.objectives)
+
+
+def normalize_result(result: Any, objectives: list[str]) -> Any:
+    """Map the return value of a task function to the objectives of SMAC
+
+    Parameters
+    ----------
+    result : Any
+        Return value of the task function: a cost, a dict of objective name to cost, a tuple or list of costs in the
+        order of several objectives or a tuple of one of these and a dict of additional info
+    objectives : list[str]
+        Names of the objectives, see `get_objectives`
+
+    Returns
+    -------
+    Any
+        A float for a single objective, a list of floats in the order of the objectives for several objectives,
+        together with the additional info if the task function returned one. Other values are returned unchanged.
+
+    Raises
+    ------
+    ValueError
+        If an objective is missing or the number of costs does not match the number of objectives.
+    """
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], Mapping):
+        return normalize_result(result[0], objectives), dict(result[1])
+    if isinstance(result, Mapping):
+        missing = [name for name in objectives if name not in result]
+        if len(missing) > 0:
+            raise ValueError(f"The objectives {missing} are missing in the returned costs {dict(result)}.")
+        costs = [float(result[name]) for name in objectives]
+    elif isinstance(result, (Sequence, np.ndarray)) and not isinstance(result, str) and len(objectives) > 1:
+        # With a single objective, a tuple is the cost and additional info as SMAC expects it
+        costs = [float(cost) for cost in result]
+        if len(costs) != len(objectives):
+            raise ValueError(f"The task function returned {len(costs)} costs for the objectives {objectives}.")
+    else:
+        return result
+    return costs[0] if len(costs) == 1 else costs
+
+
+def job_return_to_trial_value(
+    job_return: JobReturn,
+    crash_cost: float | list[float],
+    starttime: float,
+    endtime: float,
+    objectives: list[str] | None = None,
+) -> TrialValue:
+    """Translate the result of a launched job into a SMAC trial value
+
+    Parameters
+    ----------
+    job_return : JobReturn
+        Result of a single job from `launcher.launch`
+    crash_cost : float | list[float]
+        Cost reported for failed jobs
+    starttime : float
+        Start of the launch
+    endtime : float
+        End of the launch
+    objectives : list[str] | None, optional
+        Names of the objectives, the return value is mapped to them with `normalize_result`. By default "cost".
+
+    Returns
+    -------
+    TrialValue
+        Trial value to tell SMAC. Failed jobs and non-finite or non-numeric costs are crashed trials with `crash_cost`.
+    """
+    from smac.runhistory import StatusType, TrialValue
+
+    additional_info: dict[str, Any] = {}
+    status = StatusType.SUCCESS
+    try:
+        cost = job_return.return_value
+    except Exception as e:
+        cost = crash_cost
+        status = StatusType.CRASHED
+        additional_info = {
+            "traceback": "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+            "error": repr(e),
+        }
+    if status == StatusType.SUCCESS and job_return.status != JobStatus.COMPLETED:
+        cost = crash_cost
+        status = StatusType.CRASHED
+    if status == StatusType.SUCCESS:
+        try:
+            cost = normalize_result(cost, objectives if objectives is not None else ["cost"])
+        except ValueError as e:
+            cost = crash_cost
+            status = StatusType.CRASHED
+            additional_info = {"traceback": traceback.format_exc(), "error": repr(e)}
+
+    if isinstance(cost, tuple):
+        cost, additional_info = cost
+    try:
+        cost = np.asarray(cost, dtype=float)
+    except (TypeError, ValueError):
+        additional_info = {"error": f"The task function returned a non-numeric cost: {cost!r}"}
+        cost = None
+    if cost is None or not np.all(np.isfinite(cost)):
+        cost = crash_cost
+        status = StatusType.CRASHED
+    cost = np.asarray(cost).squeeze().tolist()
+
+    return TrialValue(
+        cost=cost,
+        time=endtime - starttime,
+        status=status,
+        starttime=starttime,
+        endtime=endtime,
+        additional_info=additional_info,
+    )
+
+
+def batch_result_to_trial_values(
+    result: Any,
+    n_trials: int,
+    objectives: list[str],
+    crash_cost: float | list[float],
+    starttime: float,
+    endtime: float,
+) -> list[TrialValue]:
+    """Translate the result of a batch evaluation into SMAC trial values
 
     Parameters
     ----------
-    cluster_cfg : DictConfig
-        Configuration for the cluster
-    n_workers : int, optional
-        Number of workers, by default 1
+    result : Any
+        Return value of the task function: a vector of costs, a dict of objective name to vector of costs, an array
+        of shape (n_trials, n_objectives) or a tuple of one of these and a dict of additional info
+    n_trials : int
+        Number of trials in the batch
+    objectives : list[str]
+        Names of the objectives, see `get_objectives`
+    crash_cost : float | list[float]
+        Cost reported for trials with a non-finite cost
+    starttime : float
+        Start of the batch
+    endtime : float
+        End of the batch
 
     Returns
     -------
-    JobQueueCluster
-        Dask cluster
+    list[TrialValue]
+        Trial values in the order of the batch. The runtime of the batch is split evenly between the trials.
+
+    Raises
+    ------
+    ValueError
+        If the number of costs does not match the number of trials and objectives.
     """
-    cluster = instantiate(cluster_cfg)
-    if not isinstance(cluster, LocalCluster):
-        cluster.scale(jobs=n_workers)
-    return cluster
+    from smac.runhistory import StatusType, TrialValue
 
+    additional_info: dict[str, Any] = {}
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], Mapping):
+        result, additional_info = result[0], dict(result[1])
+    if isinstance(result, Mapping):
+        missing = [name for name in objectives if name not in result]
+        if len(missing) > 0:
+            raise ValueError(f"The objectives {missing} are missing in the returned costs.")
+        costs = np.stack([np.asarray(result[name], dtype=float) for name in objectives], axis=-1)
+    else:
+        costs = np.asarray(result, dtype=float)
+    costs = costs.reshape(n_trials, -1) if costs.size == n_trials * len(objectives) else costs
+    if costs.shape != (n_trials, len(objectives)):
+        raise ValueError(
+            f"The task function returned costs of shape {costs.shape} for {n_trials} trials and the objectives "
+            f"{objectives}."
+        )
 
-OmegaConf.register_new_resolver("get_class", get_class, replace=True)
-OmegaConf.register_new_resolver("get_method", get_method, replace=True)
-OmegaConf.register_new_resolver("create_cluster", create_cluster, replace=True)
+    values = []
+    for cost in costs:
+        status = StatusType.SUCCESS if np.all(np.isfinite(cost)) else StatusType.CRASHED
+        values.append(
+            TrialValue(
+                cost=cost.squeeze().tolist() if status == StatusType.SUCCESS else crash_cost,
+                time=(endtime - starttime) / n_trials,
+                status=status,
+                starttime=starttime,
+                endtime=endtime,
+                additional_info=dict(additional_info),
+            )
+        )
+    return values
+
+
+def get_intensifier_with_retries(smac_class: type[AbstractFacade], scenario: Scenario, retries: int) -> Any:
+    """Build the intensifier of a facade which retries at least `retries` times to get a new configuration
+
+    Parameters
+    ----------
+    smac_class : type[AbstractFacade]
+        SMAC facade
+    scenario : Scenario
+        Scenario of the sweep
+    retries : int
+        Minimal number of retries of SMAC's `Intensifier`
+
+    Returns
+    -------
+    AbstractIntensifier
+        Intensifier of the facade. Facades which do not use SMAC's `Intensifier`, e.g. with successive halving, get
+        their default intensifier.
+    """
+    from smac.intensifier import Intensifier
+
+    retries = max(retries, inspect.signature(Intensifier).parameters["retries"].default)
+    parameters = inspect.signature(smac_class.get_intensifier).parameters
+    if "retries" in parameters:
+        return smac_class.get_intensifier(scenario, retries=retries)
+    intensifier = smac_class.get_intensifier(scenario)
+    if type(intensifier) is not Intensifier:
+        return intensifier
+    # The facade does not pass the retries through, build its intensifier with the same arguments
+    kwargs = {name: parameters[name].default for name in ["max_config_calls", "max_incumbents"] if name in parameters}
+    return Intensifier(scenario, retries=retries, **kwargs)
+
+
+def _select_node(cfg: DictConfig, key: str) -> Node | None:
+    """Get the node of a dotted key, None if it does not exist."""
+    parent_key, _, leaf = key.rpartition(".")
+    parent = OmegaConf.select(cfg, parent_key) if parent_key else cfg
+    if isinstance(parent, DictConfig):
+        return parent._get_node(leaf, validate_access=False)
+    if isinstance(parent, ListConfig) and leaf.isdigit() and int(leaf) < len(parent):
+        return parent._get_node(int(leaf))
+    return None
+
+
+def build_override_plan(
+    config: DictConfig, hyperparameter_names: list[str], checkpointing: bool = False
+) -> tuple[DictConfig, dict[str, ValueNode | None]]:
+    """Copy the config once and collect the nodes SMAC overrides in every trial
+
+    Hyperparameters must exist in the config (unless it is not in struct mode), seed, budget, instance,
+    the job number and the checkpoint keys are added if missing, so that the copy is a template for all trials.
+
+    Parameters
+    ----------
+    config : DictConfig
+        Hydra config
+    hyperparameter_names : list[str]
+        Names of the hyperparameters, i.e. dotted paths into the config
+    checkpointing : bool, optional
+        Whether the checkpoint directory and the previous budget are overridden, by default False
+
+    Returns
+    -------
+    tuple[DictConfig, dict[str, ValueNode | None]]
+        Private copy of the config and its nodes by key. A node is None if the key does not point to a
+        value, such keys are updated with `OmegaConf.update`.
+    """
+    cfg = copy.deepcopy(config)
+    keys = {k: False for k in hyperparameter_names}
+    keys["seed"] = True
+    if "budget_variable" in cfg:
+        keys[cfg.budget_variable] = True
+    keys["instance"] = True
+    keys["hydra.job.num"] = True
+    if checkpointing:
+        keys[CHECKPOINT_DIR_KEY] = True
+        keys[PREVIOUS_BUDGET_KEY] = True
+
+    nodes: dict[str, ValueNode | None] = {}
+    for key, force_add in keys.items():
+        node = _select_node(cfg, key)
+        if node is None:
+            OmegaConf.update(cfg, key, None, force_add=force_add)
+            node = _select_node(cfg, key)
+        nodes[key] = node if isinstance(node, ValueNode) else None
+    return cfg, nodes
 
 
 class TargetFunction(object):
-    def __init__(self, task_function: Callable, config: DictConfig) -> None:
+    def __init__(
+        self,
+        task_function: Callable,
+        config: DictConfig,
+        cache: TrialCache | None = None,
+        profile: bool = False,
+        worker_setup: WorkerSetup | None = None,
+        checkpoints: Checkpoints | None = None,
+        early_stopping: MedianStoppingRule | None = None,
+        isolation: ProcessIsolation | None = None,
+        objectives: list[str] | None = None,
+    ) -> None:
         self.task_function = task_function
         self.config = config
+        self.cache = cache
+        self.profile = profile
+        self.worker_setup = worker_setup
+        self.checkpoints = checkpoints
+        self.early_stopping = early_stopping
+        self.isolation = isolation
+        self.objectives = objectives if objectives is not None else ["cost"]
+        if cache is not None or checkpoints is not None:
+            self.target_identity = get_target_identity(task_function, config)
+        else:
+            self.target_identity = ""
         self.job_num: int = 0
+        self._job_num_lock = threading.Lock()
+        # Pickled template of the trial configs and whether each overridden key points to a value node
+        self._plan: tuple[bytes, dict[str, bool]] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_job_num_lock"]
+        state["_plan"] = None
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._job_num_lock = threading.Lock()
+
+    def get_plan(self, hyperparameter_names: list[str]) -> tuple[bytes, dict[str, bool]]:
+        """Build the template of the trial configs once, see `build_override_plan`."""
+        with self._job_num_lock:
+            if self._plan is None:
+                cfg, nodes = build_override_plan(
+                    self.config, hyperparameter_names, checkpointing=self.checkpoints is not None
+                )
+                self._plan = pickle.dumps(cfg), {key: node is not None for key, node in nodes.items()}
+            return self._plan
+
+    def materialize(
+        self,
+        config: Configuration,
+        seed: int | None = None,
+        budget: float | None = None,
+        instance: str | None = None,
+        checkpoint_dir: Path | None = None,
+    ) -> DictConfig:
+        """Translate SMAC's args into a hydra cfg
+
+        Every trial gets its own config, unpickled from a template which already contains all overridden keys. This
+        is several times faster than a deep copy of the hydra config and no keys have to be added per trial. Inactive
+        hyperparameters keep the value of the original config.
+
+        Parameters
+        ----------
+        config : Configuration
+            Hyperparameter configuration
+        seed : int | None, optional
+            Seed, by default None
+        budget : float | None, optional
+            Budget for multi-fidelity, by default None
+        instance : str | None, optional
+            Instance for algorithm configuration, by default None
+        checkpoint_dir : Path | None, optional
+            Checkpoint directory of the trial if `checkpoints` are used, by default None
+
+        Returns
+        -------
+        DictConfig
+            Hydra config of the trial, the task function may keep it
+        """
+        template, value_keys = self.get_plan(config.configuration_space.get_hyperparameter_names())
+        cfg = pickle.loads(template)
+        values = dict(config)
+        values["seed"] = seed
+        if "budget_variable" in cfg:
+            values[cfg.budget_variable] = budget
+        values["instance"] = instance
+        if self.checkpoints is not None and checkpoint_dir is not None:
+            values[CHECKPOINT_DIR_KEY] = str(checkpoint_dir)
+            values[PREVIOUS_BUDGET_KEY] = self.checkpoints.get_previous_budget(checkpoint_dir, budget)
+        # We do not have a job number as in classic hydra multirun
+        # Simulate this based on a simple counter
+        with self._job_num_lock:
+            values["hydra.job.num"] = self.job_num
+            self.job_num += 1
+
+        for key, value in values.items():
+            node = _select_node(cfg, key) if value_keys.get(key, False) else None
+            if node is not None:
+                node._set_value(value)
+            else:
+                OmegaConf.update(cfg, key, value)
+        return cfg
+
+    def materialize_batch(self, trial_infos: list[TrialInfo]) -> DictConfig:
+        """Translate a batch of SMAC's trials into a single hydra cfg
+
+        Parameters
+        ----------
+        trial_infos : list[TrialInfo]
+            Trials of the batch
+
+        Returns
+        -------
+        DictConfig
+            Hydra config whose hyperparameters, seed, budget and instance are lists with one entry per trial.
+            Inactive hyperparameters have the value of the original config.
+        """
+        cfg = copy.deepcopy(self.config)
+        values: dict[str, list[Any]] = {}
+        for info in trial_infos:
+            config = info.config
+            for name in config.configuration_space.get_hyperparameter_names():
+                default = OmegaConf.select(self.config, name, default=None)
+                values.setdefault(name, []).append(config.get(name, default))
+        values["seed"] = [info.seed for info in trial_infos]
+        if "budget_variable" in cfg:
+            values[cfg.budget_variable] = [info.budget for info in trial_infos]
+        values["instance"] = [info.instance for info in trial_infos]
+        for key, value in values.items():
+            OmegaConf.update(cfg, key, value, force_add=True)
+        with self._job_num_lock:
+            OmegaConf.update(cfg, "hydra.job.num", self.job_num, force_add=True)
+            self.job_num += len(trial_infos)
+        return cfg
 
     def __call__(
-        self, config: Configuration, seed: int | None = None, budget: int | None = None, instance: str | None = None
+        self, config: Configuration, seed: int | None = None, budget: float | None = None, instance: str | None = None
     ) -> Any:
         """Call target function
 
@@ -71,7 +560,7 @@ class TargetFunction(object):
             Hyperparameter configuration
         seed : int | None, optional
             Seed, by default None
-        budget : int | None, optional
+        budget : float | None, optional
             Budget for multi-fidelity, by default None
         instance : str | None, optional
             Instance for algorithm configuration, by default None
@@ -79,28 +568,71 @@ class TargetFunction(object):
         Returns
         -------
         Any
-            Output of the target function
+            Output of the target function mapped to the `objectives`, see `normalize_result`. With `profile`, the
+            measurements of the trial are added to the additional info. If the trial was stopped early, the last
+            reported cost.
+
+        Raises
+        ------
+        TrialTimeout, TrialMemoryOut
+            If the trial exceeded the resource limits of `isolation`. SMAC records it as crashed.
+        ValueError
+            If the output does not match the objectives. SMAC records it as crashed.
         """
         # If we have hydra resolvers in our target function
         # we need to reregister them
         setup_globals()
+        if self.profile:
+            # The trial runs in SMAC's runner, importing the profiler is free
+            from hydra_plugins.hydra_smac_sweeper._profiling import (
+                attach_profile,
+                get_worker_id,
+            )
 
-        # Translate SMAC's function signature back to hydra DictConfig
-        cfg = self.config  # hydra config
-        for k, v in dict(config).items():
-            OmegaConf.update(cfg, k, v)
-        OmegaConf.update(cfg, "seed", seed, force_add=True)
-        if "budget_variable" in cfg:
-            OmegaConf.update(cfg, cfg.budget_variable, budget, force_add=True)
-        OmegaConf.update(cfg, "instance", instance, force_add=True)
+        if self.cache is not None:
+            key = get_trial_key(
+                config, seed=seed, budget=budget, instance=instance, target_identity=self.target_identity
+            )
+            hit, result = self.cache.get(key)
+            if hit:
+                if self.profile:
+                    return attach_profile(result, {"worker": get_worker_id(), "cache_hit": True})
+                return result
 
-        # We do not have a job number as in classic hydra multirun
-        # Simulate this based on a simple counter
-        if cfg.get("hydra.job.num") is None:
-            OmegaConf.update(cfg, "hydra.job.num", self.job_num, force_add=True)
-            self.job_num += 1
+        materialize_start = time.time()
+        checkpoint_dir = None
+        if self.checkpoints is not None:
+            checkpoint_dir = self.checkpoints.get_directory(
+                config, seed=seed, instance=instance, target_identity=self.target_identity
+            )
+        cfg = self.materialize(config, seed=seed, budget=budget, instance=instance, checkpoint_dir=checkpoint_dir)
+        task_start = time.time()
+        # The worker state is loaded in the process of the trial, it is not sent to an isolated process
+        task_function = self.task_function
+        if self.worker_setup is not None:
+            task_function = WorkerTask(task_function, self.worker_setup)
+        if self.early_stopping is not None:
+            task = functools.partial(run_reporting, self.early_stopping, task_function, cfg=cfg)
+        else:
+            task = functools.partial(task_function, cfg=cfg)
+        result = self.isolation.run(task) if self.isolation is not None else task()
+        result = normalize_result(result, self.objectives)
+        task_end = time.time()
 
-        return self.task_function(cfg=cfg)  # type: ignore[misc]
+        if self.checkpoints is not None and checkpoint_dir is not None:
+            # A trial which was stopped early saved its checkpoint at the step it reached
+            additional_info = result[1] if isinstance(result, tuple) else {}
+            self.checkpoints.finished(checkpoint_dir, additional_info.get(EARLY_STOPPED_KEY, budget))
+        if self.cache is not None:
+            self.cache.put(key, result)
+        if self.profile:
+            profile = {
+                "worker": get_worker_id(),
+                "materialize_time": task_start - materialize_start,
+                "task_time": task_end - task_start,
+            }
+            return attach_profile(result, profile)
+        return result
 
 
 class SMACSweeperBackend(Sweeper):
@@ -110,6 +642,38 @@ class SMACSweeperBackend(Sweeper):
         scenario: DictConfig,
         smac_class: str | None = None,
         smac_kwargs: DictConfig | None = None,
+        use_launcher: bool = False,
+        batch_size: int | None = None,
+        async_ask_tell: bool = False,
+        max_in_flight: int | None = None,
+        trial_cache: bool = False,
+        trial_cache_kwargs: DictConfig | None = None,
+        resume: bool = False,
+        warm_start_from: str | ListConfig | list[str] | None = None,
+        elastic_scaling: bool = False,
+        elastic_scaling_kwargs: DictConfig | None = None,
+        profiling: bool = False,
+        profiling_kwargs: DictConfig | None = None,
+        verbose: bool = False,
+        search_space_cache_dir: str | None = None,
+        worker_setup: str | None = None,
+        worker_setup_kwargs: DictConfig | None = None,
+        checkpointing: bool = False,
+        checkpointing_kwargs: DictConfig | None = None,
+        early_stopping: bool = False,
+        early_stopping_kwargs: DictConfig | None = None,
+        process_pool: bool = False,
+        process_pool_kwargs: DictConfig | None = None,
+        trial_log: bool = False,
+        trial_log_kwargs: DictConfig | None = None,
+        batch_evaluation: bool = False,
+        trial_resources: DictConfig | None = None,
+        clusters: ListConfig | list[DictConfig] | None = None,
+        retries: int = 0,
+        retry_backoff: float = 1.0,
+        coalesce_trials: bool = True,
+        metrics: bool = False,
+        metrics_kwargs: DictConfig | None = None,
     ) -> None:
         """
         Backend for the SMAC sweeper. Instantiate and launch SMAC's optimization.
@@ -125,6 +689,99 @@ class SMACSweeperBackend(Sweeper):
             Optional string defining the smac class, e.g. "smac.facade.smac_ac_facade.SMAC4AC".
         smac_kwargs: DictConfig | None
             Kwargs for the smac class from the yaml config file.
+        use_launcher: bool
+            If True, trials are not run by SMAC's runner but sent in batches to the configured hydra launcher.
+        batch_size: int | None
+            Number of trials asked from SMAC per launch. Defaults to `scenario.n_workers`.
+            With `async_ask_tell`, number of trials asked ahead of time. Defaults to 1.
+            With `batch_evaluation`, number of trials evaluated in one call of the task function. Defaults to 16.
+        async_ask_tell: bool
+            If True, the sweeper drives SMAC's ask/tell loop itself and keeps up to `max_in_flight` trials running
+            on the dask client while the next trials are asked in the background.
+        max_in_flight: int | None
+            Maximum number of concurrently running trials with `async_ask_tell`. Defaults to `scenario.n_workers`.
+        trial_cache: bool
+            If True, results are cached on disk and trials which were already evaluated (e.g. in a previous run of the
+            sweep) are not run again. With `use_launcher`, cached trials are not launched.
+        trial_cache_kwargs: DictConfig | None
+            Kwargs for `TrialCache`. By default the database is `hydra.sweep.dir/trial_cache.sqlite`.
+        resume: bool
+            If True, the most recent runhistory in `hydra.sweep.dir/smac3_output` is loaded and the optimization
+            continues until the budget of the scenario is exhausted.
+        warm_start_from: str | ListConfig | list[str] | None
+            Runhistories of other sweeps which are told to SMAC as prior observations before the optimization starts.
+            Either `runhistory.json` files or directories which are searched for them. Configurations which are not
+            valid in the search space are skipped. Imported trials do not count towards `scenario.n_trials`.
+        elastic_scaling: bool
+            If True, the cluster of the dask client is scaled up and down with the number of trials SMAC can run at
+            the same time instead of keeping `scenario.n_workers` jobs for the whole sweep.
+        elastic_scaling_kwargs: DictConfig | None
+            Kwargs for `ElasticScaler`. By default between 1 and `scenario.n_workers` jobs.
+        profiling: bool
+            If True, the life cycle of every trial is recorded and a summary of the overhead is logged at the end.
+        profiling_kwargs: DictConfig | None
+            Kwargs for `TrialProfiler`. By default the trials are written to `hydra.sweep.dir/trial_profile.jsonl`.
+        verbose: bool
+            If True, the config, the launcher and the arguments of the SMAC facade are pretty printed with rich.
+        search_space_cache_dir: str | None
+            Directory in which the configuration space is cached by a hash of the search space, so that repeated
+            sweeps over large search spaces do not build it again. By default it is only cached in memory.
+        worker_setup: str | None
+            Import path of a function which gets the hydra config and returns a state, e.g. a loaded dataset. It runs
+            once per dask worker or launcher process and its result is passed to the task function as `worker_state`.
+            With resource limits of the trials, it runs in the process of every trial.
+        worker_setup_kwargs: DictConfig | None
+            Kwargs for `WorkerSetup`, e.g. `min_available_memory` to release the state when memory runs low.
+        checkpointing: bool
+            If True, every configuration gets a checkpoint directory which is the same at all budgets. Its path and
+            the budget of the last finished trial in it are set as `checkpoint_dir` and `previous_budget` in the
+            config, so that the task function can continue training instead of starting from scratch.
+        checkpointing_kwargs: DictConfig | None
+            Kwargs for `Checkpoints`. By default the directories are created in `hydra.sweep.dir/checkpoints`.
+        early_stopping: bool
+            If True, trials which report intermediate costs with `early_stopping.report` are stopped when they are
+            worse than the median of the finished trials at the same step. SMAC is told the last reported cost at
+            the budget of the trial, not at the step it was stopped at.
+        early_stopping_kwargs: DictConfig | None
+            Kwargs for `MedianStoppingRule`. By default the learning curves are stored in
+            `hydra.sweep.dir/learning_curves.sqlite`.
+        process_pool: bool
+            If True, the trials run in parallel in a pool of `scenario.n_workers` local processes instead of on a dask
+            cluster. With `async_ask_tell`, the pool has `max_in_flight` processes.
+        process_pool_kwargs: DictConfig | None
+            Kwargs for `ProcessPoolRunner`, e.g. the `start_method` of the processes.
+        trial_log: bool
+            If True, every finished trial is appended to a jsonl log as soon as it is told.
+        trial_log_kwargs: DictConfig | None
+            Kwargs for `TrialLog`, e.g. how often the log is synced to disk. By default the trials are written to
+            `hydra.sweep.dir/trials.jsonl`.
+        batch_evaluation: bool
+            If True, the task function gets `batch_size` trials at once in a single config whose hyperparameters are
+            lists and returns a vector of costs. For cheap vectorised targets, e.g. benchmark functions.
+        trial_resources: DictConfig | None
+            Dask worker resources which a trial needs, by resource name. Either an amount, an expression over the
+            hyperparameters and the `budget` of the trial, or a table from budgets to amounts, see `TrialResources`.
+            The workers of the dask client must provide the resources.
+        clusters: ListConfig | list[DictConfig] | None
+            Several dask clusters to spread the trials across instead of `smac_kwargs.dask_client`. Every entry has a
+            `dask_client` and optionally the `max_in_flight` trials of the cluster and a `name`, see `FederatedRunner`.
+            A trial runs on the least loaded cluster, losing a cluster only crashes its trials in flight.
+        retries: int
+            Maximum number of times a trial is run again when it is lost to an infrastructure error, e.g. a killed
+            worker, a closed connection or a dead process of the process pool. Exceptions of the task function are not
+            retried, but a task function which kills its process, e.g. with `os._exit`, looks like a lost process.
+            By default 0, lost trials crash.
+        retry_backoff: float
+            Seconds before the first retry of a trial, doubled with every further retry.
+        coalesce_trials: bool
+            If True and the scenario is deterministic, a trial with the same configuration, instance, seed and budget
+            as a running trial is not run again, but gets the result of the running trial. Both are told to SMAC.
+        metrics: bool
+            If True, the progress of the sweep is exposed as Prometheus metrics, served over HTTP and written to a
+            text file.
+        metrics_kwargs: DictConfig | None
+            Kwargs for `SweepMetrics`, e.g. the `port` of the HTTP endpoint. By default any free port is used and the
+            metrics are written to `hydra.sweep.dir/metrics.prom`.
 
         Returns
         -------
@@ -137,10 +794,93 @@ class SMACSweeperBackend(Sweeper):
         self.smac_kwargs = smac_kwargs
         self.scenario = scenario
         self.seed = self.scenario.get("seed", None)
+        self.use_launcher = use_launcher
+        self.batch_size = batch_size
+        self.async_ask_tell = async_ask_tell
+        self.max_in_flight = max_in_flight
+        self.dask_client: Client | None = None
+        self.trial_cache = trial_cache
+        self.trial_cache_kwargs = trial_cache_kwargs
+        self.cache: TrialCache | None = None
+        self.resume = resume
+        if isinstance(warm_start_from, str):
+            warm_start_from = [warm_start_from]
+        self.warm_start_from = list(warm_start_from) if warm_start_from is not None else []
+        self.elastic_scaling = elastic_scaling
+        self.elastic_scaling_kwargs = elastic_scaling_kwargs
+        self.scaler: ElasticScaler | None = None
+        self.profiling = profiling
+        self.profiling_kwargs = profiling_kwargs
+        self.profiler: TrialProfiler | None = None
+        self.verbose = verbose
+        self.search_space_cache_dir = search_space_cache_dir
+        self.worker_setup = worker_setup
+        self.worker_setup_kwargs = worker_setup_kwargs
+        self.setup_state: WorkerSetup | None = None
+        self.checkpointing = checkpointing
+        self.checkpointing_kwargs = checkpointing_kwargs
+        self.checkpoints: Checkpoints | None = None
+        self.early_stopping = early_stopping
+        self.early_stopping_kwargs = early_stopping_kwargs
+        self.stopping_rule: MedianStoppingRule | None = None
+        self.process_pool = process_pool
+        self.process_pool_kwargs = process_pool_kwargs
+        self.trial_log = trial_log
+        self.trial_log_kwargs = trial_log_kwargs
+        self.trial_logger: TrialLog | None = None
+        self.pareto: ParetoTracker | None = None
+        self.batch_evaluation = batch_evaluation
+        self.target_function: TargetFunction | None = None
+        self.trial_resources = trial_resources
+        self.resources: TrialResources | None = None
+        self.clusters = list(clusters) if clusters is not None else []
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_policy: RetryPolicy | None = None
+        self.coalesce_trials = coalesce_trials
+        self.in_flight: InFlightTrials | None = None
+        self.metrics = metrics
+        self.metrics_kwargs = metrics_kwargs
+        self.sweep_metrics: SweepMetrics | None = None
+
+        if self.use_launcher and self.async_ask_tell:
+            raise ValueError("`use_launcher` and `async_ask_tell` can not be used together.")
+        if self.use_launcher and self.elastic_scaling:
+            raise ValueError("`elastic_scaling` scales the dask cluster, which is not used with `use_launcher`.")
+        if self.process_pool and (self.use_launcher or self.elastic_scaling):
+            raise ValueError("`process_pool` can not be used with `use_launcher` or `elastic_scaling`.")
+        if self.batch_evaluation:
+            # The batch runs in the sweeper process, features which wrap a single trial do not apply
+            per_trial = ["use_launcher", "async_ask_tell", "process_pool", "elastic_scaling", "trial_cache"]
+            per_trial += ["checkpointing", "early_stopping"]
+            incompatible = [name for name in per_trial if getattr(self, name)]
+            if self.worker_setup is not None:
+                incompatible.append("worker_setup")
+            if len(incompatible) > 0:
+                raise ValueError(f"`batch_evaluation` can not be used with {incompatible}.")
+        if self.clusters and (self.use_launcher or self.process_pool or self.batch_evaluation or self.elastic_scaling):
+            raise ValueError(
+                "`clusters` can not be used with `use_launcher`, `process_pool`, `batch_evaluation` or "
+                "`elastic_scaling`."
+            )
+        if self.trial_resources and (self.use_launcher or self.process_pool or self.batch_evaluation):
+            raise ValueError(
+                "`trial_resources` are resources of dask workers, which are not used with `use_launcher`, "
+                "`process_pool` or `batch_evaluation`."
+            )
 
         self.task_function: TaskFunction | None = None
         self.sweep_dir: str | None = None
 
+    def print_verbose(self, *objects: Any) -> None:
+        """Pretty print with rich if `verbose`, otherwise log on debug level."""
+        if self.verbose:
+            from rich import print as printr
+
+            printr(*objects)
+        else:
+            log.debug(" ".join(str(obj) for obj in objects))
+
     def setup(
         self,
         *,
@@ -164,12 +904,254 @@ class SMACSweeperBackend(Sweeper):
         """
         self.config = config
         self.hydra_context = hydra_context
+        self.task_function = task_function
+        launched_function: TaskFunction = task_function
+        if self.worker_setup is not None:
+            launched_function = WorkerTask(launched_function, self.get_worker_setup())
+        if self.early_stopping:
+            launched_function = ReportingTask(launched_function, self.get_stopping_rule())
+        isolation = self.get_isolation()
+        if isolation is not None:
+            # Reporting and the worker setup run in the process of the trial
+            launched_function = IsolatedTask(launched_function, isolation)
         self.launcher = Plugins.instance().instantiate_launcher(
-            config=config, hydra_context=hydra_context, task_function=task_function
+            config=config, hydra_context=hydra_context, task_function=launched_function
         )
-        self.task_function = task_function
         self.sweep_dir = config.hydra.sweep.dir
 
+    def get_feature_kwargs(self, kwargs: DictConfig | None, filename: str | None = None) -> dict[str, Any]:
+        """
+        Keyword arguments of an optional feature of the sweeper, e.g. `profiling_kwargs`.
+
+        Parameters
+        ----------
+        kwargs: DictConfig | None
+            Keyword arguments given by the user
+        filename: str | None
+            File or directory of the feature in the sweep directory, the default of its `path` argument
+
+        Returns
+        -------
+        dict[str, Any]
+            Resolved keyword arguments
+
+        """
+        feature_kwargs: dict[str, Any] = {}
+        if kwargs is not None:
+            container = OmegaConf.to_container(kwargs, resolve=True)
+            assert isinstance(container, dict)
+            feature_kwargs = {str(key): value for key, value in container.items()}
+        if filename is not None:
+            assert self.config is not None
+            feature_kwargs.setdefault("path", Path(self.config.hydra.sweep.dir) / filename)
+        return feature_kwargs
+
+    def get_worker_setup(self) -> WorkerSetup | None:
+        """
+        Create the worker setup once, if `worker_setup` is given.
+
+        Returns
+        -------
+        WorkerSetup | None
+            Setup of the worker state, shared by the launcher and SMAC's runner.
+
+        """
+        if self.worker_setup is None or self.setup_state is not None:
+            return self.setup_state
+        assert self.task_function is not None
+        if not accepts_worker_state(self.task_function):
+            raise ValueError("The task function needs a `worker_state` argument to be used with `worker_setup`.")
+        assert self.config is not None
+        self.setup_state = WorkerSetup(
+            self.worker_setup, self.config, **self.get_feature_kwargs(self.worker_setup_kwargs)
+        )
+        return self.setup_state
+
+    def get_isolation(self) -> ProcessIsolation | None:
+        """
+        Create the process isolation of the trials, if the scenario limits their resources.
+
+        Returns
+        -------
+        ProcessIsolation | None
+            Limits of the trials, None if there are none.
+
+        """
+        walltime_limit = self.scenario.get("trial_walltime_limit", None)
+        memory_limit = self.scenario.get("trial_memory_limit", None)
+        if walltime_limit is None and memory_limit is None:
+            return None
+        return ProcessIsolation(walltime_limit=walltime_limit, memory_limit=memory_limit)
+
+    def get_stopping_rule(self) -> MedianStoppingRule | None:
+        """
+        Create the early stopping rule once, if `early_stopping` is enabled.
+
+        Returns
+        -------
+        MedianStoppingRule | None
+            Rule deciding which trials are stopped, shared by the launcher and SMAC's runner.
+
+        """
+        if not self.early_stopping or self.stopping_rule is not None:
+            return self.stopping_rule
+        self.stopping_rule = MedianStoppingRule(
+            **self.get_feature_kwargs(self.early_stopping_kwargs, "learning_curves.sqlite")
+        )
+        return self.stopping_rule
+
+    def create_process_pool(self, runner: AbstractRunner, n_workers: int) -> ProcessPoolRunner:
+        """
+        Start a pool of local processes running the trials.
+
+        Parameters
+        ----------
+        runner: AbstractRunner
+            Runner executing a trial in a worker process, e.g. SMAC's `TargetFunctionRunner`.
+        n_workers: int
+            Number of processes.
+
+        Returns
+        -------
+        ProcessPoolRunner
+            Runner submitting the trials to the pool.
+
+        """
+        from hydra_plugins.hydra_smac_sweeper._process_pool_runner import (
+            ProcessPoolRunner,
+        )
+
+        return ProcessPoolRunner(
+            runner,
+            n_workers=n_workers,
+            retry=self.get_retry_policy(),
+            in_flight=self.get_in_flight(),
+            **self.get_feature_kwargs(self.process_pool_kwargs),
+        )
+
+    def get_retry_policy(self) -> RetryPolicy | None:
+        """
+        Create the retry policy of lost trials once, if `retries` is positive.
+
+        Returns
+        -------
+        RetryPolicy | None
+            Policy shared by all runners of the sweep.
+
+        """
+        if self.retries == 0 or self.retry_policy is not None:
+            return self.retry_policy
+        from hydra_plugins.hydra_smac_sweeper._retry import RetryPolicy
+
+        self.retry_policy = RetryPolicy(max_retries=self.retries, backoff=self.retry_backoff)
+        return self.retry_policy
+
+    def get_in_flight(self) -> InFlightTrials | None:
+        """
+        Create the registry of running trials once, if `coalesce_trials` is enabled and the scenario is deterministic.
+
+        Returns
+        -------
+        InFlightTrials | None
+            Running trials, shared by all runners of the sweep.
+
+        """
+        if not self.coalesce_trials or self.in_flight is not None:
+            return self.in_flight
+        if not self.scenario.get("deterministic", False):
+            # Identical trials of a noisy task function have different results
+            return None
+        from hydra_plugins.hydra_smac_sweeper._coalescing import InFlightTrials
+
+        self.in_flight = InFlightTrials()
+        return self.in_flight
+
+    def wrap_submit(
+        self, submit: Callable[[TrialInfo], Any], closing: threading.Event | None = None
+    ) -> Callable[[TrialInfo], Any]:
+        """Submit function of the asynchronous ask/tell loop which retries lost trials and coalesces trials."""
+        from hydra_plugins.hydra_smac_sweeper._coalescing import dispatch
+
+        return functools.partial(
+            dispatch, submit, retry=self.get_retry_policy(), in_flight=self.get_in_flight(), closing=closing
+        )
+
+    def dispatched(self, info: TrialInfo, payload_bytes: int | None = None) -> None:
+        """Record in the profiler and the metrics that a trial was handed to the runner, executor or launcher."""
+        if self.profiler is not None:
+            self.profiler.dispatched(info, payload_bytes=payload_bytes)
+        if self.sweep_metrics is not None:
+            self.sweep_metrics.dispatched(info)
+
+    def instrument(self, runner: AbstractRunner) -> None:
+        """Record in the profiler and the metrics when SMAC's runner dispatches a trial, see `dispatched`."""
+        from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+        from hydra_plugins.hydra_smac_sweeper._process_pool_runner import (
+            ProcessPoolRunner,
+        )
+        from smac.runner import DaskParallelRunner
+
+        submit_trial = runner.submit_trial
+
+        def submit_and_record(trial_info: TrialInfo, **kwargs: Any) -> None:
+            if isinstance(runner, (DaskParallelRunner, ProcessPoolRunner, FederatedRunner)):
+                # Blocks until a worker is free, then submits
+                submit_trial(trial_info, **kwargs)
+                self.dispatched(trial_info)
+            else:
+                # Serial runners run the trial in this process while submitting
+                self.dispatched(trial_info, payload_bytes=0)
+                submit_trial(trial_info, **kwargs)
+
+        runner.submit_trial = submit_and_record  # type: ignore[method-assign]
+
+    @staticmethod
+    def get_dask_clients(runner: Any) -> list[Client]:
+        """Dask clients whose workers run the trials of a runner, e.g. for the utilisation of the workers."""
+        from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+        from hydra_plugins.hydra_smac_sweeper._shared_runner import SharedRunner
+        from smac.runner import DaskParallelRunner
+
+        if isinstance(runner, FederatedRunner):
+            return [cluster.client for cluster in runner.clusters]
+        if isinstance(runner, DaskParallelRunner):
+            return [runner._client]
+        if isinstance(runner, SharedRunner):
+            return [runner.client]
+        return []
+
+    def get_clusters(self) -> list[dict[str, Any]]:
+        """The entries of `clusters` with their dask clients."""
+        return [
+            self.get_feature_kwargs(cluster) if isinstance(cluster, DictConfig) else dict(cluster)
+            for cluster in self.clusters
+        ]
+
+    def create_federation(self, runner: AbstractRunner) -> FederatedRunner:
+        """
+        Spread the trials across the dask clusters of `clusters`.
+
+        Parameters
+        ----------
+        runner: AbstractRunner
+            Runner executing a trial on a worker, e.g. SMAC's `TargetFunctionRunner`.
+
+        Returns
+        -------
+        FederatedRunner
+            Runner submitting every trial to the least loaded cluster.
+
+        """
+        from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+
+        return FederatedRunner(
+            runner,
+            self.get_clusters(),
+            resources=self.resources,
+            retry=self.get_retry_policy(),
+            in_flight=self.get_in_flight(),
+        )
+
     def setup_smac(self) -> AbstractFacade:
         """
         Setup SMAC.
@@ -182,13 +1164,17 @@ class SMACSweeperBackend(Sweeper):
             Instance of a SMAC facade.
 
         """
-        assert self.task_function is not None
+        from hydra_plugins.hydra_smac_sweeper._shared_runner import (
+            SharedDaskParallelRunner,
+        )
+        from smac.runner import DaskParallelRunner
+        from smac.scenario import Scenario
+
+        assert self.task_function is not None and self.config is not None
         # Select SMAC Facade
-        if self.smac_class is not None:
-            smac_class = get_class(self.smac_class)
-        else:
-            smac_class = "smac.facade.hyperparameter_optimization_facade.HyperparameterOptimizationFacade"
-            smac_class = get_class(smac_class)
+        smac_class: type[AbstractFacade] = get_class(
+            self.smac_class or "smac.facade.hyperparameter_optimization_facade.HyperparameterOptimizationFacade"
+        )
 
         if (
             smac_class == get_class("smac.facade.multi_fidelity_facade.MultiFidelityFacade")
@@ -201,13 +1187,19 @@ class SMACSweeperBackend(Sweeper):
             )
 
         # Setup other SMAC kwargs
-        smac_kwargs = {}
+        smac_kwargs: dict[str, Any] = {}
         if self.smac_kwargs is not None:
-            smac_kwargs = OmegaConf.to_container(self.smac_kwargs, resolve=True, enum_to_str=True)
+            container = OmegaConf.to_container(self.smac_kwargs, resolve=True, enum_to_str=True)
+            assert isinstance(container, dict)
+            smac_kwargs = {str(key): value for key, value in container.items()}
+        # Callbacks of the features of the sweeper, after the ones of the user
+        callbacks: list[Callback] = []
 
         # Instantiate Scenario
         if self.configspace is None:
-            self.configspace = search_space_to_config_space(search_space=self.search_space, seed=self.seed)
+            self.configspace = search_space_to_config_space(
+                search_space=self.search_space, seed=self.seed, cache_dir=self.search_space_cache_dir
+            )
         scenario_kwargs = dict(
             configspace=self.configspace,
             output_directory=Path(self.config.hydra.sweep.dir)
@@ -216,18 +1208,105 @@ class SMACSweeperBackend(Sweeper):
         # We always expect scenario kwargs from the user
         _scenario_kwargs = OmegaConf.to_container(self.scenario, resolve=True)
         scenario_kwargs.update(_scenario_kwargs)
+        # The sweeper enforces the resource limits in a process per trial, SMAC's runner can not pickle the trials
+        scenario_kwargs.pop("trial_walltime_limit", None)
+        scenario_kwargs.pop("trial_memory_limit", None)
+
+        n_workers = scenario_kwargs.get("n_workers", 1)
+        if self.use_launcher or self.async_ask_tell or self.process_pool or self.batch_evaluation or self.clusters:
+            # The sweeper dispatches the trials itself, SMAC must not wrap them into its own dask runner
+            scenario_kwargs["n_workers"] = 1
+            self.dask_client = smac_kwargs.pop("dask_client", None)
+            if self.use_launcher:
+                if self.batch_size is None:
+                    self.batch_size = n_workers
+                if self.dask_client is not None:
+                    log.warning("The dask client is not used when running the trials with the launcher.")
+            elif self.async_ask_tell:
+                if self.batch_size is None:
+                    self.batch_size = 1
+                if self.max_in_flight is None:
+                    self.max_in_flight = n_workers
+                    limits = [cluster.get("max_in_flight", None) for cluster in self.get_clusters()]
+                    if len(limits) > 0 and None not in limits:
+                        self.max_in_flight = sum(limits)
+            elif self.batch_evaluation:
+                if self.batch_size is None:
+                    self.batch_size = 16
+                if self.dask_client is not None:
+                    log.warning("The dask client is not used with `batch_evaluation`.")
+            if self.process_pool and self.dask_client is not None:
+                log.warning("The dask client is not used when running the trials in a process pool.")
+                self.dask_client = None
+            if self.clusters and self.dask_client is not None:
+                log.warning("`smac_kwargs.dask_client` is not used, the trials run on the dask clients of `clusters`.")
+                self.dask_client = None
 
         scenario = Scenario(**scenario_kwargs)
 
-        if scenario.trial_walltime_limit is not None or scenario.trial_memory_limit is not None:
-            raise ValueError(
-                "The hydra smac sweeper currently does not support resource "
-                "limitation (scenario.trial_walltime_limit and "
-                "scenario.trial_memory_limit should be None) due to "
-                "pickling issues with multiprocessing."
-            )
+        prior_trials: list[tuple[TrialInfo, TrialValue]] = []
+        optimization_state: dict[str, Any] = {}
+        if self.resume or len(self.warm_start_from) > 0:
+            prior_trials, optimization_state = self.load_prior_trials(Path(scenario_kwargs["output_directory"]))
+            n_imported = sum("warm_start_from" in value.additional_info for _, value in prior_trials)
+            if n_imported > 0:
+                # Prior observations come on top of the budget of this sweep
+                scenario_kwargs["n_trials"] = scenario.n_trials + n_imported
+                scenario = Scenario(**scenario_kwargs)
+            # The prior trials are told to SMAC below, SMAC must neither load nor ask about its old output
+            smac_kwargs["overwrite"] = True
+
         smac_kwargs["scenario"] = scenario
 
+        if self.trial_resources:
+            from hydra_plugins.hydra_smac_sweeper._resources import TrialResources
+
+            dask_client = self.dask_client if self.async_ask_tell else smac_kwargs.get("dask_client", None)
+            clients = [cluster["dask_client"] for cluster in self.get_clusters()]
+            if dask_client is not None:
+                clients.append(dask_client)
+            if len(clients) == 0:
+                raise ValueError(
+                    "`trial_resources` requires `smac_kwargs.dask_client` to be connected to workers which provide "
+                    "the resources, e.g. started with `--resources`."
+                )
+            self.resources = TrialResources(self.get_feature_kwargs(self.trial_resources))
+            missing = sorted(set.intersection(*(set(self.resources.missing(client)) for client in clients)))
+            if len(missing) > 0:
+                # Workers of a job queue cluster may not have started yet
+                log.warning(f"No dask worker provides the resources {missing} yet, trials wait until one does.")
+
+        if self.elastic_scaling:
+            from hydra_plugins.hydra_smac_sweeper._elastic_scaling import ElasticScaler
+
+            dask_client = self.dask_client if self.async_ask_tell else smac_kwargs.get("dask_client", None)
+            if dask_client is None or getattr(dask_client, "cluster", None) is None:
+                raise ValueError(
+                    "Elastic scaling requires `smac_kwargs.dask_client` to be connected to a cluster, e.g. "
+                    "created with the `create_cluster` resolver."
+                )
+            scaler_kwargs = {"max_jobs": n_workers, **self.get_feature_kwargs(self.elastic_scaling_kwargs)}
+            self.scaler = ElasticScaler(cluster=dask_client.cluster, **scaler_kwargs)
+            callbacks.append(self.scaler)
+
+        if self.profiling:
+            from hydra_plugins.hydra_smac_sweeper._profiling import TrialProfiler
+
+            self.profiler = TrialProfiler(**self.get_feature_kwargs(self.profiling_kwargs, "trial_profile.jsonl"))
+            callbacks.append(self.profiler)
+
+        if self.trial_log:
+            from hydra_plugins.hydra_smac_sweeper._trial_log import TrialLog
+
+            self.trial_logger = TrialLog(**self.get_feature_kwargs(self.trial_log_kwargs, "trials.jsonl"))
+            callbacks.append(self.trial_logger)
+
+        if self.metrics:
+            from hydra_plugins.hydra_smac_sweeper._metrics import SweepMetrics
+
+            self.sweep_metrics = SweepMetrics(**self.get_feature_kwargs(self.metrics_kwargs, "metrics.prom"))
+            callbacks.append(self.sweep_metrics)
+
         # If we have a custom intensifier we need to instantiate ourselves
         # because the helper methods in the facades expect a scenario.
         # Here it is easier to instantiate than completely via the yaml file.
@@ -240,7 +1319,15 @@ class SMACSweeperBackend(Sweeper):
             intensifier = smac_kwargs["intensifier"]
             if isinstance(intensifier, str):
                 intensifier = get_class(smac_kwargs["intensifier"])
+            if self.batch_evaluation and "retries" in inspect.signature(intensifier).parameters:
+                assert self.batch_size is not None
+                intensifier_kwargs.setdefault("retries", 2 * self.batch_size)
             smac_kwargs["intensifier"] = intensifier(**intensifier_kwargs)
+        elif self.batch_evaluation and "intensifier" not in smac_kwargs:
+            # Every trial of a batch leaves a finished config in the queue of SMAC's intensifier, which drops one of
+            # them per retry. With the default number of retries it gives up after a large batch.
+            assert self.batch_size is not None
+            smac_kwargs["intensifier"] = get_intensifier_with_retries(smac_class, scenario, 2 * self.batch_size)
 
         if "initial_design" in smac_kwargs:
             initial_design = smac_kwargs["initial_design"]
@@ -250,18 +1337,368 @@ class SMACSweeperBackend(Sweeper):
             del smac_kwargs["initial_design_kwargs"]
             smac_kwargs["initial_design"] = initial_design(scenario=scenario, **initial_design_kwargs)
 
-        printr(smac_class, smac_kwargs)
+        self.print_verbose(smac_class, smac_kwargs)
+
+        if self.trial_cache:
+            self.cache = TrialCache(**self.get_feature_kwargs(self.trial_cache_kwargs, "trial_cache.sqlite"))
+
+        if self.checkpointing:
+            self.checkpoints = Checkpoints(**self.get_feature_kwargs(self.checkpointing_kwargs, "checkpoints"))
 
-        target_function = TargetFunction(task_function=self.task_function, config=self.config)
+        target_function = TargetFunction(
+            task_function=self.task_function,
+            config=self.config,
+            cache=self.cache,
+            profile=self.profiling,
+            worker_setup=self.get_worker_setup(),
+            checkpoints=self.checkpoints,
+            early_stopping=self.get_stopping_rule(),
+            isolation=self.get_isolation(),
+            objectives=get_objectives(scenario),
+        )
+        self.target_function = target_function
+        if scenario.count_objectives() > 1:
+            from hydra_plugins.hydra_smac_sweeper._pareto import ParetoTracker
+
+            self.pareto = ParetoTracker()
+            callbacks.append(self.pareto)
+        if len(callbacks) > 0:
+            smac_kwargs["callbacks"] = list(smac_kwargs.get("callbacks", [])) + callbacks
 
         smac = smac_class(
             target_function=target_function.__call__,
             **smac_kwargs,
         )
 
+        if self.resume or len(self.warm_start_from) > 0:
+            self.tell_prior_trials(smac, prior_trials, optimization_state)
+
+        runner: AbstractRunner
+        if self.process_pool and not self.async_ask_tell:
+            runner = self.create_process_pool(smac._runner, n_workers)
+            smac._runner = smac._optimizer._runner = runner
+        elif self.clusters and not self.async_ask_tell:
+            runner = self.create_federation(smac._runner)
+            smac._runner = smac._optimizer._runner = runner
+        elif isinstance(smac._runner, DaskParallelRunner):
+            # Ship the task function and the config to the workers once instead of with every trial
+            runner = SharedDaskParallelRunner(
+                smac._runner, resources=self.resources, retry=self.get_retry_policy(), in_flight=self.get_in_flight()
+            )
+            smac._runner = smac._optimizer._runner = runner
+
+        if not self.use_launcher and not self.async_ask_tell:
+            if self.profiler is not None or self.sweep_metrics is not None:
+                self.instrument(smac._runner)
+            if self.profiler is not None:
+                self.profiler.measure_runner(smac._runner)
+            if self.sweep_metrics is not None:
+                self.sweep_metrics.clients = self.get_dask_clients(smac._runner)
+
         return smac
 
-    def sweep(self, arguments: list[str]) -> Configuration | None:
+    def load_prior_trials(self, output_directory: Path) -> tuple[list[tuple[TrialInfo, TrialValue]], dict[str, Any]]:
+        """
+        Load the trials to resume and to warm start from.
+
+        Parameters
+        ----------
+        output_directory: Path
+            SMAC output directory of this sweep, searched for the runhistory to resume.
+
+        Returns
+        -------
+        tuple[list[tuple[TrialInfo, TrialValue]], dict[str, Any]]
+            Finished trials, without duplicates, and the optimization state of the resumed run.
+
+        """
+        assert self.configspace is not None
+        trials: dict[tuple, tuple[TrialInfo, TrialValue]] = {}
+        optimization_state: dict[str, Any] = {}
+        resumed: Path | None = None
+
+        if self.resume:
+            runhistories = find_runhistories(output_directory) if output_directory.exists() else []
+            if len(runhistories) == 0:
+                log.info(f"No runhistory to resume in {output_directory}, starting a new run.")
+            else:
+                # The name of SMAC's output directory is a hash of the scenario, it changes with the budget
+                resumed = runhistories[-1]
+                optimization_state = load_optimization_state(resumed)
+                for info, value in load_trials(resumed, self.configspace):
+                    trials[(info.config, info.instance, info.seed, info.budget)] = (info, value)
+                log.info(f"Resuming {len(trials)} trials from {resumed}.")
+
+        for path in self.warm_start_from:
+            for filename in find_runhistories(path):
+                if resumed is not None and filename.resolve() == resumed.resolve():
+                    continue
+                n_trials = 0
+                for info, value in load_trials(filename, self.configspace, origin="Warm Start"):
+                    key = (info.config, info.instance, info.seed, info.budget)
+                    if key not in trials:
+                        value.additional_info["warm_start_from"] = str(filename)
+                        trials[key] = (info, value)
+                        n_trials += 1
+                log.info(f"Imported {n_trials} prior observations from {filename}.")
+
+        return list(trials.values()), optimization_state
+
+    def tell_prior_trials(
+        self,
+        smac: AbstractFacade,
+        trials: list[tuple[TrialInfo, TrialValue]],
+        optimization_state: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Tell SMAC about trials of previous runs.
+
+        The initial design is skipped if there are at least as many prior configurations as initial configurations.
+
+        Parameters
+        ----------
+        smac: AbstractFacade
+            Instance of a SMAC facade.
+        trials: list[tuple[TrialInfo, TrialValue]]
+            Finished trials, see `load_prior_trials`.
+        optimization_state: dict[str, Any] | None
+            Optimization state of the resumed run, restores the used walltime.
+
+        Returns
+        -------
+        None
+
+        """
+        optimizer = smac.optimizer
+        for info, value in trials:
+            try:
+                smac.tell(info, value, save=False)
+            except ValueError as e:
+                # E.g. the intensifier requires budgets or instances which the prior run did not use
+                log.warning(f"Skipping prior trial {info}: {e}")
+                continue
+            if "warm_start_from" not in value.additional_info:
+                optimizer._used_target_function_walltime += value.time
+
+        if optimization_state:
+            optimizer._used_target_function_walltime = optimization_state["used_target_function_walltime"]
+            optimizer._start_time = time.time() - optimization_state["used_walltime"]
+
+        config_selector = smac.intensifier._config_selector
+        n_configs = len(smac.runhistory.get_configs())
+        if config_selector is not None and n_configs >= len(config_selector._initial_design_configs) > 0:
+            log.info(f"Skipping the initial design, {n_configs} configurations were already evaluated.")
+            config_selector._initial_design_configs = []
+
+        if optimizer.remaining_trials <= 0:
+            optimizer._finished = True
+        optimizer.save()
+
+    def optimize_with_launcher(self, smac: AbstractFacade) -> Configuration | list[Configuration] | None:
+        """
+        Run SMAC's ask/tell loop and evaluate the trials with the hydra launcher.
+
+        Each iteration asks `batch_size` trials, launches them as one batch and tells the results.
+        The runtime of a trial is the runtime of its whole batch.
+
+        Parameters
+        ----------
+        smac: AbstractFacade
+            Instance of a SMAC facade.
+
+        Returns
+        -------
+        Configuration | list[Configuration] | None
+            Incumbent (best) configuration, the incumbents on the Pareto front with several objectives.
+
+        """
+        from hydra_plugins.hydra_smac_sweeper._coalescing import (
+            COALESCED_KEY,
+            get_in_flight_key,
+        )
+        from smac.runhistory import StatusType, TrialValue
+
+        assert self.batch_size is not None
+        optimizer = smac.optimizer
+        in_flight = self.get_in_flight()
+        budget_variable = self.config.get("budget_variable", None)
+        crash_cost = smac.scenario.crash_cost
+        objectives = get_objectives(smac.scenario)
+        target_identity = ""
+        if self.checkpoints is not None or self.cache is not None:
+            target_identity = get_target_identity(self.task_function, self.config)
+        if optimizer._start_time is None:
+            optimizer._start_time = time.time()
+        for callback in optimizer._callbacks:
+            callback.on_start(optimizer)
+
+        # Trials of a resumed run were launched as the first jobs, their job directories are not reused
+        job_idx = sum("warm_start_from" not in value.additional_info for value in smac.runhistory.values())
+        while not optimizer.budget_exhausted and not optimizer._stop:
+            trial_infos = []
+            try:
+                for _ in range(min(self.batch_size, optimizer.remaining_trials)):
+                    trial_infos.append(smac.ask())
+            except StopIteration:
+                optimizer._stop = True
+            if len(trial_infos) == 0:
+                break
+
+            # Identical trials of a batch are launched once and all get its result, see `coalesce_trials`
+            sources = list(range(len(trial_infos)))
+            if in_flight is not None:
+                first: dict[Hashable, int] = {}
+                sources = [first.setdefault(get_in_flight_key(info), i) for i, info in enumerate(trial_infos)]
+                in_flight.n_coalesced += sum(source != i for i, source in enumerate(sources))
+            unique = [i for i in range(len(trial_infos)) if sources[i] == i]
+
+            # Cached trials are told without launching them, see `trial_cache`
+            values: dict[int, TrialValue] = {}
+            cache_keys: dict[int, str] = {}
+            if self.cache is not None:
+                for i in unique:
+                    info = trial_infos[i]
+                    cache_keys[i] = get_trial_key(
+                        info.config,
+                        seed=info.seed,
+                        budget=info.budget,
+                        instance=info.instance,
+                        target_identity=target_identity,
+                    )
+                    hit, result = self.cache.get(cache_keys[i])
+                    if hit:
+                        now = time.time()
+                        job_return = JobReturn(status=JobStatus.COMPLETED, _return_value=result)
+                        values[i] = job_return_to_trial_value(job_return, crash_cost, now, now, objectives)
+            launched = [i for i in unique if i not in values]
+
+            job_overrides = [trial_to_overrides(trial_infos[i], budget_variable) for i in launched]
+            checkpoint_dirs: list[Path | None] = [None] * len(launched)
+            if self.checkpoints is not None:
+                for j, (i, overrides) in enumerate(zip(launched, job_overrides)):
+                    info = trial_infos[i]
+                    directory = self.checkpoints.get_directory(
+                        info.config, seed=info.seed, instance=info.instance, target_identity=target_identity
+                    )
+                    previous_budget = self.checkpoints.get_previous_budget(directory, info.budget)
+                    overrides.append(f"++{CHECKPOINT_DIR_KEY}={format_override_value(str(directory))}")
+                    overrides.append(f"++{PREVIOUS_BUDGET_KEY}={format_override_value(previous_budget)}")
+                    checkpoint_dirs[j] = directory
+            for i, overrides in zip(launched, job_overrides):
+                self.dispatched(trial_infos[i], payload_bytes=len(" ".join(overrides).encode()))
+            if len(launched) > 0:
+                starttime = time.time()
+                job_returns = self.launcher.launch(job_overrides, initial_job_idx=job_idx)
+                endtime = time.time()
+                job_idx += len(job_overrides)
+
+                for i, job_return, checkpoint_dir in zip(launched, job_returns, checkpoint_dirs):
+                    info = trial_infos[i]
+                    value = job_return_to_trial_value(job_return, crash_cost, starttime, endtime, objectives)
+                    if value.status == StatusType.SUCCESS:
+                        if self.checkpoints is not None and checkpoint_dir is not None:
+                            # A trial which was stopped early saved its checkpoint at the step it reached
+                            reached = value.additional_info.get(EARLY_STOPPED_KEY, info.budget)
+                            self.checkpoints.finished(checkpoint_dir, reached)
+                        if self.cache is not None:
+                            result = (value.cost, value.additional_info) if value.additional_info else value.cost
+                            self.cache.put(cache_keys[i], result)
+                    values[i] = value
+                    optimizer._used_target_function_walltime += value.time
+            for i, (info, source) in enumerate(zip(trial_infos, sources)):
+                value = values[source]
+                if source != i:
+                    additional_info = dict(value.additional_info, **{COALESCED_KEY: True})
+                    value = dataclasses.replace(value, additional_info=additional_info)
+                smac.tell(info, value, save=False)
+            optimizer.save()
+
+        if optimizer.budget_exhausted:
+            optimizer._finished = True
+        for callback in optimizer._callbacks:
+            callback.on_end(optimizer)
+
+        if smac.scenario.count_objectives() > 1:
+            return smac.intensifier.get_incumbents()
+        return smac.intensifier.get_incumbent()
+
+    def optimize_batched(self, smac: AbstractFacade) -> Configuration | list[Configuration] | None:
+        """
+        Run SMAC's ask/tell loop and evaluate `batch_size` trials with one call of the task function.
+
+        Parameters
+        ----------
+        smac: AbstractFacade
+            Instance of a SMAC facade.
+
+        Returns
+        -------
+        Configuration | list[Configuration] | None
+            Incumbent (best) configuration, the incumbents on the Pareto front with several objectives.
+
+        """
+        from smac.runhistory import StatusType, TrialValue
+
+        assert self.batch_size is not None and self.task_function is not None and self.target_function is not None
+        optimizer = smac.optimizer
+        crash_cost = smac.scenario.crash_cost
+        objectives = get_objectives(smac.scenario)
+        if optimizer._start_time is None:
+            optimizer._start_time = time.time()
+        for callback in optimizer._callbacks:
+            callback.on_start(optimizer)
+
+        while not optimizer.budget_exhausted and not optimizer._stop:
+            trial_infos = []
+            try:
+                for _ in range(min(self.batch_size, optimizer.remaining_trials)):
+                    trial_infos.append(smac.ask())
+            except StopIteration:
+                optimizer._stop = True
+            if len(trial_infos) == 0:
+                break
+
+            cfg = self.target_function.materialize_batch(trial_infos)
+            for info in trial_infos:
+                self.dispatched(info, payload_bytes=0)
+            starttime = time.time()
+            try:
+                result = self.task_function(cfg)
+                endtime = time.time()
+                values = batch_result_to_trial_values(
+                    result, len(trial_infos), objectives, crash_cost, starttime, endtime
+                )
+            except Exception as e:
+                endtime = time.time()
+                additional_info = {
+                    "traceback": "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+                    "error": repr(e),
+                }
+                value = TrialValue(
+                    cost=crash_cost,
+                    time=(endtime - starttime) / len(trial_infos),
+                    status=StatusType.CRASHED,
+                    starttime=starttime,
+                    endtime=endtime,
+                    additional_info=additional_info,
+                )
+                values = [value] * len(trial_infos)
+
+            for info, value in zip(trial_infos, values):
+                smac.tell(info, value, save=False)
+                optimizer._used_target_function_walltime += value.time
+            optimizer.save()
+
+        if optimizer.budget_exhausted:
+            optimizer._finished = True
+        for callback in optimizer._callbacks:
+            callback.on_end(optimizer)
+
+        if smac.scenario.count_objectives() > 1:
+            return smac.intensifier.get_incumbents()
+        return smac.intensifier.get_incumbent()
+
+    def sweep(self, arguments: list[str]) -> Configuration | list[Configuration] | None:
         """
         Run optimization with SMAC.
 
@@ -272,8 +1709,8 @@ class SMACSweeperBackend(Sweeper):
 
         Returns
         -------
-        Configuration | None
-            Incumbent (best) configuration.
+        Configuration | list[Configuration] | None
+            Incumbent (best) configuration, the incumbents on the Pareto front with several objectives.
 
         Raises
         ------
@@ -281,27 +1718,140 @@ class SMACSweeperBackend(Sweeper):
             When providing overriding arguments, override arguments do not have any effect.
 
         """
+        from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+        from hydra_plugins.hydra_smac_sweeper._process_pool_runner import (
+            ProcessPoolRunner,
+        )
+        from hydra_plugins.hydra_smac_sweeper._shared_runner import SharedRunner
+        from smac.runner import DaskParallelRunner
+
         assert self.config is not None
         assert self.launcher is not None
         assert self.hydra_context is not None
 
-        printr("Config", self.config)
-        printr("Hydra context", self.hydra_context)
-        printr("Launcher", self.launcher)
+        self.print_verbose("Config", self.config)
+        self.print_verbose("Hydra context", self.hydra_context)
+        self.print_verbose("Launcher", self.launcher)
 
         if len(arguments) > 0:
             warnings.warn(f"Override arguments might not have an effect if they are a sweep. {arguments}")
 
         smac = self.setup_smac()
+        cache_stats = self.cache.stats if self.cache is not None else {}
 
-        incumbent = smac.optimize()
-        if isinstance(smac._runner, DaskParallelRunner):
-            smac._runner.close(force=True)
+        try:
+            if self.use_launcher:
+                incumbent = self.optimize_with_launcher(smac)
+            elif self.batch_evaluation:
+                incumbent = self.optimize_batched(smac)
+            elif self.async_ask_tell and self.process_pool:
+                assert self.max_in_flight is not None and self.batch_size is not None
+                pool = self.create_process_pool(smac._runner, self.max_in_flight)
+                if self.profiler is not None:
+                    self.profiler.measure_runner(pool)
+                driver = AskTellDriver(
+                    smac=smac,
+                    executor=pool.executor,
+                    max_in_flight=self.max_in_flight,
+                    batch_size=self.batch_size,
+                    on_dispatch=self.dispatched,
+                    submit=self.wrap_submit(pool.submit, closing=pool.closing),
+                )
+                try:
+                    incumbent = driver.run()
+                finally:
+                    pool.close()
+            elif self.async_ask_tell and self.clusters:
+                assert self.max_in_flight is not None and self.batch_size is not None
+                federation = self.create_federation(smac._runner)
+                if self.profiler is not None:
+                    self.profiler.measure_runner(federation)
+                if self.sweep_metrics is not None:
+                    self.sweep_metrics.clients = self.get_dask_clients(federation)
+                driver = AskTellDriver(
+                    smac=smac,
+                    executor=None,
+                    max_in_flight=self.max_in_flight,
+                    batch_size=self.batch_size,
+                    on_dispatch=self.dispatched,
+                    submit=self.wrap_submit(federation.submit, closing=federation.closing),
+                )
+                try:
+                    incumbent = driver.run()
+                finally:
+                    federation.close(force=True)
+            elif self.async_ask_tell:
+                assert self.max_in_flight is not None and self.batch_size is not None
+                # A client passed in `smac_kwargs` belongs to the user and stays open
+                own_client = self.dask_client is None
+                if self.dask_client is None:
+                    from distributed import Client
+
+                    self.dask_client = Client(
+                        n_workers=self.max_in_flight,
+                        processes=True,
+                        threads_per_worker=1,
+                        local_directory=str(smac.scenario.output_directory),
+                    )
+                shared = SharedRunner(self.dask_client, smac._runner, resources=self.resources)
+                if self.profiler is not None:
+                    self.profiler.measure_runner(shared)
+                if self.sweep_metrics is not None:
+                    self.sweep_metrics.clients = self.get_dask_clients(shared)
+                driver = AskTellDriver(
+                    smac=smac,
+                    executor=self.dask_client,
+                    max_in_flight=self.max_in_flight,
+                    batch_size=self.batch_size,
+                    on_dispatch=self.dispatched,
+                    submit=self.wrap_submit(shared.submit, closing=shared.closing),
+                )
+                try:
+                    incumbent = driver.run()
+                finally:
+                    shared.close()
+                    if own_client:
+                        self.dask_client.close()
+            else:
+                incumbent = smac.optimize()
+        finally:
+            if isinstance(smac._runner, (DaskParallelRunner, ProcessPoolRunner, FederatedRunner)):
+                smac._runner.close(force=True)
+            if self.scaler is not None:
+                # Release the jobs of the cluster even if the optimization failed
+                self.scaler.close()
+            if self.trial_logger is not None:
+                # Sync the records of the trials which finished before a failure
+                self.trial_logger.close()
+            if self.sweep_metrics is not None:
+                self.sweep_metrics.close()
         smac._optimizer.print_stats()
-        log.info(f"Final Incumbent: {incumbent}")
-        if incumbent is not None:
-            incumbent_cost = smac.runhistory.get_cost(incumbent)
-            log.info(f"Estimated cost of incumbent: {incumbent_cost}")
+        if isinstance(incumbent, list):
+            objectives = get_objectives(smac.scenario)
+            log.info(f"Final Incumbents ({len(incumbent)} on the Pareto front of {objectives}):")
+            for config in incumbent:
+                log.info(f"  {dict(config)}, estimated costs: {smac.runhistory.average_cost(config)}")
+            if self.pareto is not None:
+                log.info(f"Pareto front of the trials at the highest budget: {len(self.pareto.front)} trials")
+        else:
+            log.info(f"Final Incumbent: {incumbent}")
+            if incumbent is not None:
+                incumbent_cost = smac.runhistory.get_cost(incumbent)
+                log.info(f"Estimated cost of incumbent: {incumbent_cost}")
+        if self.cache is not None:
+            stats = self.cache.stats
+            hits = stats["hits"] - cache_stats["hits"]
+            misses = stats["misses"] - cache_stats["misses"]
+            log.info(f"Trial cache: {hits} hits, {misses} misses, {len(self.cache)} cached results")
+            self.cache.close()
+        if self.retry_policy is not None and self.retry_policy.n_retries > 0:
+            log.info(f"Retries: {self.retry_policy.n_retries} lost trials were run again")
+        if self.in_flight is not None and self.in_flight.n_coalesced > 0:
+            log.info(f"Coalescing: {self.in_flight.n_coalesced} trials got the result of an identical running trial")
+        if self.stopping_rule is not None:
+            n_stopped = sum(EARLY_STOPPED_KEY in value.additional_info for value in smac.runhistory.values())
+            log.info(f"Early stopping: {n_stopped} of {len(smac.runhistory)} trials were stopped early")
+            self.stopping_rule.close()
         # if smac.solver.incumbent and smac.solver.incumbent in smac.solver.runhistory.get_all_configs():
         #     log.info("Estimated cost of incumbent: %f", smac.solver.runhistory.get_cost(smac.solver.incumbent))
         return incumbent
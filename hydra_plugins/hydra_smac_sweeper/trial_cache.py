@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+import hashlib
+import pickle
+import sqlite3
+import time
+from pathlib import Path
+
+from hydra_plugins.hydra_smac_sweeper._sqlite import SQLiteDatabase
+from omegaconf import DictConfig, OmegaConf
+
+if TYPE_CHECKING:
+    from ConfigSpace import Configuration  # type: ignore[import]
+
+
+def get_target_identity(task_function: Callable, config: DictConfig) -> str:
+    """Identify a target function together with the config it runs with
+
+    Parameters
+    ----------
+    task_function : Callable
+        Hydra task function
+    config : DictConfig
+        Hydra config. The `hydra` node is ignored, it contains the output directories of the run.
+
+    Returns
+    -------
+    str
+        Hash of the code of the task function and of the config
+    """
+    h = hashlib.sha256()
+    h.update(f"{getattr(task_function, '__module__', '')}.{getattr(task_function, '__qualname__', '')}".encode())
+    code = getattr(task_function, "__code__", None)
+    if code is not None:
+        h.update(code.co_code)
+    container = OmegaConf.to_container(config, resolve=False)
+    assert isinstance(container, dict)
+    container.pop("hydra", None)
+    h.update(repr(sorted(container.items(), key=lambda item: str(item[0]))).encode())
+    return h.hexdigest()
+
+
+def get_trial_key(
+    config: Configuration,
+    seed: int | None = None,
+    budget: float | None = None,
+    instance: str | None = None,
+    target_identity: str = "",
+) -> str:
+    """Hash a trial
+
+    Parameters
+    ----------
+    config : Configuration
+        Hyperparameter configuration
+    seed : int | None, optional
+        Seed, by default None
+    budget : float | None, optional
+        Budget, by default None
+    instance : str | None, optional
+        Instance, by default None
+    target_identity : str, optional
+        Identity of the target function, see `get_target_identity`
+
+    Returns
+    -------
+    str
+        Key of the trial
+    """
+    h = hashlib.sha256()
+    h.update(config.get_array().tobytes())
+    h.update(repr((seed, budget, instance, target_identity)).encode())
+    return h.hexdigest()
+
+
+class TrialCache(SQLiteDatabase):
+    def __init__(self, path: str | Path, max_entries: int | None = 100000, timeout: float = 30.0) -> None:
+        """
+        Persistent cache of trial results in a SQLite database.
+
+        Results are stored under a trial key (see `get_trial_key`). When more than `max_entries` results are stored,
+        the least recently used ones are evicted. The database can be shared by several processes, hits and misses
+        are counted in the database, too.
+
+        Parameters
+        ----------
+        path : str | Path
+            Path to the database file
+        max_entries : int | None
+            Maximum number of cached results, unlimited if None
+        timeout : float
+            Seconds to wait for a lock on the database
+
+        Returns
+        -------
+        None
+
+        """
+        super().__init__(path, timeout=timeout)
+        self.max_entries = max_entries
+
+    def create_tables(self, connection: sqlite3.Connection) -> None:  # noqa: D102
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS trials (key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS trials_last_access ON trials (last_access)")
+        connection.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        connection.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0)")
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Look up a result
+
+        Parameters
+        ----------
+        key : str
+            Trial key
+
+        Returns
+        -------
+        tuple[bool, Any]
+            Whether the key was found and the cached result
+        """
+        with self._lock, self.connection as connection:
+            row = connection.execute("SELECT value FROM trials WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                connection.execute("UPDATE stats SET value = value + 1 WHERE name = 'misses'")
+                return False, None
+            connection.execute("UPDATE trials SET last_access = ? WHERE key = ?", (time.time(), key))
+            connection.execute("UPDATE stats SET value = value + 1 WHERE name = 'hits'")
+        return True, pickle.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a result and evict the least recently used results if the cache is full
+
+        Parameters
+        ----------
+        key : str
+            Trial key
+        value : Any
+            Result of the task function, must be picklable
+        """
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO trials VALUES (?, ?, ?)", (key, pickle.dumps(value), time.time())
+            )
+            if self.max_entries is not None:
+                connection.execute(
+                    "DELETE FROM trials WHERE key IN "
+                    "(SELECT key FROM trials ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM trials").fetchone()[0]
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Hits and misses of all processes using the cache."""
+        with self._lock:
+            return dict(self.connection.execute("SELECT name, value FROM stats").fetchall())
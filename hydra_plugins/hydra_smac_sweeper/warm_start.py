@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import json
+import logging
+from pathlib import Path
+
+if TYPE_CHECKING:
+    from ConfigSpace import ConfigurationSpace  # type: ignore[import]
+    from smac.runhistory import TrialInfo, TrialValue
+
+log = logging.getLogger(__name__)
+
+
+def find_runhistories(path: str | Path) -> list[Path]:
+    """Find the runhistories of previous SMAC runs
+
+    Parameters
+    ----------
+    path : str | Path
+        A `runhistory.json` file, or a directory which is searched recursively, e.g. the output directory of a SMAC
+        run, a `smac3_output` directory or a hydra sweep directory.
+
+    Returns
+    -------
+    list[Path]
+        Paths of the runhistory files, the most recently updated one last
+    """
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(path.rglob("runhistory.json"), key=lambda filename: filename.stat().st_mtime)
+
+
+def load_trials(
+    filename: str | Path, configspace: ConfigurationSpace, origin: str | None = None
+) -> list[tuple[TrialInfo, TrialValue]]:
+    """Load the finished trials of a runhistory
+
+    Configurations which are not valid in `configspace` are skipped, so runhistories of sweeps over a different but
+    compatible search space can be loaded, too. Running trials are skipped, they are asked again.
+
+    Parameters
+    ----------
+    filename : str | Path
+        Path to a `runhistory.json` file written by SMAC
+    configspace : ConfigurationSpace
+        Configuration space of the current sweep
+    origin : str | None, optional
+        Origin of the loaded configurations, by default the origin stored in the runhistory
+
+    Returns
+    -------
+    list[tuple[TrialInfo, TrialValue]]
+        Finished trials
+    """
+    from ConfigSpace import Configuration  # type: ignore[import]
+    from smac.runhistory import StatusType, TrialInfo, TrialValue
+
+    with open(filename) as fp:
+        data = json.load(fp)
+
+    configs: dict[int, Configuration] = {}
+    for config_id, values in data["configs"].items():
+        try:
+            config = Configuration(configspace, values=values)
+        except ValueError as e:
+            log.debug(f"Skipping configuration {config_id} of {filename}: {e}")
+            continue
+        config.origin = origin if origin is not None else data["config_origins"].get(config_id, None)
+        configs[int(config_id)] = config
+
+    trials = []
+    for config_id, instance, seed, budget, cost, time, status, starttime, endtime, additional_info in data["data"]:
+        if config_id not in configs or StatusType(status) == StatusType.RUNNING:
+            continue
+        info = TrialInfo(config=configs[config_id], instance=instance, seed=seed, budget=budget)
+        value = TrialValue(
+            cost=cost,
+            time=time,
+            status=StatusType(status),
+            starttime=starttime,
+            endtime=endtime,
+            additional_info=additional_info,
+        )
+        trials.append((info, value))
+
+    n_skipped = len(data["configs"]) - len(configs)
+    if n_skipped > 0:
+        log.warning(f"Skipped {n_skipped} configurations of {filename} which are not valid in the search space.")
+
+    return trials
+
+
+def load_optimization_state(filename: str | Path) -> dict[str, Any]:
+    """Load the `optimization.json` written next to a runhistory
+
+    Parameters
+    ----------
+    filename : str | Path
+        Path to a `runhistory.json` file written by SMAC
+
+    Returns
+    -------
+    dict[str, Any]
+        Used walltime and target function walltime of the run, empty if there is no state
+    """
+    state_filename = Path(filename).parent / "optimization.json"
+    if not state_filename.exists():
+        return {}
+    with open(state_filename) as fp:
+        return json.load(fp)
@@ -26,6 +26,7 @@ extras_require = {
         "pytest-cov",
         "pytest-xdist",
         "pytest-timeout",
+        "pytest-benchmark",
         # Docs
         "automl_sphinx_theme",
         # Others
@@ -4,27 +4,112 @@ e.g. by appending --basetemp=./tmp/pytest to your pytest command.
 """
 from typing import Union
 
+import copy
+import functools
 import json
 import os
+import subprocess
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
-from ConfigSpace import ConfigurationSpace, UniformFloatHyperparameter
+from ConfigSpace import (
+    AndConjunction,
+    CategoricalHyperparameter,
+    Configuration,
+    ConfigurationSpace,
+    Constant,
+    EqualsCondition,
+    ForbiddenAndConjunction,
+    ForbiddenEqualsClause,
+    ForbiddenInClause,
+    ForbiddenLessThanRelation,
+    GreaterThanCondition,
+    InCondition,
+    NormalFloatHyperparameter,
+    OrdinalHyperparameter,
+    UniformFloatHyperparameter,
+    UniformIntegerHyperparameter,
+)
+from distributed import Client, KilledWorker, LocalCluster
+from distributed.comm import CommClosedError
 from examples.blackbox_branin import branin
 from hydra.core.plugins import Plugins
+from hydra.core.utils import JobReturn, JobStatus
 from hydra.plugins.sweeper import Sweeper
 from hydra.test_utils.test_utils import chdir_plugin_root, run_python_script
 from hydra.utils import get_class
+from hydra_plugins.hydra_smac_sweeper import _worker_setup
+from hydra_plugins.hydra_smac_sweeper._coalescing import (
+    COALESCED_KEY,
+    AttachedFuture,
+    InFlightTrials,
+)
+from hydra_plugins.hydra_smac_sweeper._early_stopping import MedianStoppingRule
+from hydra_plugins.hydra_smac_sweeper._elastic_scaling import (
+    ElasticScaler,
+    estimate_demand,
+)
+from hydra_plugins.hydra_smac_sweeper._federation import FederatedRunner
+from hydra_plugins.hydra_smac_sweeper._isolation import (
+    ProcessIsolation,
+    TrialMemoryOut,
+    TrialTimeout,
+)
+from hydra_plugins.hydra_smac_sweeper._metrics import SweepMetrics
+from hydra_plugins.hydra_smac_sweeper._process_pool_runner import ProcessPoolRunner
+from hydra_plugins.hydra_smac_sweeper._profiling import PROFILE_KEY, attach_profile
+from hydra_plugins.hydra_smac_sweeper._resources import TrialResources
+from hydra_plugins.hydra_smac_sweeper._retry import RETRIES_KEY, RetryPolicy, TrialLost
+from hydra_plugins.hydra_smac_sweeper._shared_runner import (
+    SharedDaskParallelRunner,
+    SharedRunner,
+)
+from hydra_plugins.hydra_smac_sweeper._trials import crashed_trial_value
+from hydra_plugins.hydra_smac_sweeper._worker_setup import (
+    WorkerSetup,
+    WorkerTask,
+    accepts_worker_state,
+)
+from hydra_plugins.hydra_smac_sweeper.ask_tell_driver import AskTellDriver
+from hydra_plugins.hydra_smac_sweeper.checkpoints import Checkpoints
+from hydra_plugins.hydra_smac_sweeper.early_stopping import EARLY_STOPPED_KEY, report
+from hydra_plugins.hydra_smac_sweeper.results import (
+    aggregate_by_budget,
+    load_results,
+    non_dominated,
+    pareto_front,
+    read_trial_log,
+    runhistory_to_frame,
+    top_k,
+)
 from hydra_plugins.hydra_smac_sweeper.search_space_encoding import (
+    build_config_space,
     search_space_to_config_space,
 )
 from hydra_plugins.hydra_smac_sweeper.smac_sweeper import SMACSweeper
-from hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend import SMACSweeperBackend
+from hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend import (
+    SMACSweeperBackend,
+    TargetFunction,
+    batch_result_to_trial_values,
+    format_override_value,
+    job_return_to_trial_value,
+    normalize_result,
+    trial_to_overrides,
+)
+from hydra_plugins.hydra_smac_sweeper.trial_cache import TrialCache, get_trial_key
 from omegaconf import DictConfig, OmegaConf
 from pytest import mark
 from smac.facade.hyperparameter_optimization_facade import (
     HyperparameterOptimizationFacade,
 )
+from smac.runhistory import StatusType, TrialInfo, TrialValue
+from smac.runner import DaskParallelRunner
 
 chdir_plugin_root()
 
@@ -33,6 +118,31 @@ def test_discovery() -> None:
     assert SMACSweeper.__name__ in [x.__name__ for x in Plugins.instance().discover(Sweeper)]
 
 
+IMPORT_TIME_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from hydra.core.plugins import Plugins
+from hydra.plugins.sweeper import Sweeper
+Plugins.instance().discover(Sweeper)
+import hydra_plugins.hydra_smac_sweeper.smac_sweeper_backend
+from omegaconf import OmegaConf
+elapsed = time.perf_counter() - start
+heavy = ["smac", "ConfigSpace", "distributed", "dask", "dask_jobqueue", "rich"]
+loaded = [name for name in heavy if name in sys.modules]
+print(json.dumps({"elapsed": elapsed, "loaded": loaded, "resolver": OmegaConf.has_resolver("create_cluster")}))
+"""
+
+
+def test_import_time() -> None:
+    # Fresh interpreter, the test session has imported everything already
+    stdout, _ = run_python_script(["-c", IMPORT_TIME_SCRIPT], allow_warnings=True)
+    result = json.loads(stdout.splitlines()[-1])
+    assert result["loaded"] == []
+    assert result["resolver"]
+    # Importing SMAC, ConfigSpace and dask alone takes more than two seconds
+    assert result["elapsed"] < 1.5
+
+
 def create_configspace_a() -> ConfigurationSpace:
     cs = ConfigurationSpace()
     cs.add_hyperparameters(
@@ -107,6 +217,64 @@ def test_search_space_parsing_value_error() -> None:
         assert True
 
 
+def test_search_space_cache(tmpdir: Path) -> None:
+    search_space = OmegaConf.create(
+        {
+            "hyperparameters": {
+                "x0": {"type": "uniform_float", "lower": -512.0, "upper": 512.0, "default": -3.0},
+                "x1": {"type": "uniform_float", "log": True, "lower": 335, "upper": 512.0, "default": 400},
+                "x2": {"type": "categorical", "choices": ["a", "b"]},
+            },
+            "conditions": [{"type": "EQ", "child": "x1", "parent": "x2", "value": "a"}],
+        }
+    )
+    original = copy.deepcopy(search_space)
+    cs = search_space_to_config_space(search_space, cache_dir=tmpdir)
+    assert search_space == original
+    assert len(list(Path(tmpdir).glob("*.pkl"))) == 1
+
+    # Cache hits are copies, seeding one does not seed the others
+    cached = search_space_to_config_space(search_space, seed=1, cache_dir=tmpdir)
+    assert cached == cs and cached is not cs
+    assert len(cs.get_conditions()) == 1
+
+    search_space.hyperparameters.x0.upper = 1024.0
+    assert search_space_to_config_space(search_space, cache_dir=tmpdir)["x0"].upper == 1024.0
+    assert len(list(Path(tmpdir).glob("*.pkl"))) == 2
+
+
+def test_build_config_space_json_format() -> None:
+    from ConfigSpace.read_and_write import json as csjson
+
+    cs = ConfigurationSpace(name="all")
+    hps = {
+        "uf": UniformFloatHyperparameter("uf", lower=1.0, upper=10.0, log=True),
+        "ui": UniformIntegerHyperparameter("ui", lower=0, upper=10, default_value=3),
+        "nf": NormalFloatHyperparameter("nf", mu=0.0, sigma=1.0),
+        "c": CategoricalHyperparameter("c", choices=["a", "b", "c"], weights=[0.5, 0.25, 0.25]),
+        "o": OrdinalHyperparameter("o", sequence=[1, 2, 3], default_value=2),
+        "k": Constant("k", "fixed"),
+    }
+    cs.add_hyperparameters(list(hps.values()))
+    cs.add_conditions(
+        [
+            AndConjunction(EqualsCondition(hps["ui"], hps["c"], "a"), GreaterThanCondition(hps["ui"], hps["uf"], 2.0)),
+            InCondition(hps["nf"], hps["o"], [1, 2]),
+        ]
+    )
+    cs.add_forbidden_clauses(
+        [
+            ForbiddenAndConjunction(ForbiddenEqualsClause(hps["c"], "b"), ForbiddenInClause(hps["o"], [1, 3])),
+            ForbiddenLessThanRelation(hps["uf"], hps["nf"]),
+        ]
+    )
+
+    # The builder reads the same format as ConfigSpace's json reader of the installed version
+    built = build_config_space(json.loads(csjson.write(cs)))
+    assert built == cs
+    assert [str(f) for f in built.get_forbiddens()] == [str(f) for f in cs.get_forbiddens()]
+
+
 @mark.parametrize(
     "kwargs",
     [
@@ -197,30 +365,67 @@ def test_smac_sweeper_sweep_arguments_error(kwargs: DictConfig):
         sweeper.sweep(arguments=["nothing", "should", "go", "in", "here"])
 
 
-@mark.parametrize(
-    "kwargs",
-    [
-        DictConfig(
-            content={
-                "smac_class": None,
-                "smac_kwargs": None,
-                "search_space": "tests/configspace_a.json",
-                "scenario": {
-                    "trial_walltime_limit": 10,
-                },
-            }
-        ),
-    ],
-)
-def test_smac_sweeper_sweep_resourcelimitation_error(kwargs: DictConfig):
-    sweeper = SMACSweeperBackend(**kwargs)
-    config = OmegaConf.create({"hydra": {"sweep": {"dir": "./tmp"}}})
-    sweeper.config = config
-    sweeper.task_function = branin
-    sweeper.launcher = "dummy"
-    sweeper.hydra_context = "dummy"
-    with pytest.raises(ValueError):
-        sweeper.setup_smac()
+def test_smac_sweeper_resource_limits(tmpdir: Path) -> None:
+    def sleep(cfg: DictConfig) -> float:
+        time.sleep(max(cfg.x0, 0))
+        return cfg.x0
+
+    def allocate(cfg: DictConfig) -> float:
+        return len(bytearray(int(cfg.x0 * 1024**2)))
+
+    isolation = ProcessIsolation(walltime_limit=2, memory_limit=1024)
+    assert isolation.run(functools.partial(sleep, OmegaConf.create({"x0": 0.1}))) == 0.1
+    start = time.time()
+    with pytest.raises(TrialTimeout):
+        isolation.run(functools.partial(sleep, OmegaConf.create({"x0": 60})))
+    assert time.time() - start < 10
+    with pytest.raises(TrialMemoryOut):
+        isolation.run(functools.partial(allocate, OmegaConf.create({"x0": 2048})))
+    with pytest.raises(ZeroDivisionError):
+        isolation.run(functools.partial(divmod, 1, 0))
+
+    # Processes started by a trial are killed with it
+    def spawn(cfg: DictConfig) -> float:
+        child = subprocess.Popen(["sleep", "60"])
+        Path(cfg.pid_file).write_text(str(child.pid))
+        time.sleep(60)
+        return 0.0
+
+    pid_file = Path(tmpdir) / "pid"
+    with pytest.raises(TrialTimeout):
+        isolation.run(functools.partial(spawn, OmegaConf.create({"pid_file": str(pid_file)})))
+    status = Path(f"/proc/{pid_file.read_text()}/status")
+    for _ in range(50):
+        if not status.exists() or "zombie" in status.read_text():
+            break
+        time.sleep(0.1)
+    assert not status.exists() or "zombie" in status.read_text()
+
+    # The worker state is loaded in the process of the trial instead of being sent to it
+    def lock(cfg: DictConfig) -> threading.Lock:
+        return threading.Lock()
+
+    def locked(cfg: DictConfig, worker_state: threading.Lock) -> float:
+        return float(worker_state.locked())
+
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0})
+    target_function = TargetFunction(
+        task_function=locked, config=config, worker_setup=WorkerSetup(lock, config), isolation=isolation
+    )
+    assert target_function(create_configspace_a().get_default_configuration()) == 0.0
+
+    # Trials exceeding the limits crash, the other trials are not affected
+    sweeper = create_quadratic_sweeper(Path(tmpdir), 6, search_space="tests/configspace_a.json")
+    sweeper.scenario = DictConfig({"seed": 1, "n_trials": 6, "deterministic": True, "trial_walltime_limit": 2})
+    sweeper.task_function = sleep
+    smac = sweeper.setup_smac()
+    assert smac.scenario.trial_walltime_limit is None
+    smac.optimize()
+    values = list(smac.runhistory.values())
+    crashed = [value for value in values if value.status == StatusType.CRASHED]
+    assert any("TrialTimeout" in value.additional_info["error"] for value in crashed)
+    assert all(value.cost == smac.scenario.crash_cost for value in crashed)
+    assert any(value.status == StatusType.SUCCESS for value in values)
 
 
 @mark.parametrize("n_workers", [1, 2])
@@ -246,3 +451,1077 @@ def test_smac_example(tmpdir: Path, n_workers: int) -> None:
     stats = runhistory["stats"]
     # Check if 10 runs have finished
     assert stats["finished"] == 10
+
+
+@mark.parametrize(
+    "value, expected",
+    [
+        (None, "null"),
+        (True, "true"),
+        (3, "3"),
+        (0.5, "0.5"),
+        ("adam", "'adam'"),
+        ("1", "'1'"),
+        ("it's", "'it\\'s'"),
+    ],
+)
+def test_format_override_value(value, expected: str) -> None:
+    assert format_override_value(value) == expected
+
+
+def test_trial_to_overrides() -> None:
+    cs = create_configspace_a()
+    config = cs.get_default_configuration()
+    overrides = trial_to_overrides(TrialInfo(config=config, seed=1, budget=5.0), budget_variable="epochs")
+    assert overrides == ["x0=-3.0", "x1=400.0", "++seed=1", "++epochs=5.0", "++instance=null"]
+
+
+def test_smac_example_with_launcher(tmpdir: Path) -> None:
+    seed = 123
+    cmd = [
+        "examples/blackbox_branin.py",
+        "hydra.run.dir=" + str(tmpdir),
+        "hydra.sweep.dir=" + str(tmpdir),
+        "hydra.sweeper.scenario.n_trials=6",
+        f"hydra.sweeper.scenario.seed={seed}",
+        "+hydra.sweeper.scenario.name=testrun",
+        "hydra.sweeper.scenario.n_workers=2",
+        "hydra.sweeper.use_launcher=true",
+        "hydra.sweeper.smac_kwargs.dask_client=null",
+        "--multirun",
+    ]
+    run_python_script(cmd, allow_warnings=True)
+    runhistory_fn = os.path.join(tmpdir, "smac3_output", "testrun", str(seed), "runhistory.json")
+    with open(runhistory_fn, "r") as file:
+        runhistory = json.load(file)
+    assert runhistory["stats"]["finished"] == 6
+    # Every trial was launched as a hydra job with its own output directory
+    for job_num in range(6):
+        assert os.path.isdir(os.path.join(tmpdir, str(job_num)))
+
+
+def test_job_return_to_trial_value() -> None:
+    def to_value(return_value, status=JobStatus.COMPLETED, objectives=None, crash_cost=1000.0):
+        job_return = JobReturn(overrides=[], status=status, _return_value=return_value)
+        return job_return_to_trial_value(job_return, crash_cost, 1.0, 3.0, objectives)
+
+    value = to_value((2.0, {"loss": 0.5}))
+    assert value.cost == 2.0 and value.status == StatusType.SUCCESS and value.additional_info == {"loss": 0.5}
+    assert value.time == 2.0
+
+    # Failed jobs are crashed trials with the exception of the job
+    value = to_value(RuntimeError("out of memory"), status=JobStatus.FAILED)
+    assert value.cost == 1000.0 and value.status == StatusType.CRASHED
+    assert "out of memory" in value.additional_info["error"] and "traceback" in value.additional_info
+
+    # Several objectives, by name or in order
+    objectives = ["loss", "time"]
+    assert to_value({"time": 2.0, "loss": 1.0}, objectives=objectives).cost == [1.0, 2.0]
+    assert to_value((1.0, 2.0), objectives=objectives).cost == [1.0, 2.0]
+    value = to_value({"loss": 1.0}, objectives=objectives, crash_cost=[1000.0, 1000.0])
+    assert value.status == StatusType.CRASHED and value.cost == [1000.0, 1000.0]
+
+    # Non-numeric and non-finite costs crash the trial, not the sweep
+    for return_value in ["abc", None, float("nan"), ("abc", {}), [1.0, "b"]]:
+        value = to_value(return_value)
+        assert value.status == StatusType.CRASHED and value.cost == 1000.0
+    assert "non-numeric" in to_value("abc").additional_info["error"]
+
+
+class InProcessLauncher(object):
+    """Stand-in for a hydra launcher, runs the jobs in the test process and records the job numbers."""
+
+    def __init__(self, failing_job: Union[int, None] = 1) -> None:
+        self.job_nums: list[int] = []
+        self.failing_job = failing_job
+
+    def launch(self, job_overrides: list[list[str]], initial_job_idx: int) -> list[JobReturn]:
+        job_returns = []
+        for i, overrides in enumerate(job_overrides):
+            self.job_nums.append(initial_job_idx + i)
+            values = dict(override.lstrip("+").split("=", 1) for override in overrides)
+            if initial_job_idx + i == self.failing_job:
+                job_returns.append(JobReturn(overrides=overrides, status=JobStatus.FAILED, _return_value=ValueError()))
+            else:
+                cost = float(values["x0"]) ** 2
+                job_returns.append(JobReturn(overrides=overrides, status=JobStatus.COMPLETED, _return_value=cost))
+        return job_returns
+
+
+def test_optimize_with_launcher(tmpdir: Path) -> None:
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 6, search_space="tests/configspace_a.json", use_launcher=True, batch_size=2
+    )
+    sweeper.launcher = InProcessLauncher()
+    smac = sweeper.setup_smac()
+    incumbent = sweeper.optimize_with_launcher(smac)
+
+    assert sweeper.launcher.job_nums == list(range(6))
+    assert len(smac.runhistory) == 6 and incumbent is not None
+    crashed = [value for value in smac.runhistory.values() if value.status == StatusType.CRASHED]
+    assert len(crashed) == 1 and crashed[0].cost == smac.scenario.crash_cost
+    for key, value in smac.runhistory.items():
+        if value.status == StatusType.SUCCESS:
+            assert value.cost == pytest.approx(smac.runhistory.get_config(key.config_id)["x0"] ** 2)
+
+    # A resumed sweep continues with the next job number instead of overwriting the job directories
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 8, search_space="tests/configspace_a.json", use_launcher=True, batch_size=2, resume=True
+    )
+    sweeper.launcher = InProcessLauncher()
+    smac = sweeper.setup_smac()
+    sweeper.optimize_with_launcher(smac)
+    assert sweeper.launcher.job_nums == [6, 7]
+
+
+def test_optimize_with_launcher_trial_cache(tmpdir: Path) -> None:
+    cache_kwargs = DictConfig({"path": str(Path(tmpdir) / "trial_cache.sqlite")})
+    runhistories = []
+    for run in ["first", "second"]:
+        sweeper = create_quadratic_sweeper(
+            Path(tmpdir) / run,
+            4,
+            search_space="tests/configspace_a.json",
+            use_launcher=True,
+            batch_size=2,
+            trial_cache=True,
+            trial_cache_kwargs=cache_kwargs,
+        )
+        sweeper.launcher = InProcessLauncher(failing_job=None)
+        smac = sweeper.setup_smac()
+        sweeper.optimize_with_launcher(smac)
+        runhistories.append(smac.runhistory)
+        sweeper.cache.close()
+
+    # The second run asks the same trials and finds all of them in the cache
+    assert sweeper.launcher.job_nums == []
+    first, second = [{(key.config_id, key.seed): value.cost for key, value in rh.items()} for rh in runhistories]
+    assert len(second) == 4 and second == first
+
+
+def quadratic(cfg: DictConfig) -> float:
+    return cfg.x0**2
+
+
+def test_ask_tell_driver(tmpdir: Path) -> None:
+    sweeper = SMACSweeperBackend(
+        search_space="tests/configspace_a.json",
+        scenario=DictConfig({"seed": 1, "n_trials": 8, "n_workers": 2, "deterministic": True}),
+        async_ask_tell=True,
+    )
+    sweeper.config = OmegaConf.create({"hydra": {"sweep": {"dir": str(tmpdir)}}, "x0": 0.0, "x1": 400.0})
+    sweeper.task_function = quadratic
+    smac = sweeper.setup_smac()
+    # The sweeper dispatches the trials, SMAC runs them serially
+    assert smac.scenario.n_workers == 1
+    assert sweeper.max_in_flight == 2
+    assert sweeper.batch_size == 1
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        driver = AskTellDriver(smac=smac, executor=executor, max_in_flight=2, batch_size=2)
+        incumbent = driver.run()
+
+    assert incumbent is not None
+    assert smac.runhistory.finished == 8
+    assert driver.stats["trials"] == 8
+    assert 0 <= driver.stats["utilisation"] <= 1
+
+
+def test_async_ask_tell_cleanup(tmpdir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    sweeper = create_quadratic_sweeper(Path(tmpdir), 4, search_space="tests/configspace_a.json", async_ask_tell=True)
+    sweeper.launcher = "dummy"
+    sweeper.hydra_context = "dummy"
+
+    def fail(trial_info: TrialInfo) -> Future:
+        raise RuntimeError("submission failed")
+
+    # The plugin discovery may have reloaded the plugin modules, the sweeper is patched instead of the driver
+    monkeypatch.setattr(sweeper, "wrap_submit", lambda submit, closing=None: fail)
+    with Client(n_workers=1, processes=False) as client:
+        setup_smac = sweeper.setup_smac
+
+        def setup_with_client() -> HyperparameterOptimizationFacade:
+            # As if the user passed the client in `smac_kwargs.dask_client`
+            smac = setup_smac()
+            sweeper.dask_client = client
+            return smac
+
+        monkeypatch.setattr(sweeper, "setup_smac", setup_with_client)
+        with pytest.raises(RuntimeError, match="submission failed"):
+            sweeper.sweep([])
+        # The runner is removed from the workers, the client of the user stays open
+        assert client.status == "running"
+        plugins = client.run(lambda dask_worker: list(dask_worker.plugins))
+        assert not any(name.startswith("hydra-smac-sweeper") for names in plugins.values() for name in names)
+
+
+def test_shared_runner(tmpdir: Path) -> None:
+    sweeper = SMACSweeperBackend(
+        search_space="tests/configspace_a.json",
+        scenario=DictConfig({"seed": 1, "n_trials": 6, "deterministic": True}),
+        async_ask_tell=True,
+    )
+    # A large config must not be sent with every trial
+    files = [f"/data/shard-{i:06d}.parquet" for i in range(10000)]
+    sweeper.config = OmegaConf.create(
+        {"hydra": {"sweep": {"dir": str(tmpdir)}}, "x0": 0.0, "x1": 400.0, "dataset": {"files": files}}
+    )
+    sweeper.task_function = quadratic
+    smac = sweeper.setup_smac()
+
+    with LocalCluster(n_workers=2, threads_per_worker=1, processes=False, dashboard_address=None) as cluster:
+        with Client(cluster) as client:
+            shared = SharedRunner(client, smac._runner)
+            info = smac.ask()
+            assert shared.submission_bytes(info) < 1000 < shared.runner_bytes
+            _, value = shared.submit(info).result()
+            assert value.cost == info.config["x0"] ** 2 and value.status == StatusType.SUCCESS
+            smac.tell(info, value)
+
+            driver = AskTellDriver(smac=smac, executor=client, max_in_flight=2, submit=shared.submit)
+            driver.run()
+            shared.close()
+
+            runner = SharedDaskParallelRunner(DaskParallelRunner(single_worker=smac._runner, dask_client=client))
+            runner.submit_trial(info)
+            runner.wait()
+            # A finished trial which was not processed yet does not block
+            runner.wait()
+            [(result_info, result_value)] = list(runner.iter_results())
+            assert result_info is info and result_value.cost == value.cost
+            runner.close()
+
+    assert smac.runhistory.finished == 6
+
+
+def crashing_quadratic(cfg: DictConfig) -> float:
+    if cfg.x0 > 0:
+        os._exit(1)
+    return cfg.x0**2
+
+
+def test_process_pool_runner(tmpdir: Path) -> None:
+    sweeper = SMACSweeperBackend(
+        search_space="tests/configspace_a.json",
+        scenario=DictConfig({"seed": 1, "n_trials": 8, "n_workers": 2, "deterministic": True}),
+        process_pool=True,
+    )
+    sweeper.config = OmegaConf.create({"hydra": {"sweep": {"dir": str(tmpdir)}}, "x0": 0.0, "x1": 400.0})
+    sweeper.task_function = quadratic
+    smac = sweeper.setup_smac()
+    assert isinstance(smac._runner, ProcessPoolRunner) and smac._runner.count_available_workers() == 2
+    assert smac.scenario.n_workers == 1
+    smac.optimize()
+    smac._runner.close()
+    assert smac.runhistory.finished == 8
+
+    # A dying worker process crashes its trial, the pool is restarted for the next one
+    sweeper.task_function = crashing_quadratic
+    runner = ProcessPoolRunner(sweeper.setup_smac()._runner._single_worker, n_workers=1)
+    for x0 in [1.0, -1.0]:
+        config = Configuration(smac.scenario.configspace, values={"x0": x0, "x1": 400.0})
+        runner.submit_trial(TrialInfo(config=config, seed=1))
+        runner.wait()
+    results = list(runner.iter_results())
+    runner.close()
+    assert [value.status for _, value in results] == [StatusType.CRASHED, StatusType.SUCCESS]
+    assert results[1][1].cost == 1.0
+
+    # A forced close does not wait for the running trials and leaves no worker processes behind
+    sweeper.config.delay = 60.0
+    sweeper.task_function = sleeping_quadratic
+    runner = ProcessPoolRunner(sweeper.setup_smac()._runner._single_worker, n_workers=2)
+    runner.submit_trial(TrialInfo(config=smac.scenario.configspace.get_default_configuration(), seed=1))
+    processes = list(runner.executor._processes.values())
+    start = time.time()
+    runner.close(force=True)
+    assert time.time() - start < 30.0
+    assert len(processes) > 0 and not any(process.is_alive() for process in processes)
+    runner.wait()
+    [(_, value)] = list(runner.iter_results())
+    assert value.status == StatusType.CRASHED
+
+    with pytest.raises(ValueError):
+        SMACSweeperBackend(
+            search_space="tests/configspace_a.json", scenario=DictConfig({}), process_pool=True, use_launcher=True
+        )
+
+
+def test_launcher_and_async_ask_tell_error() -> None:
+    with pytest.raises(ValueError):
+        SMACSweeperBackend(
+            search_space="tests/configspace_a.json",
+            scenario=DictConfig({}),
+            use_launcher=True,
+            async_ask_tell=True,
+        )
+
+
+def create_conditional_configspace() -> ConfigurationSpace:
+    cs = ConfigurationSpace()
+    solver = CategoricalHyperparameter("solver", ["sgd", "adam"])
+    lr = UniformFloatHyperparameter("optimizer.lr", lower=0.001, upper=1.0)
+    cs.add_hyperparameters([solver, lr])
+    cs.add_condition(EqualsCondition(lr, solver, "sgd"))
+    return cs
+
+
+def test_target_function_materialize() -> None:
+    cs = create_conditional_configspace()
+    config = OmegaConf.create(
+        {
+            "hydra": {"job": {"num": 0}},
+            "solver": "adam",
+            "optimizer": {"lr": 0.1, "scaled_lr": "${mul:${optimizer.lr}}"},
+            "budget_variable": "epochs",
+        }
+    )
+    OmegaConf.set_struct(config, True)
+    target_function = TargetFunction(task_function=quadratic, config=config)
+
+    cfg = target_function.materialize(
+        Configuration(cs, {"solver": "sgd", "optimizer.lr": 0.5}), seed=3, budget=10.0, instance="a"
+    )
+    assert cfg.solver == "sgd"
+    assert cfg.optimizer.lr == 0.5
+    assert cfg.seed == 3
+    assert cfg.epochs == 10.0
+    assert cfg.instance == "a"
+    assert cfg.hydra.job.num == 0
+    # Interpolations still point into the trial's config
+    assert cfg.optimizer._get_node("scaled_lr")._value() == "${mul:${optimizer.lr}}"
+
+    # Inactive hyperparameters are reset to the value of the original config
+    cfg = target_function.materialize(Configuration(cs, {"solver": "adam"}), seed=4)
+    assert cfg.optimizer.lr == 0.1
+    assert cfg.hydra.job.num == 1
+
+    # The original config is never modified
+    assert config.solver == "adam"
+    assert "seed" not in config
+
+
+def test_target_function_thread_safety() -> None:
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0})
+
+    def task_function(cfg: DictConfig) -> tuple[float, int]:
+        x0 = cfg.x0
+        time.sleep(0.01)
+        # Another trial must not have changed our config in the meantime
+        assert cfg.x0 == x0
+        return x0, cfg.hydra.job.num
+
+    target_function = TargetFunction(task_function=task_function, config=config)
+    configs = cs.sample_configuration(16)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(target_function, configs))
+
+    assert [x0 for x0, _ in results] == [c["x0"] for c in configs]
+    assert sorted(job_num for _, job_num in results) == list(range(16))
+
+
+def test_target_function_kept_config() -> None:
+    cs = ConfigurationSpace(seed=0)
+    cs.add_hyperparameter(UniformFloatHyperparameter("model.lr", 1e-4, 1.0))
+    kept: list[tuple[DictConfig, DictConfig]] = []
+
+    def task_function(cfg: DictConfig) -> float:
+        # Only parts of the config escape the trial, e.g. into a logger
+        kept.append((cfg.model, cfg.hydra.job))
+        return cfg.model.lr
+
+    target_function = TargetFunction(
+        task_function=task_function, config=OmegaConf.create({"model": {"lr": 0.1, "layers": 2}})
+    )
+    configs = cs.sample_configuration(3)
+    for config in configs:
+        target_function(config)
+    # Kept sub-configs do not change with the following trials
+    assert [model.lr for model, _ in kept] == [config["model.lr"] for config in configs]
+    assert [job.num for _, job in kept] == [0, 1, 2]
+
+
+def test_target_function_pickle() -> None:
+    target_function = TargetFunction(task_function=quadratic, config=OmegaConf.create({"x0": 0.0, "x1": 400.0}))
+    target_function(create_configspace_a().get_default_configuration())
+    # Uses the pickle protocol, the plugin module might have been reloaded by the plugin discovery
+    restored = copy.deepcopy(target_function)
+    assert restored.job_num == 1
+    assert restored(create_configspace_a().get_default_configuration()) == 9.0
+
+
+def test_trial_cache(tmpdir: Path) -> None:
+    cache = TrialCache(path=Path(tmpdir) / "cache.sqlite", max_entries=2)
+    assert cache.get("a") == (False, None)
+    cache.put("a", 1.0)
+    cache.put("b", (2.0, {"info": 1}))
+    assert cache.get("a") == (True, 1.0)
+    # "b" is the least recently used result and gets evicted
+    cache.put("c", 3.0)
+    assert len(cache) == 2
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3.0)
+    assert cache.stats == {"hits": 2, "misses": 2}
+
+    # The cache is persistent and can be shared with other processes
+    restored = copy.deepcopy(cache)
+    assert restored.get("a") == (True, 1.0)
+    assert cache.stats["hits"] == 3
+
+
+def test_target_function_cache(tmpdir: Path) -> None:
+    calls = []
+
+    def task_function(cfg: DictConfig) -> float:
+        calls.append(cfg.x0)
+        return cfg.x0
+
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0, "lr": 0.1})
+    cache = TrialCache(path=Path(tmpdir) / "cache.sqlite")
+    target_function = TargetFunction(task_function=task_function, config=config, cache=cache)
+    default = cs.get_default_configuration()
+    assert target_function(default, seed=1) == -3.0
+    assert target_function(default, seed=1) == -3.0
+    assert len(calls) == 1
+    # Other seeds or configs are different trials
+    target_function(default, seed=2)
+    assert len(calls) == 2
+
+    # The key contains the config the task function runs with
+    other_target_function = TargetFunction(
+        task_function=task_function, config=OmegaConf.create({"x0": 0.0, "x1": 400.0, "lr": 0.2}), cache=cache
+    )
+    other_target_function(default, seed=1)
+    assert len(calls) == 3
+    assert target_function.target_identity != other_target_function.target_identity
+    assert get_trial_key(default, seed=1) != get_trial_key(default, seed=1, budget=1.0)
+
+
+def test_worker_setup(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def load_data(cfg: DictConfig) -> list[float]:
+        calls.append(cfg.x1)
+        time.sleep(0.1)
+        return [cfg.x1]
+
+    def task_function(cfg: DictConfig, worker_state: list[float]) -> float:
+        return cfg.x0 + worker_state[0]
+
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0, "lr": 0.1})
+    target_function = TargetFunction(
+        task_function=task_function, config=config, worker_setup=WorkerSetup(load_data, config)
+    )
+    # The setup runs once for all trials and threads of the process
+    configs = cs.sample_configuration(8)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(target_function, configs))
+    assert len(calls) == 1
+    assert results == [c["x0"] + 400.0 for c in configs]
+
+    # States are released when the available memory is low and the setup runs again
+    low_memory = WorkerSetup(load_data, config, min_available_memory=0.5)
+    monkeypatch.setattr(_worker_setup, "get_available_memory", lambda: 0.1)
+    WorkerTask(task_function, low_memory)(config)
+    assert len(_worker_setup._states) == 0
+    WorkerTask(task_function, low_memory)(config)
+    # The state of the first setup was reused, it has the same function and config
+    assert len(calls) == 2
+
+    with pytest.raises(ValueError):
+        WorkerSetup(load_data, config, min_available_memory=1.5)
+    assert not accepts_worker_state(quadratic)
+    sweeper = create_quadratic_sweeper(Path("unused"), 1, search_space="tests/configspace_a.json")
+    sweeper.worker_setup = "tests.test_hydra_smac_sweeper_plugin.quadratic"
+    with pytest.raises(ValueError):
+        sweeper.get_worker_setup()
+
+
+def test_checkpoints(tmpdir: Path) -> None:
+    calls = []
+
+    def task_function(cfg: DictConfig) -> float:
+        calls.append((cfg.checkpoint_dir, cfg.previous_budget))
+        return cfg.x0
+
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0, "lr": 0.1, "epochs": 1, "budget_variable": "epochs"})
+    checkpoints = Checkpoints(path=Path(tmpdir) / "checkpoints")
+    target_function = TargetFunction(task_function=task_function, config=config, checkpoints=checkpoints)
+    default = cs.get_default_configuration()
+    for budget in [5.0, 15.0, 45.0]:
+        target_function(default, seed=1, budget=budget)
+    # The configuration continues in the same directory from the previous rung
+    assert [previous_budget for _, previous_budget in calls] == [None, 5.0, 15.0]
+    assert len({checkpoint_dir for checkpoint_dir, _ in calls}) == 1
+    assert Path(calls[0][0]).is_dir()
+
+    # Checkpoints trained with a larger budget are not continued, the trial replaces the checkpoint
+    target_function(default, seed=1, budget=15.0)
+    assert calls[-1][1] is None
+    assert checkpoints.get_previous_budget(Path(calls[0][0])) == 15.0
+    target_function(default, seed=1, budget=45.0)
+    assert calls[-1][1] == 15.0
+    # Other seeds start from scratch
+    target_function(default, seed=2, budget=15.0)
+    assert calls[-1][0] != calls[0][0]
+    assert calls[-1][1] is None
+
+
+def create_quadratic_sweeper(sweep_dir: Path, n_trials: int, **kwargs) -> SMACSweeperBackend:
+    sweeper = SMACSweeperBackend(
+        scenario=DictConfig({"seed": 1, "n_trials": n_trials, "deterministic": True}),
+        **kwargs,
+    )
+    sweeper.config = OmegaConf.create({"hydra": {"sweep": {"dir": str(sweep_dir)}}, "x0": 0.0, "x1": 400.0})
+    sweeper.task_function = quadratic
+    return sweeper
+
+
+def test_resume(tmpdir: Path) -> None:
+    sweep_dir = Path(tmpdir) / "a"
+    smac = create_quadratic_sweeper(sweep_dir, 10, search_space="tests/configspace_a.json").setup_smac()
+    smac.optimize()
+
+    # The budget is increased, SMAC continues with the old runhistory
+    sweeper = create_quadratic_sweeper(sweep_dir, 14, search_space="tests/configspace_a.json", resume=True)
+    smac = sweeper.setup_smac()
+    assert smac.runhistory.finished == 10
+    assert smac.intensifier.get_incumbent() is not None
+    assert len(smac.intensifier.config_selector._initial_design_configs) == 0
+    smac.optimize()
+    assert smac.runhistory.finished == 14
+
+    # Without an old run, resuming starts a new run
+    smac = create_quadratic_sweeper(Path(tmpdir) / "b", 4, search_space="tests/configspace_a.json", resume=True)
+    assert smac.setup_smac().runhistory.finished == 0
+
+
+def quadratic_curve(cfg: DictConfig) -> float:
+    # The cost approaches the final cost over 10 steps
+    for step in range(1, 11):
+        report(cfg.x0**2 * (1 + 1 / step), step)
+    return cfg.x0**2
+
+
+def test_early_stopping(tmpdir: Path) -> None:
+    rule = MedianStoppingRule(path=Path(tmpdir) / "curves.sqlite", min_trials=2, min_step=2)
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0, "lr": 0.1})
+    target_function = TargetFunction(task_function=quadratic_curve, config=config, early_stopping=rule)
+    assert target_function(Configuration(cs, {"x0": 1.0, "x1": 400.0})) == 1.0
+    assert target_function(Configuration(cs, {"x0": 2.0, "x1": 400.0})) == 4.0
+    assert len(rule) == 2
+    # Worse than the median at the first step it can be stopped at
+    assert target_function(Configuration(cs, {"x0": 100.0, "x1": 400.0})) == (15000.0, {EARLY_STOPPED_KEY: 2})
+    assert target_function(Configuration(cs, {"x0": 0.5, "x1": 400.0})) == 0.25
+    # Only the curves of trials which were not stopped are compared
+    assert len(rule) == 3
+    # Outside of the sweeper, reporting does nothing
+    assert quadratic_curve(config) == 0.0
+
+    # Trials are compared with the average cost up to a step of the trials which reported it
+    rule = MedianStoppingRule(path=Path(tmpdir) / "steps.sqlite", min_trials=1)
+    rule.add_curve("a", [(2.0, 1.0), (1.0, 3.0)])
+    assert rule.should_stop(2.5, 2.0) and not rule.should_stop(1.5, 2.0)
+    assert not rule.should_stop(100.0, 1.5)
+
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir) / "sweep", 20, search_space="tests/configspace_a.json", early_stopping=True
+    )
+    sweeper.task_function = quadratic_curve
+    smac = sweeper.setup_smac()
+    smac.optimize()
+    stopped = [value for value in smac.runhistory.values() if EARLY_STOPPED_KEY in value.additional_info]
+    assert 0 < len(stopped) < 20
+    assert (Path(tmpdir) / "sweep" / "learning_curves.sqlite").exists()
+
+
+def test_early_stopping_checkpoints(tmpdir: Path) -> None:
+    def train(cfg: DictConfig) -> float:
+        checkpoint = Path(cfg.checkpoint_dir) / "epoch.txt"
+        start = int(checkpoint.read_text()) if cfg.previous_budget is not None else 0
+        for epoch in range(start + 1, int(cfg.epochs) + 1):
+            checkpoint.write_text(str(epoch))
+            report(cfg.x0**2 + 1 / epoch, epoch)
+        return cfg.x0**2 + 1 / cfg.epochs
+
+    rule = MedianStoppingRule(path=Path(tmpdir) / "curves.sqlite", min_trials=1)
+    checkpoints = Checkpoints(path=Path(tmpdir) / "checkpoints")
+    cs = create_configspace_a()
+    config = OmegaConf.create({"x0": 0.0, "x1": 400.0, "epochs": 1, "budget_variable": "epochs"})
+    target_function = TargetFunction(task_function=train, config=config, checkpoints=checkpoints, early_stopping=rule)
+    target_function(Configuration(cs, {"x0": 1.0, "x1": 400.0}), seed=1, budget=9.0)
+
+    bad = Configuration(cs, {"x0": 10.0, "x1": 400.0})
+    directory = checkpoints.get_directory(bad, seed=1, target_identity=target_function.target_identity)
+    assert target_function(bad, seed=1, budget=3.0) == (101.0, {EARLY_STOPPED_KEY: 1})
+    # The stopped trial saved its checkpoint at the step it reached, the next rung continues from there
+    assert checkpoints.get_previous_budget(directory, 9.0) == 1.0
+    assert target_function(bad, seed=1, budget=9.0) == (100.5, {EARLY_STOPPED_KEY: 2})
+    assert (directory / "epoch.txt").read_text() == "2"
+    assert checkpoints.get_previous_budget(directory, 9.0) == 2.0
+
+
+def test_warm_start(tmpdir: Path) -> None:
+    sweep_dir = Path(tmpdir) / "a"
+    smac = create_quadratic_sweeper(sweep_dir, 10, search_space="tests/configspace_a.json").setup_smac()
+    smac.optimize()
+    n_compatible = sum(config["x0"] <= 0 for config in smac.runhistory.get_configs())
+
+    # Only configurations which are valid in the new search space are imported
+    cs = ConfigurationSpace()
+    cs.add_hyperparameters(
+        [
+            UniformFloatHyperparameter(lower=-512, upper=0, default_value=-3, log=False, name="x0"),
+            UniformFloatHyperparameter(lower=335, upper=512, default_value=400, log=True, name="x1"),
+        ]
+    )
+    sweeper = create_quadratic_sweeper(Path(tmpdir) / "b", 3, search_space=cs, warm_start_from=str(sweep_dir))
+    smac = sweeper.setup_smac()
+    assert smac.runhistory.finished == n_compatible
+    assert all(config.origin == "Warm Start" for config in smac.runhistory.get_configs())
+    # Prior observations do not count towards the budget
+    assert smac.scenario.n_trials == 3 + n_compatible
+    smac.optimize()
+    assert smac.runhistory.finished == 3 + n_compatible
+
+
+def wait_for_workers(cluster: LocalCluster, n_workers: int, timeout: float = 30.0) -> None:
+    start = time.time()
+    while len(cluster.scheduler_info["workers"]) != n_workers:
+        assert time.time() - start < timeout
+        time.sleep(0.05)
+
+
+def test_elastic_scaler() -> None:
+    cluster = LocalCluster(n_workers=1, processes=False, threads_per_worker=1, dashboard_address=None)
+    scaler = ElasticScaler(cluster, min_jobs=1, max_jobs=3, cooldown=0.2, interval=0.05)
+    scaler.adaptive.demand = 2
+    wait_for_workers(cluster, 2)
+    # The demand is capped by max_jobs
+    scaler.adaptive.demand = 10
+    wait_for_workers(cluster, 3)
+    scaler.adaptive.demand = 0
+    wait_for_workers(cluster, 1)
+    scaler.close()
+    assert cluster.status.name == "closed"
+
+    with pytest.raises(ValueError):
+        ElasticScaler(cluster, min_jobs=2, max_jobs=1)
+
+
+def test_estimate_demand(tmpdir: Path) -> None:
+    smac = create_quadratic_sweeper(Path(tmpdir), 5, search_space="tests/configspace_a.json").setup_smac()
+    assert estimate_demand(smac.optimizer) == 5
+    info = smac.ask()
+    smac.ask()
+    # Running trials count as demand, too
+    assert estimate_demand(smac.optimizer) == 5
+    smac.tell(info, TrialValue(cost=0.0))
+    assert estimate_demand(smac.optimizer) == 4
+
+
+def test_attach_profile() -> None:
+    assert attach_profile(1.0, {"task_time": 1.0}) == (1.0, {PROFILE_KEY: {"task_time": 1.0}})
+    assert attach_profile((1.0, {"a": 1}), {}) == (1.0, {"a": 1, PROFILE_KEY: {}})
+
+
+def test_profiling(tmpdir: Path) -> None:
+    sweeper = create_quadratic_sweeper(Path(tmpdir), 5, search_space="tests/configspace_a.json", profiling=True)
+    smac = sweeper.setup_smac()
+    smac.optimize()
+
+    with open(Path(tmpdir) / "trial_profile.jsonl") as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == 5
+    for record in records:
+        assert record["asked"] <= record["dispatched"] <= record["started"] <= record["finished"] <= record["told"]
+        assert record["materialize_time"] >= 0
+        assert record["payload_bytes"] == 0
+        assert "worker" in record
+    # The measurements are not stored in the runhistory
+    assert all(PROFILE_KEY not in value.additional_info for value in smac.runhistory.values())
+    assert "Task function" in sweeper.profiler.summary()
+
+
+def test_trial_log(tmpdir: Path) -> None:
+    path = Path(tmpdir) / "trials.jsonl"
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir),
+        5,
+        search_space="tests/configspace_a.json",
+        trial_log=True,
+        trial_log_kwargs=DictConfig({"sync_every": 2}),
+    )
+    smac = sweeper.setup_smac()
+    smac.optimize()
+
+    records = list(read_trial_log(path))
+    assert len(records) == sweeper.trial_logger.n_records == 5
+    for record, (key, value) in zip(records, smac.runhistory.items()):
+        config = smac.runhistory.get_config(key.config_id)
+        assert record["config_id"] == key.config_id and record["config"] == dict(config)
+        assert record["cost"] == value.cost and record["status"] == "SUCCESS"
+        assert record["starttime"] <= record["endtime"]
+
+    # A partially written record at the end is skipped
+    with open(path, "a") as file:
+        file.write('{"config_id": 6, "con')
+    assert len(list(read_trial_log(path))) == 5
+
+    # The trials of a resumed run are not written again
+    path.write_text("")
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 7, search_space="tests/configspace_a.json", resume=True, trial_log=True
+    )
+    sweeper.setup_smac().optimize()
+    assert len(list(read_trial_log(path))) == 2
+
+
+def scrape(text: str) -> dict[str, float]:
+    """Samples of a Prometheus text exposition, like a scraper would read them."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics(tmpdir: Path) -> None:
+    path = Path(tmpdir) / "metrics.prom"
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 5, search_space="tests/configspace_a.json", metrics=True, metrics_kwargs=DictConfig({"port": 0})
+    )
+    smac = sweeper.setup_smac()
+    metrics = sweeper.sweep_metrics
+    assert isinstance(metrics, SweepMetrics) and metrics.path == path
+    metrics.on_start(smac.optimizer)
+
+    def get() -> dict[str, float]:
+        with urllib.request.urlopen(metrics.url, timeout=10) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            return scrape(response.read().decode())
+
+    # A trial is queued until it is dispatched and running until it is told
+    info = smac.ask()
+    samples = get()
+    assert samples["smac_sweeper_trials_asked_total"] == 1 and samples["smac_sweeper_trials_queued"] == 1
+    metrics.dispatched(info)
+    samples = get()
+    assert samples["smac_sweeper_trials_queued"] == 0 and samples["smac_sweeper_trials_running"] == 1
+    smac.tell(info, TrialValue(cost=2.0))
+    smac.tell(smac.ask(), TrialValue(cost=1000.0, status=StatusType.CRASHED))
+
+    samples = get()
+    assert samples["smac_sweeper_trials_completed_total"] == 2 and samples["smac_sweeper_trials_failed_total"] == 1
+    assert samples["smac_sweeper_trials_running"] == samples["smac_sweeper_trials_queued"] == 0
+    assert samples['smac_sweeper_incumbent_cost{objective="cost"}'] == 2.0
+    assert samples["smac_sweeper_trials_per_minute"] > 0 and samples["smac_sweeper_ask_seconds_count"] == 2
+
+    # The endpoint is stopped and the final metrics are written to the file at the end
+    url = metrics.url
+    metrics.on_end(smac.optimizer)
+    assert metrics.url is None
+    with pytest.raises(OSError):
+        urllib.request.urlopen(url, timeout=1)
+    assert scrape(path.read_text())["smac_sweeper_trials_completed_total"] == 2
+
+
+def test_results(tmpdir: Path) -> None:
+    sweeper = create_quadratic_sweeper(Path(tmpdir), 6, search_space="tests/configspace_a.json", trial_log=True)
+    smac = sweeper.setup_smac()
+    smac.optimize()
+
+    results = runhistory_to_frame(smac.runhistory)
+    assert len(results) == 6
+    assert list(results.columns[:4]) == ["config_id", "x0", "x1", "cost"]
+    assert (results["cost"] == results["x0"] ** 2).all() and (results["status"] == "SUCCESS").all()
+    assert (results["retries"] == 0).all()
+    # Read from the trial log and from the runhistory of the sweep directory
+    pd.testing.assert_frame_equal(load_results(tmpdir), results)
+    (Path(tmpdir) / "trials.jsonl").unlink()
+    pd.testing.assert_frame_equal(load_results(tmpdir), results)
+
+    best = top_k(results, 2)
+    assert list(best["cost"]) == sorted(results["cost"])[:2]
+    assert aggregate_by_budget(results)["count"].sum() == 6
+
+    costs = np.array([[1.0, 4.0], [2.0, 2.0], [3.0, 3.0], [4.0, 1.0], [2.0, 2.0], [5.0, 0.5]])
+    assert list(non_dominated(costs)) == [True, True, False, True, True, True]
+    frame = pd.DataFrame(costs, columns=["cost_0", "cost_1"])
+    assert len(pareto_front(frame)) == 5
+    # A single objective has a single optimum
+    assert list(pareto_front(results)["cost"]) == [results["cost"].min()]
+
+
+def two_quadratics(cfg: DictConfig) -> dict[str, float]:
+    return {"b": (cfg.x0 - 100) ** 2, "a": cfg.x0**2}
+
+
+def test_multi_objective(tmpdir: Path) -> None:
+    assert normalize_result({"b": 2, "a": 1}, ["a", "b"]) == [1.0, 2.0]
+    assert normalize_result(((1, 2), {"info": 0}), ["a", "b"]) == ([1.0, 2.0], {"info": 0})
+    assert normalize_result({"cost": 3}, ["cost"]) == 3.0
+    assert normalize_result((3.0, 1), ["cost"]) == (3.0, 1)
+    with pytest.raises(ValueError):
+        normalize_result({"a": 1}, ["a", "b"])
+    with pytest.raises(ValueError):
+        normalize_result([1, 2, 3], ["a", "b"])
+
+    sweeper = SMACSweeperBackend(
+        search_space="tests/configspace_a.json",
+        scenario=DictConfig({"seed": 1, "n_trials": 12, "deterministic": True, "objectives": ["a", "b"]}),
+    )
+    sweeper.config = OmegaConf.create({"hydra": {"sweep": {"dir": str(tmpdir)}}, "x0": 0.0, "x1": 400.0})
+    sweeper.task_function = two_quadratics
+    smac = sweeper.setup_smac()
+    incumbents = smac.optimize()
+    assert all(value.status == StatusType.SUCCESS for value in smac.runhistory.values())
+
+    # The incrementally updated front matches the front of all trials
+    results = runhistory_to_frame(smac.runhistory)
+    front = pareto_front(results)
+    assert len(sweeper.pareto.front) == len(front) > 0
+    assert sorted(sweeper.pareto.front.costs[:, 0]) == sorted(front["cost_0"])
+    assert {smac.runhistory.get_config_id(config) for config in incumbents} <= set(front["config_id"])
+
+
+def batched_quadratic(cfg: DictConfig) -> np.ndarray:
+    x0 = np.asarray(cfg.x0)
+    return np.where(x0 > 500, np.nan, x0**2)
+
+
+def test_batch_evaluation(tmpdir: Path) -> None:
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 20, search_space="tests/configspace_a.json", batch_evaluation=True, batch_size=8
+    )
+    sweeper.task_function = batched_quadratic
+    smac = sweeper.setup_smac()
+    assert sweeper.batch_size == 8
+    incumbent = sweeper.optimize_batched(smac)
+
+    assert smac.runhistory.finished == 20
+    for key, value in smac.runhistory.items():
+        x0 = smac.runhistory.get_config(key.config_id)["x0"]
+        if x0 > 500:
+            assert value.status == StatusType.CRASHED
+        else:
+            assert value.status == StatusType.SUCCESS and value.cost == pytest.approx(x0**2)
+    assert incumbent is not None
+
+    # The batch shares one config with a list per hyperparameter
+    infos = [smac.ask() for _ in range(3)]
+    cfg = sweeper.target_function.materialize_batch(infos)
+    assert list(cfg.x0) == [info.config["x0"] for info in infos] and len(cfg.seed) == 3
+
+    values = batch_result_to_trial_values({"a": [1, 2], "b": [3, 4]}, 2, ["a", "b"], np.inf, 0.0, 1.0)
+    assert [value.cost for value in values] == [[1.0, 3.0], [2.0, 4.0]]
+    with pytest.raises(ValueError):
+        batch_result_to_trial_values([1.0, 2.0], 3, ["cost"], np.inf, 0.0, 1.0)
+    with pytest.raises(ValueError):
+        create_quadratic_sweeper(Path(tmpdir), 2, search_space={}, batch_evaluation=True, trial_cache=True)
+
+    # SMAC's intensifier retries often enough to fill a batch larger than its default number of retries
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir) / "large", 40, search_space="tests/configspace_a.json", batch_evaluation=True, batch_size=32
+    )
+    sweeper.task_function = batched_quadratic
+    smac = sweeper.setup_smac()
+    sweeper.optimize_batched(smac)
+    assert smac.runhistory.finished == 40
+
+
+def test_trial_resources(tmpdir: Path) -> None:
+    configspace = search_space_to_config_space("tests/configspace_a.json")
+    resources = TrialResources({"memory": "4 if x0 > 0 else 1", "gpus": {1: 0, 9: 1}, "slots": 1})
+    small = Configuration(configspace, {"x0": -1.0, "x1": 400.0})
+    large = Configuration(configspace, {"x0": 1.0, "x1": 400.0})
+    assert resources(TrialInfo(config=small, budget=3)) == {"memory": 1.0, "gpus": 0.0, "slots": 1.0}
+    assert resources(TrialInfo(config=large, budget=27)) == {"memory": 4.0, "gpus": 1.0, "slots": 1.0}
+    # Below the smallest budget of the table, its first entry applies
+    assert resources(TrialInfo(config=large, budget=0.5))["gpus"] == 0.0
+    with pytest.raises(ValueError):
+        resources(TrialInfo(config=small))
+    with pytest.raises(ValueError):
+        TrialResources({"memory": "4 if"})
+
+    # Dotted hyperparameters, i.e. nested keys of the config, are attributes
+    nested = ConfigurationSpace()
+    nested.add_hyperparameters(
+        [
+            UniformIntegerHyperparameter("model.width", lower=1, upper=64),
+            UniformIntegerHyperparameter("model.encoder.depth", lower=1, upper=8),
+            UniformFloatHyperparameter("lr", lower=0.001, upper=1.0),
+        ]
+    )
+    config = Configuration(nested, {"model.width": 16, "model.encoder.depth": 3, "lr": 0.1})
+    resources = TrialResources({"memory": "model.width * model.encoder.depth", "slots": "1 if lr < 0.5 else 2"})
+    assert resources(TrialInfo(config=config)) == {"memory": 48.0, "slots": 1.0}
+
+    sweeper = create_quadratic_sweeper(
+        Path(tmpdir), 4, search_space="tests/configspace_a.json", trial_resources=DictConfig({"memory": 1})
+    )
+    # SMAC's own local cluster does not provide the resources
+    with pytest.raises(ValueError):
+        sweeper.setup_smac()
+    with pytest.raises(ValueError):
+        create_quadratic_sweeper(Path(tmpdir), 4, search_space={}, process_pool=True, trial_resources={"memory": 1})
+
+    smac = create_quadratic_sweeper(Path(tmpdir), 4, search_space="tests/configspace_a.json").setup_smac()
+    with LocalCluster(
+        n_workers=1, threads_per_worker=2, processes=False, dashboard_address=None, resources={"memory": 4}
+    ) as cluster:
+        with Client(cluster) as client:
+            resources = TrialResources({"memory": "4 if x0 > 0 else 1"})
+            assert resources.missing(client) == []
+            assert TrialResources({"gpus": 1}).missing(client) == ["gpus"]
+            shared = SharedRunner(client, smac._runner, resources=resources)
+            future = shared.submit(TrialInfo(config=large))
+            _, value = future.result()
+            assert value.cost == 1.0
+            restrictions = client.run_on_scheduler(
+                lambda dask_scheduler: dask_scheduler.tasks[future.key].resource_restrictions
+            )
+            assert restrictions == {"memory": 4.0}
+            shared.close()
+
+
+def sleeping_quadratic(cfg: DictConfig) -> float:
+    time.sleep(cfg.delay)
+    return cfg.x0**2
+
+
+def test_federation(tmpdir: Path) -> None:
+    kwargs = dict(threads_per_worker=1, processes=False, dashboard_address=None)
+    with LocalCluster(n_workers=1, **kwargs) as cluster_a, LocalCluster(n_workers=2, **kwargs) as cluster_b:
+        client_a, client_b = Client(cluster_a), Client(cluster_b)
+        clusters = [{"dask_client": client_a, "name": "a"}, {"dask_client": client_b, "max_in_flight": 1}]
+        sweeper = create_quadratic_sweeper(
+            Path(tmpdir), 10, search_space="tests/configspace_a.json", clusters=clusters, retries=1
+        )
+        smac = sweeper.setup_smac()
+        federation = smac._runner
+        assert isinstance(federation, FederatedRunner)
+        assert [cluster.capacity() for cluster in federation.clusters] == [1, 1]
+        smac.optimize()
+        assert smac.runhistory.finished == 10
+        assert all(cluster.n_trials > 0 and cluster.n_failed == 0 for cluster in federation.clusters)
+
+        # Losing a cluster fails its trial in flight, which runs again on the other cluster
+        sweeper.config.delay = 0.5
+        sweeper.task_function = sleeping_quadratic
+        federation = sweeper.setup_smac()._runner
+        federation.submit_trial(smac.ask())
+        lost = [cluster for cluster in federation.clusters if cluster.in_flight == 1][0]
+        lost.client.close()
+        federation.wait()
+        [(_, value)] = list(federation.iter_results())
+        assert value.status == StatusType.SUCCESS and value.additional_info[RETRIES_KEY] == 1
+        assert lost.lost and lost.n_failed == 1 and federation.route() is not lost
+        federation.close()
+        # The clients belong to the user
+        assert federation.route().client.status == "running"
+        client_a.close()
+        client_b.close()
+
+    with pytest.raises(ValueError):
+        create_quadratic_sweeper(Path(tmpdir), 4, search_space={}, use_launcher=True, clusters=clusters)
+
+
+def test_retry_policy_forced_close(tmpdir: Path) -> None:
+    sweeper = create_quadratic_sweeper(Path(tmpdir), 4, search_space="tests/configspace_a.json")
+    sweeper.config.delay = 10.0
+    sweeper.task_function = sleeping_quadratic
+    smac = sweeper.setup_smac()
+    kwargs = dict(n_workers=1, threads_per_worker=1, processes=False, dashboard_address=None)
+    with LocalCluster(**kwargs) as cluster, Client(cluster) as client:
+        retry = RetryPolicy(max_retries=3, backoff=0.0)
+        federation = FederatedRunner(smac._runner, [{"dask_client": client}], retry=retry)
+        federation.submit_trial(smac.ask())
+        # The cancelled trial in flight is not submitted again to the closing runner
+        federation.close(force=True)
+        federation.wait()
+        [(_, value)] = list(federation.iter_results())
+        assert value.status == StatusType.CRASHED and RETRIES_KEY not in value.additional_info
+        assert retry.n_retries == 0 and len(federation.clusters[0].futures) == 0
+
+
+def test_retry_policy() -> None:
+    configspace = search_space_to_config_space("tests/configspace_a.json")
+    info = TrialInfo(config=configspace.get_default_configuration())
+    errors = [CommClosedError(), KilledWorker("task", "worker", 3)]
+
+    def submit(trial_info: TrialInfo) -> Future:
+        future: Future = Future()
+        if len(errors) > 0:
+            future.set_exception(errors.pop(0))
+        else:
+            future.set_result((trial_info, TrialValue(cost=1.0)))
+        return future
+
+    # Infrastructure errors are retried with backoff, the retries are recorded
+    policy = RetryPolicy(max_retries=2, backoff=0.01)
+    assert policy.delay(1) == 0.01 and policy.delay(2) == 0.02
+    _, value = policy.submit(submit, info).result(timeout=10)
+    assert value.cost == 1.0 and value.additional_info[RETRIES_KEY] == 2 and policy.n_retries == 2
+
+    # The trial crashes once the retries are exhausted
+    errors.extend([CommClosedError()] * 3)
+    with pytest.raises(TrialLost) as e:
+        policy.submit(submit, info).result(timeout=10)
+    value = crashed_trial_value(e.value, 1000.0)
+    assert value.status == StatusType.CRASHED and value.additional_info[RETRIES_KEY] == 2
+
+    # Exceptions which are not caused by the infrastructure are not retried
+    errors.clear()
+    errors.append(ValueError())
+    with pytest.raises(ValueError):
+        policy.submit(submit, info).result(timeout=10)
+    assert policy.n_retries == 4
+    assert policy.wrap(submit) is not submit and RetryPolicy(max_retries=0).wrap(submit) is submit
+
+
+def test_coalescing() -> None:
+    configspace = search_space_to_config_space("tests/configspace_a.json")
+    info = TrialInfo(config=configspace.get_default_configuration(), seed=0)
+    other = TrialInfo(config=configspace.get_default_configuration(), seed=1)
+    futures: list[Future] = []
+
+    def submit(trial_info: TrialInfo) -> Future:
+        futures.append(Future())
+        return futures[-1]
+
+    # An identical trial is attached to the running one, a trial with another seed is submitted
+    in_flight = InFlightTrials()
+    running = in_flight.submit(submit, info)
+    attached = in_flight.submit(submit, info)
+    in_flight.submit(submit, other)
+    assert isinstance(attached, AttachedFuture) and len(futures) == 2 and in_flight.n_coalesced == 1
+    assert len(in_flight) == 2
+
+    # Both get the trial value, the attached one marked as coalesced
+    running.set_result((info, TrialValue(cost=1.0)))
+    _, value = attached.result(timeout=10)
+    assert value.cost == 1.0 and value.additional_info[COALESCED_KEY]
+    assert COALESCED_KEY not in running.result()[1].additional_info
+
+    # A finished trial is run again
+    assert len(in_flight) == 1
+    in_flight.submit(submit, info)
+    assert len(futures) == 3
+
+    # Trials are only coalesced in deterministic scenarios, identical trials of a noisy task function differ
+    sweeper = create_quadratic_sweeper(Path("unused"), 4, search_space="tests/configspace_a.json")
+    assert sweeper.get_in_flight() is not None
+    sweeper = create_quadratic_sweeper(Path("unused"), 4, search_space="tests/configspace_a.json")
+    sweeper.scenario = DictConfig({"seed": 1, "n_trials": 4, "deterministic": False})
+    assert sweeper.get_in_flight() is None
+    submit_trial = sweeper.wrap_submit(submit)
+    submit_trial(info)
+    submit_trial(info)
+    assert len(futures) == 5